@@ -1,27 +1,137 @@
-from typing import Dict, List
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 from sklearn.cluster import DBSCAN
 import numpy as np
+import pandas as pd
+from scipy import sparse
+from clustering.dedup import dedup_texts
+from clustering.neighbors import normalize_rows, radius_graph
+
+
+class ClusterResult(NamedTuple):
+    """
+    - labels: rótulo de cada entrada, na mesma ordem (-1 = ruído)
+    - stats: uma linha por cluster (ver `cluster_stats`)
+    """
+    labels: np.ndarray
+    stats: pd.DataFrame
+
+
+def _dbscan(
+    embeddings: np.ndarray,
+    eps: float,
+    min_samples: int,
+    sample_weight: Optional[List[int]] = None,
+    mode: str = "exact",
+    max_neighbors: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """DBSCAN sobre o grafo esparso: (rótulos brutos do sklearn, índices dos core points)."""
+    graph = radius_graph(np.asarray(embeddings), eps, mode=mode, max_neighbors=max_neighbors)
+    db = DBSCAN(metric='precomputed', eps=eps, min_samples=min_samples)
+    labels = db.fit_predict(graph, sample_weight=sample_weight)
+    return labels, db.core_sample_indices_
+
+
+def cluster_stats(labels: np.ndarray, embeddings: np.ndarray,
+                  sample_weight: Optional[Sequence[int]] = None) -> pd.DataFrame:
+    """
+    Estatísticas por cluster, vetorizadas (uma matriz esparsa rótulo x ponto):
+    - size: nº de reclamações (somando `sample_weight`, i.e. com duplicados)
+    - unique: nº de textos distintos
+    - share: fração do total
+    - cohesion: similaridade de cosseno média ao centróide
+
+    Ordenado por tamanho; o ruído (-1) entra como uma linha a mais.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    n = len(labels)
+    w = np.ones(n) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    ids, pos = np.unique(labels, return_inverse=True)
+    member = sparse.csr_matrix((w, (pos, np.arange(n))), shape=(len(ids), n))
+    size = np.asarray(member.sum(axis=1)).ravel()
+    # média ponderada dos vetores unitários: sua norma = cosseno médio ao centróide
+    summed = member @ normalize_rows(embeddings) if n else np.zeros((0, 1))
+    cohesion = np.linalg.norm(summed, axis=1) / np.where(size == 0, 1, size)
+    stats = pd.DataFrame({
+        "cluster": ids,
+        "size": size.astype(np.int64),
+        "unique": np.bincount(pos, minlength=len(ids)),
+        "share": size / max(size.sum(), 1),
+        "cohesion": cohesion,
+    })
+    return stats.sort_values("size", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def cluster_labels(
+    embeddings: np.ndarray,
+    eps: float = 0.3,
+    min_samples: int = 5,
+    sample_weight: Optional[Sequence[int]] = None,
+    mode: str = "exact",
+    max_neighbors: Optional[int] = None,
+) -> ClusterResult:
+    """
+    DBSCAN sobre `embeddings` → ClusterResult com um rótulo por linha.
+    IDs começam em 1 e seguem o tamanho (1 = maior); ruído fica -1.
+    """
+    embeddings = np.asarray(embeddings)
+    raw, _ = _dbscan(embeddings, eps, min_samples, sample_weight,
+                     mode=mode, max_neighbors=max_neighbors)
+    w = np.ones(len(raw)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    labels = np.full(len(raw), -1, dtype=np.int64)
+    if len(raw) and raw.max() >= 0:
+        sizes = np.bincount(raw[raw >= 0], weights=w[raw >= 0])
+        order = np.argsort(-sizes, kind="stable")
+        new_id = np.empty(len(order), dtype=np.int64)
+        new_id[order] = np.arange(1, len(order) + 1)
+        labels[raw >= 0] = new_id[raw[raw >= 0]]
+    return ClusterResult(labels, cluster_stats(labels, embeddings, sample_weight))
+
+
+def cluster_unique(
+    texts: Sequence[str],
+    embed: Callable[[List[str]], np.ndarray],
+    **params,
+) -> ClusterResult:
+    """
+    Deduplica, embeda e clusteriza só os textos únicos (com o tamanho de cada
+    grupo como peso) e espalha os rótulos de volta por posição: o resultado
+    fica alinhado a `texts`, sem junção por descrição.
+    """
+    dd = dedup_texts(texts)
+    canonical = [texts[i] for i in dd.canonical]
+    result = cluster_labels(embed(canonical), sample_weight=dd.counts, **params)
+    return ClusterResult(dd.broadcast(result.labels), result.stats)
 
 
 def cluster_texts(
-    embeddings: list[list[float]],
+    embeddings: np.ndarray,
     texts: List[str],
     eps: float = 0.3,
     min_samples: int = 5,
+    sample_weight: Optional[List[int]] = None,
+    mode: str = "exact",
+    max_neighbors: Optional[int] = None,
 ) -> Dict[int, List[str]]:
     """
-    Agrupa textos em clusters via DBSCAN (distância de cosseno).
-    - embeddings: lista de vetores (mesma ordem de `texts`)
+    Agrupa textos em clusters via DBSCAN (distância de cosseno) sobre um
+    grafo esparso de vizinhos (`radius_graph`), sem a matriz n x n.
+    - embeddings: matriz (n, dim) de vetores (mesma ordem de `texts`)
     - texts: lista de strings
     - eps: limiar de distância para o DBSCAN
     - min_samples: min. de pontos para formar um cluster
+    - sample_weight: peso de cada texto (ex.: tamanho do grupo de duplicados),
+      para que textos deduplicados contem como antes na densidade
+    - mode: "exact" (busca por raio) ou "approximate" (FAISS HNSW)
+    - max_neighbors: teto de arestas por ponto (memória fixa em bases enormes)
 
     Retorna um dict mapping cluster_id -> lista de textos.
     rótulo -1 representa "noise" (fora de cluster).
+
+    Textos repetidos se misturam nas listas; para rótulos alinhados às
+    linhas use `cluster_labels`/`cluster_unique`.
     """
-    X = np.array(embeddings)
-    db = DBSCAN(metric='cosine', eps=eps, min_samples=min_samples)
-    raw_labels = db.fit_predict(X).tolist()
+    raw_labels = _dbscan(embeddings, eps, min_samples, sample_weight,
+                         mode=mode, max_neighbors=max_neighbors)[0].tolist()
     # remapeia labels originais (ordenados) para novos IDs começando em 1
     unique_raw = sorted(set(raw_labels))
     mapping = {raw: idx + 1 for idx, raw in enumerate(unique_raw)}
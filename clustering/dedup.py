@@ -0,0 +1,122 @@
+import hashlib, re, unicodedata, zlib
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços colapsados."""
+    t = unicodedata.normalize("NFKD", text or "")
+    t = "".join(ch for ch in t if not unicodedata.combining(ch)).lower()
+    t = _PUNCT.sub(" ", t)
+    return _SPACES.sub(" ", t).strip()
+
+
+@dataclass
+class DedupResult:
+    """
+    - canonical: posições (em `texts`) dos textos representantes
+    - inverse: para cada texto, o índice do seu representante em `canonical`
+    - counts: quantos textos cada representante cobre
+    """
+    canonical: np.ndarray
+    inverse: np.ndarray
+    counts: np.ndarray
+
+    def broadcast(self, values: Sequence) -> np.ndarray:
+        """Espalha valores calculados para os canônicos de volta a todos os textos."""
+        return np.asarray(values)[self.inverse]
+
+
+def _shingles(text: str, k: int) -> List[str]:
+    words = text.split()
+    if len(words) <= k:
+        return [text]
+    return [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+
+def _bands_for(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Escolhe (bandas, linhas) cujo limiar (1/b)^(1/r) fica mais perto de `threshold`."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def _minhash(shingles: List[str], a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                    dtype=np.uint64, count=len(shingles))
+    # hashing multiply-add-shift: (a*h + b) mod 2^64, 32 bits mais altos
+    return ((a[:, None] * h[None, :] + b[:, None]) >> np.uint64(32)).min(axis=1)
+
+
+def dedup_texts(texts: Sequence[str], threshold: float = 0.85, num_perm: int = 64,
+                shingle_size: int = 3, seed: int = 42) -> DedupResult:
+    """
+    Agrupa textos duplicados em dois níveis antes do NLP:
+
+    1. exatos: hash do texto normalizado (acentos, caixa, pontuação);
+    2. quase-duplicados: MinHash sobre shingles de palavras + LSH em
+       bandas; pares candidatos com Jaccard estimado >= `threshold`
+       entram no mesmo grupo.
+
+    O representante de cada grupo é a primeira ocorrência. Processe só
+    `texts[canonical]` e use `broadcast` para devolver o resultado a todos.
+    """
+    n = len(texts)
+    # 1) exatos
+    first_of: Dict[bytes, int] = {}
+    exact = np.empty(n, dtype=np.int64)
+    norms: List[str] = []
+    for i, t in enumerate(texts):
+        norm = normalize_text(t)
+        key = hashlib.blake2b(norm.encode("utf-8"), digest_size=16).digest()
+        if key not in first_of:
+            first_of[key] = len(norms)
+            norms.append(norm)
+        exact[i] = first_of[key]
+    m = len(norms)
+
+    # 2) quase-duplicados entre os textos únicos (union-find)
+    parent = np.arange(m)
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    if threshold < 1.0 and m > 1:
+        rng = np.random.default_rng(seed)
+        a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+        sigs = np.stack([_minhash(_shingles(t, shingle_size), a, b) for t in norms])
+        bands, rows = _bands_for(threshold, num_perm)
+        for band in range(bands):
+            buckets: Dict[bytes, int] = {}
+            block = np.ascontiguousarray(sigs[:, band * rows:(band + 1) * rows])
+            for j in range(m):
+                key = block[j].tobytes()
+                other = buckets.setdefault(key, j)
+                if other == j:
+                    continue
+                ri, rj = find(other), find(j)
+                if ri != rj and np.mean(sigs[other] == sigs[j]) >= threshold:
+                    parent[max(ri, rj)] = min(ri, rj)
+
+    roots = np.array([find(j) for j in range(m)], dtype=np.int64)
+    group_of_text = roots[exact]
+    # representante = primeira ocorrência do grupo em `texts`
+    uniq_roots, first_pos, inverse, counts = np.unique(
+        group_of_text, return_index=True, return_inverse=True, return_counts=True
+    )
+    # reordena os grupos pela ordem de aparição
+    order = np.argsort(first_pos)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return DedupResult(
+        canonical=first_pos[order],
+        inverse=rank[inverse],
+        counts=counts[order],
+    )
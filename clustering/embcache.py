@@ -0,0 +1,195 @@
+import hashlib, json, os, re, threading, unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+EMBED_CACHE_DIR = Path(os.environ.get("SPOTLIGHT_EMBED_CACHE_DIR", "data/embeddings"))
+# float16 corta o disco pela metade; as consultas devolvem sempre float32
+EMBED_CACHE_DTYPE = os.environ.get("SPOTLIGHT_EMBED_CACHE_DTYPE", "float32")
+KEY_SIZE = 16
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Normalização da chave: NFC + espaços colapsados (caixa e acentos importam ao modelo)."""
+    return _SPACES.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Trava exclusiva entre processos (flock; msvcrt no Windows) no arquivo `path`."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    """
+    Cache em disco de embeddings, endereçado por conteúdo.
+
+    Chave = blake2b(modelo + texto normalizado). Por modelo há dois
+    arquivos só de acréscimo:
+
+    - `keys.bin`: as chaves, 16 bytes cada, na ordem das linhas;
+    - `vectors.bin`: a matriz (n, dim) em float32/float16, lida via memmap.
+
+    Vários processos (sessões do Streamlit, servidor de inferência) podem
+    compartilhar os arquivos: acréscimos e cortes acontecem sob uma trava
+    exclusiva (`lock`), a linha inicial de um acréscimo vem do tamanho de
+    `vectors.bin` no disco e as chaves gravadas por outros processos são
+    relidas antes de cada consulta. Os vetores são gravados antes das
+    chaves, então uma escrita interrompida nunca deixa uma chave apontando
+    para um vetor ausente. A dimensão fica em `meta.json`: com tudo em
+    cache, nem o modelo precisa ser carregado.
+    """
+
+    def __init__(self, model_name: str, root: Path = EMBED_CACHE_DIR,
+                 dtype: str = EMBED_CACHE_DTYPE):
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.dir = root / re.sub(r"[^\w.-]+", "_", model_name) / self.dtype.name
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._keys_path = self.dir / "keys.bin"
+        self._vec_path = self.dir / "vectors.bin"
+        self._meta_path = self.dir / "meta.json"
+        self._lock_path = self.dir / "lock"
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self.dim: Optional[int] = None
+        self._mmap: Optional[np.ndarray] = None
+        self._keys_size = 0
+        with self._lock, _locked(self._lock_path):
+            self._truncate_torn()
+            self._refresh()
+
+    def _row_bytes(self) -> int:
+        return self.dim * self.dtype.itemsize
+
+    def _truncate_torn(self) -> None:
+        """Descarta o rabo de uma escrita interrompida (só sob a trava de arquivo)."""
+        if self.dim is None and self._meta_path.exists():
+            self.dim = json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"]
+        if self.dim is None:
+            return
+        keys = self._keys_path.stat().st_size // KEY_SIZE if self._keys_path.exists() else 0
+        rows = self._vec_path.stat().st_size // self._row_bytes() if self._vec_path.exists() else 0
+        n = min(keys, rows)
+        for path, size in ((self._keys_path, n * KEY_SIZE), (self._vec_path, n * self._row_bytes())):
+            if path.exists() and path.stat().st_size != size:
+                os.truncate(path, size)
+
+    def _refresh(self) -> None:
+        """Lê as chaves acrescentadas (por este ou outro processo) desde a última leitura."""
+        if self.dim is None:
+            if not self._meta_path.exists():
+                return
+            self.dim = json.loads(self._meta_path.read_text(encoding="utf-8"))["dim"]
+        size = self._keys_path.stat().st_size if self._keys_path.exists() else 0
+        if size == self._keys_size:
+            return
+        rows = self._vec_path.stat().st_size // self._row_bytes() if self._vec_path.exists() else 0
+        n = min(size // KEY_SIZE, rows)
+        start = len(self._index)
+        with open(self._keys_path, "rb") as f:
+            f.seek(start * KEY_SIZE)
+            data = f.read((n - start) * KEY_SIZE)
+        for i in range(n - start):
+            self._index.setdefault(data[i * KEY_SIZE:(i + 1) * KEY_SIZE], start + i)
+        self._keys_size = n * KEY_SIZE
+        self._remap(n)
+
+    def _remap(self, n: int) -> None:
+        if n:
+            self._mmap = np.memmap(self._vec_path, dtype=self.dtype, mode="r", shape=(n, self.dim))
+        else:
+            self._mmap = np.empty((0, self.dim), dtype=self.dtype)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def keys_for(self, texts: Sequence[str]) -> List[bytes]:
+        prefix = self.model_name.encode("utf-8") + b"\0"
+        return [
+            hashlib.blake2b(prefix + normalize(t).encode("utf-8"), digest_size=KEY_SIZE).digest()
+            for t in texts
+        ]
+
+    def lookup(self, keys: Sequence[bytes]) -> np.ndarray:
+        """Linha de cada chave no cache, ou -1 quando ausente."""
+        with self._lock:
+            with _locked(self._lock_path):
+                self._refresh()
+            return np.fromiter((self._index.get(k, -1) for k in keys), dtype=np.int64, count=len(keys))
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Vetores das linhas `rows` (todas presentes) como float32."""
+        with self._lock:
+            if self._mmap is None:
+                return np.empty((len(rows), 0), dtype=np.float32)
+            return np.asarray(self._mmap[rows], dtype=np.float32)
+
+    def add(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Acrescenta vetores novos (chaves já presentes, aqui ou no disco, são ignoradas)."""
+        vectors = np.asarray(vectors)
+        with self._lock, _locked(self._lock_path):
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                self._meta_path.write_text(json.dumps({"dim": self.dim}), encoding="utf-8")
+            vectors = vectors.reshape(len(keys), self.dim)
+            fresh: Dict[bytes, int] = {}
+            for i, k in enumerate(keys):
+                if k not in self._index and k not in fresh:
+                    fresh[k] = i
+            if not fresh:
+                return
+            # linhas numeradas pelo que está no disco, não pela memória deste processo
+            self._truncate_torn()
+            start = self._vec_path.stat().st_size // self._row_bytes() if self._vec_path.exists() else 0
+            pos = list(fresh.values())
+            with open(self._vec_path, "ab") as f:
+                f.write(np.ascontiguousarray(vectors[pos], dtype=self.dtype).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(fresh))
+            for offset, k in enumerate(fresh):
+                self._index[k] = start + offset
+            self._keys_size = (start + len(fresh)) * KEY_SIZE
+            self._remap(start + len(fresh))
+
+    def get_or_compute(self, texts: Sequence[str],
+                       encode: Callable[[List[str]], np.ndarray]) -> Tuple[np.ndarray, int]:
+        """
+        Embeddings de `texts` (float32, mesma ordem); só os ausentes passam
+        por `encode(lista de textos) -> ndarray`. Retorna (matriz, nº codificados).
+        """
+        keys = self.keys_for(texts)
+        rows = self.lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            # um texto repetido entre os ausentes é codificado uma vez só
+            first: Dict[bytes, int] = {}
+            for i in missing:
+                first.setdefault(keys[i], int(i))
+            todo = list(first.values())
+            self.add([keys[i] for i in todo], encode([texts[i] for i in todo]))
+            rows = self.lookup(keys)
+            return self.take(rows), len(todo)
+        return self.take(rows), 0
@@ -1,18 +1,159 @@
-from sentence_transformers import SentenceTransformer
+import atexit, logging, os, threading, time
+from typing import Optional
+import numpy as np
+from clustering.embcache import EmbeddingCache
+from inference import client as inference
 
-# mantém o modelo carregado em cache
-_model = None
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
+# modelo leve e eficiente
+MODEL_NAME = 'all-MiniLM-L6-v2'
+EMBED_BATCH_SIZE = int(os.environ.get("SPOTLIGHT_EMBED_BATCH_SIZE", 64))
+# 0 = em processo; >1 = pool de processos (CPU) para lotes grandes
+EMBED_PROCESSES = int(os.environ.get("SPOTLIGHT_EMBED_PROCESSES", 0))
+EMBED_THREADS = int(os.environ.get("SPOTLIGHT_EMBED_THREADS", 0))
+# float32 | float16 | int8
+EMBED_PRECISION = os.environ.get("SPOTLIGHT_EMBED_PRECISION", "float32")
+# abaixo disso o custo de subir/alimentar o pool não compensa
+POOL_MIN_TEXTS = 5_000
+
+
+def quantize(embs: np.ndarray, precision: str) -> np.ndarray:
+    """
+    Reduz a precisão da saída. `int8` normaliza cada vetor e escala para
+    [-127, 127]: a distância de cosseno (usada no DBSCAN) é preservada.
+    """
+    if precision == "float32":
+        return embs.astype(np.float32, copy=False)
+    if precision == "float16":
+        return embs.astype(np.float16)
+    if precision == "int8":
+        norms = np.linalg.norm(embs, axis=1, keepdims=True)
+        unit = embs / np.where(norms == 0, 1, norms)
+        return np.round(unit * 127).astype(np.int8)
+    raise ValueError(f"Precisão desconhecida: {precision}")
+
+
+class EmbeddingEngine:
+    """
+    Codificador de embeddings para CPU.
+
+    - lotes por comprimento: os textos são ordenados pelo nº de tokens,
+      então cada lote tem pouco padding (e cada worker do pool recebe
+      blocos de tamanho parecido);
+    - `processes > 1`: pool multi-processo do SentenceTransformer, com as
+      threads do torch repartidas entre os workers para não disputar núcleos;
+    - `threads`: threads do torch no processo atual;
+    - `precision`: float32, float16 ou int8 na saída.
+
+    Cada chamada registra a vazão (textos/s).
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = EMBED_BATCH_SIZE,
+                 processes: int = EMBED_PROCESSES, threads: int = EMBED_THREADS,
+                 precision: str = EMBED_PRECISION):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.processes = processes
+        self.threads = threads or os.cpu_count() or 1
+        self.precision = precision
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            import torch
+            from sentence_transformers import SentenceTransformer
+            torch.set_num_threads(self.threads)
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def _token_lengths(self, texts: list[str]) -> np.ndarray:
+        tok = self.model.tokenizer(texts, add_special_tokens=False, truncation=True,
+                                   max_length=self.model.max_seq_length)
+        return np.fromiter((len(ids) for ids in tok["input_ids"]), dtype=np.int64, count=len(texts))
+
+    def _start_pool(self):
+        if self._pool is None:
+            # cada worker herda OMP_NUM_THREADS na inicialização do torch
+            per_worker = max(1, self.threads // self.processes)
+            previous = os.environ.get("OMP_NUM_THREADS")
+            os.environ["OMP_NUM_THREADS"] = str(per_worker)
+            try:
+                self._pool = self.model.start_multi_process_pool(["cpu"] * self.processes)
+            finally:
+                if previous is None:
+                    os.environ.pop("OMP_NUM_THREADS", None)
+                else:
+                    os.environ["OMP_NUM_THREADS"] = previous
+            atexit.register(self.close)
+            logger.info("🧵 Pool de embeddings: %d processos x %d threads", self.processes, per_worker)
+        return self._pool
+
+    def encode_raw(self, texts: list[str]) -> np.ndarray:
+        """Embeddings float32 na ordem de `texts` (sem reduzir precisão)."""
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        start = time.perf_counter()
+        with self._lock:
+            order = np.argsort(self._token_lengths(texts), kind="stable")
+            ordered = [texts[i] for i in order]
+            if self.processes > 1 and len(texts) >= POOL_MIN_TEXTS:
+                chunk = max(self.batch_size, -(-len(texts) // (self.processes * 4)))
+                embs = self.model.encode_multi_process(
+                    ordered, self._start_pool(), batch_size=self.batch_size, chunk_size=chunk
+                )
+            else:
+                embs = self.model.encode(ordered, batch_size=self.batch_size,
+                                         show_progress_bar=False, convert_to_numpy=True)
+        out = np.empty_like(embs, dtype=np.float32)
+        out[order] = embs
+        elapsed = time.perf_counter() - start
+        logger.info("⚡ %d textos em %.1fs (%.0f textos/s)", len(texts), elapsed,
+                    len(texts) / max(elapsed, 1e-9))
+        return out
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return quantize(self.encode_raw(texts), self.precision)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+
+# mantém o engine (modelo) e o cache carregados
+_engine: Optional[EmbeddingEngine] = None
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_engine() -> EmbeddingEngine:
+    global _engine
+    if _engine is None:
+        _engine = EmbeddingEngine()
+    return _engine
+
+
+def embed_texts(texts: list[str], precision: Optional[str] = None) -> np.ndarray:
     """
     Gera embeddings para uma lista de textos usando SentenceTransformer.
-    Retorna uma lista de vetores.
+    Retorna uma matriz (len(texts), dim), em float32 por padrão
+    (ou `precision`: float16/int8).
+
+    Usa um cache em disco por conteúdo (`EmbeddingCache`): só textos nunca
+    vistos passam pelo modelo, que nem é carregado quando tudo já está em cache.
+    Os ausentes vão ao servidor de inferência compartilhado quando ele está
+    no ar (`inference.server`); senão, ao modelo deste processo.
     """
-    global _model
-    if _model is None:
-        # modelo leve e eficiente
-        _model = SentenceTransformer('all-MiniLM-L6-v2')
-    # encode retorna numpy.ndarray
-    embs = _model.encode(texts, show_progress_bar=False)
-    # converte para lista de listas para compatibilidade
-    return embs.tolist()
\ No newline at end of file
+    global _cache
+    engine = get_engine()
+    if _cache is None:
+        _cache = EmbeddingCache(engine.model_name)
+    embs, encoded = _cache.get_or_compute(
+        list(texts), lambda todo: inference.run("embed", todo, engine.encode_raw)
+    )
+    logger.info("🧮 %d embeddings (%d calculados, %d do cache)", len(texts), encoded, len(texts) - encoded)
+    return quantize(embs, precision or engine.precision)
@@ -0,0 +1,232 @@
+import hashlib, json, logging, os, re
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from clustering.cluster import _dbscan
+from clustering.embcache import normalize
+from clustering.neighbors import faiss, normalize_rows
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CLUSTER_DIR = Path(os.environ.get("SPOTLIGHT_CLUSTER_DIR", "data/clusters"))
+# fração de textos novos que caíram em ruído a partir da qual o modelo é refeito
+DRIFT_THRESHOLD = float(os.environ.get("SPOTLIGHT_CLUSTER_DRIFT", 0.2))
+# crescimento (novos / ajustados) a partir do qual o modelo é refeito
+GROWTH_THRESHOLD = 0.5
+# core points guardados por cluster (amostra), para o índice ficar pequeno
+MAX_CORES_PER_CLUSTER = 256
+# a partir daqui a atribuição usa HNSW em vez de força bruta
+HNSW_MIN_CORES = 2_000
+
+
+def text_keys(texts: Sequence[str]) -> np.ndarray:
+    return np.array(
+        [hashlib.blake2b(normalize(t).encode("utf-8"), digest_size=16).digest() for t in texts],
+        dtype="S16",
+    )
+
+
+def _slug(company: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", company.strip().upper())
+
+
+class ClusterModel:
+    """
+    Modelo de clusters persistido por empresa.
+
+    Guarda uma amostra dos core points de cada cluster (vetores unitários)
+    com o ID estável do cluster, e o rótulo de cada texto já visto (por hash).
+    Textos novos são atribuídos ao cluster do core point mais próximo a até
+    `eps` (HNSW quando há muitos cores) ou viram ruído (-1). Se ruído ou
+    crescimento passarem do limite, `needs_refit` pede uma reclusterização
+    completa, que reaproveita os IDs antigos por sobreposição.
+    """
+
+    def __init__(self, eps: float, min_samples: int, cores: np.ndarray, core_labels: np.ndarray,
+                 keys: np.ndarray, labels: np.ndarray, next_id: int, n_fit: int,
+                 n_new: int = 0, n_new_noise: int = 0, fitted_at: Optional[str] = None):
+        self.eps = eps
+        self.min_samples = min_samples
+        self.cores = cores
+        self.core_labels = core_labels
+        self.keys = keys
+        self.labels = labels
+        self.next_id = next_id
+        self.n_fit = n_fit
+        self.n_new = n_new
+        self.n_new_noise = n_new_noise
+        self.fitted_at = fitted_at or datetime.utcnow().isoformat()
+        self._index = None
+
+    # --- persistência ---
+    @staticmethod
+    def path_for(company: str) -> Path:
+        return CLUSTER_DIR / f"{_slug(company)}.npz"
+
+    @classmethod
+    def load(cls, company: str) -> Optional["ClusterModel"]:
+        path = cls.path_for(company)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as z:
+                meta = json.loads(str(z["meta"]))
+                return cls(cores=z["cores"], core_labels=z["core_labels"],
+                           keys=z["keys"], labels=z["labels"], **meta)
+        except Exception as e:
+            logger.warning("⚠️ Modelo de clusters ilegível (%s): %s", path, e)
+            return None
+
+    def save(self, company: str) -> None:
+        path = self.path_for(company)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "eps": self.eps, "min_samples": self.min_samples, "next_id": self.next_id,
+            "n_fit": self.n_fit, "n_new": self.n_new, "n_new_noise": self.n_new_noise,
+            "fitted_at": self.fitted_at,
+        }
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, meta=json.dumps(meta), cores=self.cores, core_labels=self.core_labels,
+                 keys=self.keys, labels=self.labels)
+        os.replace(tmp, path)
+
+    # --- atribuição ---
+    def _nearest(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(similaridade, posição) do core point mais próximo de cada linha."""
+        if faiss is not None and len(self.cores) >= HNSW_MIN_CORES:
+            if self._index is None:
+                self._index = faiss.IndexHNSWFlat(self.cores.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+                self._index.add(self.cores)
+            S, I = self._index.search(X, 1)
+            return S[:, 0], I[:, 0]
+        sims = X @ self.cores.T
+        best = sims.argmax(axis=1)
+        return sims[np.arange(len(X)), best], best
+
+    def assign(self, embeddings: np.ndarray) -> np.ndarray:
+        X = normalize_rows(embeddings)
+        if len(X) == 0 or len(self.cores) == 0:
+            return np.full(len(X), -1, dtype=np.int64)
+        sims, pos = self._nearest(X)
+        return np.where((pos >= 0) & (1.0 - sims <= self.eps), self.core_labels[pos], -1)
+
+    def record(self, keys: np.ndarray, labels: np.ndarray) -> None:
+        """Guarda os rótulos atribuídos e atualiza as estatísticas de drift."""
+        self.keys = np.concatenate([self.keys, keys])
+        self.labels = np.concatenate([self.labels, labels])
+        self.n_new += len(keys)
+        self.n_new_noise += int((labels == -1).sum())
+
+    def drift(self) -> Dict[str, float]:
+        return {
+            "new": self.n_new,
+            "noise_ratio": self.n_new_noise / self.n_new if self.n_new else 0.0,
+            "growth": self.n_new / self.n_fit if self.n_fit else 0.0,
+        }
+
+    def needs_refit(self, threshold: float = DRIFT_THRESHOLD) -> bool:
+        d = self.drift()
+        return d["noise_ratio"] > threshold or d["growth"] > GROWTH_THRESHOLD
+
+
+def _stable_ids(old: Optional[ClusterModel], keys: np.ndarray,
+                raw: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Rótulos do sklearn → IDs estáveis. Cada cluster novo herda o ID antigo
+    com que mais compartilha textos (casamento guloso, um a um); os demais
+    recebem IDs novos. Sem modelo anterior, IDs seguem o tamanho (1 = maior).
+    """
+    labels = np.full(len(raw), -1, dtype=np.int64)
+    clusters = [c for c, _ in Counter(raw[raw >= 0].tolist()).most_common()]
+    next_id = old.next_id if old else 1
+    mapping: Dict[int, int] = {}
+    if old is not None and len(old.keys):
+        previous = dict(zip(old.keys.tolist(), old.labels.tolist()))
+        pairs = Counter()
+        for k, c in zip(keys.tolist(), raw.tolist()):
+            o = previous.get(k, -1)
+            if c >= 0 and o >= 0:
+                pairs[(c, o)] += 1
+        taken = set()
+        for (c, o), _ in pairs.most_common():
+            if c not in mapping and o not in taken:
+                mapping[c] = o
+                taken.add(o)
+    for c in clusters:
+        if c not in mapping:
+            mapping[c] = next_id
+            next_id += 1
+    for c, new_id in mapping.items():
+        labels[raw == c] = new_id
+    return labels, next_id
+
+
+def fit_model(keys: np.ndarray, embeddings: np.ndarray, eps: float, min_samples: int,
+              sample_weight: Optional[List[int]] = None, previous: Optional[ClusterModel] = None,
+              **backend: Any) -> Tuple[np.ndarray, ClusterModel]:
+    """Reclusterização completa; IDs reaproveitados de `previous` quando possível."""
+    raw, core_idx = _dbscan(embeddings, eps, min_samples, sample_weight, **backend)
+    labels, next_id = _stable_ids(previous, keys, raw)
+
+    rng = np.random.default_rng(0)
+    keep: List[np.ndarray] = []
+    core_idx = np.asarray(core_idx, dtype=np.int64)
+    for cid in np.unique(labels[core_idx]) if len(core_idx) else []:
+        members = core_idx[labels[core_idx] == cid]
+        if len(members) > MAX_CORES_PER_CLUSTER:
+            members = rng.choice(members, MAX_CORES_PER_CLUSTER, replace=False)
+        keep.append(members)
+    sel = np.concatenate(keep) if keep else np.empty(0, dtype=np.int64)
+    X = normalize_rows(embeddings)
+    model = ClusterModel(
+        eps=eps, min_samples=min_samples,
+        cores=X[sel], core_labels=labels[sel],
+        keys=keys, labels=labels, next_id=next_id, n_fit=len(keys),
+    )
+    return labels, model
+
+
+def cluster_incremental(company: str, texts: Sequence[str], embeddings: np.ndarray,
+                        eps: float = 0.3, min_samples: int = 5,
+                        sample_weight: Optional[List[int]] = None, refit: bool = False,
+                        drift_threshold: float = DRIFT_THRESHOLD,
+                        **backend: Any) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Rótulos (alinhados a `texts`) usando o modelo salvo da empresa.
+
+    Textos já vistos mantêm o rótulo; só os novos são atribuídos. A
+    reclusterização completa acontece sem modelo, com outros parâmetros,
+    com `refit=True` ou quando o drift passa do limite.
+    Retorna (rótulos, info) — info traz modo, novos e drift.
+    """
+    keys = text_keys(texts)
+    embeddings = np.asarray(embeddings)
+    model = None if refit else ClusterModel.load(company)
+    previous = model if model is not None else ClusterModel.load(company)
+
+    reason = "pedido" if refit else "sem modelo"
+    if model is not None and (model.eps, model.min_samples) != (eps, min_samples):
+        reason, model = "parâmetros mudaram", None
+    if model is not None:
+        known = dict(zip(model.keys.tolist(), model.labels.tolist()))
+        labels = np.array([known.get(k, -1) for k in keys.tolist()], dtype=np.int64)
+        new = np.array([k not in known for k in keys.tolist()], dtype=bool)
+        if new.any():
+            labels[new] = model.assign(embeddings[new])
+            model.record(keys[new], labels[new])
+        if not model.needs_refit(drift_threshold):
+            model.save(company)
+            info = {"mode": "incremental", "assigned": int(new.sum()), **model.drift()}
+            logger.info("➕ %s: %d textos novos atribuídos (%s)", company, int(new.sum()), info)
+            return labels, info
+        reason = "drift"
+
+    labels, model = fit_model(keys, embeddings, eps, min_samples, sample_weight,
+                              previous=previous, **backend)
+    model.save(company)
+    info = {"mode": "full", "reason": reason, "clusters": int(len(set(labels.tolist()) - {-1}))}
+    logger.info("🔁 %s reclusterizado (%s): %s", company, reason, info)
+    return labels, info
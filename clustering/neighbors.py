@@ -0,0 +1,178 @@
+import logging, os
+from typing import List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# linhas consultadas por vez: limita a memória das buscas a GRAPH_BATCH x vizinhos
+GRAPH_BATCH = int(os.environ.get("SPOTLIGHT_GRAPH_BATCH", 4096))
+# distância mínima gravada no grafo: zeros explícitos seriam tratados como "não vizinho"
+_TINY = 1e-9
+
+try:
+    import faiss
+except ImportError:  # faiss é opcional; sem ele o modo exato usa o sklearn
+    faiss = None
+
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """Vetores unitários em float32: produto interno = similaridade de cosseno."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    return X / np.where(norms == 0, 1, norms)
+
+
+def _to_csr(n: int, rows: List[np.ndarray], cols: List[np.ndarray],
+            dists: List[np.ndarray]) -> sparse.csr_matrix:
+    r = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    c = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+    d = np.concatenate(dists) if dists else np.empty(0, dtype=np.float32)
+    # o próprio ponto conta na vizinhança, como no DBSCAN denso
+    r = np.concatenate([r, np.arange(n)])
+    c = np.concatenate([c, np.arange(n)])
+    d = np.concatenate([np.maximum(d, _TINY), np.full(n, _TINY, dtype=np.float32)])
+    graph = sparse.coo_matrix((d.astype(np.float32), (r, c)), shape=(n, n)).tocsr()
+    graph.sum_duplicates()  # self-loop vindo da busca + o acrescentado
+    graph.data = np.minimum(graph.data, 2.0).astype(np.float32)
+    return graph
+
+
+def _cap(sims: np.ndarray, ids: np.ndarray, max_neighbors: Optional[int]):
+    if max_neighbors is None or len(ids) <= max_neighbors:
+        return sims, ids
+    keep = np.argpartition(-sims, max_neighbors - 1)[:max_neighbors]
+    return sims[keep], ids[keep]
+
+
+def radius_graph(X: np.ndarray, eps: float, mode: str = "exact",
+                 max_neighbors: Optional[int] = None, k: int = 32,
+                 index: str = "hnsw") -> sparse.csr_matrix:
+    """
+    Grafo esparso (n, n) com a distância de cosseno dos pares a até `eps`.
+
+    - `exact`: vetores normalizados, busca por raio (FAISS `range_search`
+      com produto interno, ou árvore/força bruta em blocos do sklearn com o
+      raio euclidiano equivalente `sqrt(2 * eps)`);
+    - `approximate`: `k` vizinhos aproximados (FAISS HNSW ou IVF), mantendo
+      só os que estão a até `eps`.
+
+    As consultas andam em blocos de `GRAPH_BATCH` linhas e `max_neighbors`
+    limita as arestas por ponto (as mais próximas), então a memória depende
+    do tamanho do grafo, não de n².
+    """
+    Xn = normalize_rows(X)
+    n = len(Xn)
+    if n == 0:
+        return sparse.csr_matrix((0, 0), dtype=np.float32)
+    if mode == "approximate" and faiss is None:
+        logger.warning("⚠️ faiss indisponível; usando o modo exato")
+        mode = "exact"
+
+    rows, cols, dists = [], [], []
+
+    def add(i: int, sims: np.ndarray, ids: np.ndarray) -> None:
+        sims, ids = _cap(sims, ids, max_neighbors)
+        rows.append(np.full(len(ids), i, dtype=np.int64))
+        cols.append(ids.astype(np.int64))
+        dists.append((1.0 - sims).astype(np.float32))
+
+    if mode == "exact" and faiss is not None:
+        idx = faiss.IndexFlatIP(Xn.shape[1])
+        idx.add(Xn)
+        for start in range(0, n, GRAPH_BATCH):
+            lims, D, I = idx.range_search(Xn[start:start + GRAPH_BATCH], 1.0 - eps)
+            lims = lims.astype(np.int64)
+            if max_neighbors is None:
+                # bloco inteiro de uma vez, sem laço por linha
+                rows.append(start + np.repeat(np.arange(len(lims) - 1), np.diff(lims)))
+                cols.append(I.astype(np.int64))
+                dists.append((1.0 - D).astype(np.float32))
+                continue
+            for j in range(len(lims) - 1):
+                add(start + j, D[lims[j]:lims[j + 1]], I[lims[j]:lims[j + 1]])
+    elif mode == "exact":
+        from sklearn.neighbors import NearestNeighbors
+        nn = NearestNeighbors(radius=float(np.sqrt(2 * eps))).fit(Xn)
+        for start in range(0, n, GRAPH_BATCH):
+            D, I = nn.radius_neighbors(Xn[start:start + GRAPH_BATCH])
+            for j, (d, ids) in enumerate(zip(D, I)):
+                add(start + j, 1.0 - d ** 2 / 2, ids)
+    elif mode == "approximate":
+        idx = _ann_index(Xn, index)
+        kk = min(k, n)
+        for start in range(0, n, GRAPH_BATCH):
+            S, I = idx.search(Xn[start:start + GRAPH_BATCH], kk)
+            ok = (I >= 0) & (S >= 1.0 - eps)
+            rows.append(start + np.nonzero(ok)[0])
+            cols.append(I[ok].astype(np.int64))
+            dists.append((1.0 - S[ok]).astype(np.float32))
+    else:
+        raise ValueError(f"Modo de vizinhança desconhecido: {mode}")
+
+    graph = _to_csr(n, rows, cols, dists)
+    logger.info("🕸️ Grafo de vizinhança (%s): %d pontos, %d arestas", mode, n, graph.nnz)
+    return graph
+
+
+def _ann_index(Xn: np.ndarray, kind: str):
+    """Índice FAISS aproximado por produto interno (HNSW, ou IVF para bases muito grandes)."""
+    n, dim = Xn.shape
+    if kind == "hnsw":
+        idx = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+        idx.hnsw.efConstruction = 80
+        idx.hnsw.efSearch = 64
+    elif kind == "ivf":
+        nlist = max(1, int(4 * np.sqrt(n)))
+        quantizer = faiss.IndexFlatIP(dim)
+        idx = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        sample = Xn[np.random.default_rng(0).choice(n, min(n, nlist * 40), replace=False)]
+        idx.train(sample)
+        idx.nprobe = min(nlist, 16)
+    else:
+        raise ValueError(f"Índice aproximado desconhecido: {kind}")
+    idx.add(Xn)
+    return idx
+
+
+def knn_graph(X: np.ndarray, k: int, mode: str = "exact",
+              index: str = "hnsw") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k vizinhos mais próximos de cada ponto (incluindo ele mesmo), ordenados
+    por distância: (distâncias de cosseno (n, k) float32, ids (n, k) int64).
+    Ids -1 marcam vagas não preenchidas (índices aproximados ou n < k).
+    """
+    Xn = normalize_rows(X)
+    n = len(Xn)
+    kk = min(k, n)
+    dist = np.full((n, k), np.inf, dtype=np.float32)
+    ids = np.full((n, k), -1, dtype=np.int64)
+    if n == 0:
+        return dist, ids
+    if mode == "approximate" and faiss is None:
+        logger.warning("⚠️ faiss indisponível; usando o modo exato")
+        mode = "exact"
+
+    if faiss is not None:
+        if mode == "exact":
+            idx = faiss.IndexFlatIP(Xn.shape[1])
+            idx.add(Xn)
+        else:
+            idx = _ann_index(Xn, index)
+        for start in range(0, n, GRAPH_BATCH):
+            S, I = idx.search(Xn[start:start + GRAPH_BATCH], kk)
+            dist[start:start + len(S), :kk] = np.where(I >= 0, 1.0 - S, np.inf)
+            ids[start:start + len(S), :kk] = I
+    elif mode == "exact":
+        from sklearn.neighbors import NearestNeighbors
+        nn = NearestNeighbors(n_neighbors=kk).fit(Xn)
+        for start in range(0, n, GRAPH_BATCH):
+            D, I = nn.kneighbors(Xn[start:start + GRAPH_BATCH])
+            dist[start:start + len(D), :kk] = D ** 2 / 2
+            ids[start:start + len(D), :kk] = I
+    else:
+        raise ValueError(f"Modo de vizinhança desconhecido: {mode}")
+    np.maximum(dist, 0, out=dist)
+    logger.info("🕸️ Grafo k-NN (%s): %d pontos, k=%d", mode, n, kk)
+    return dist, ids
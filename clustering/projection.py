@@ -0,0 +1,99 @@
+import logging
+from typing import Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from clustering.neighbors import normalize_rows
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# acima disso o PCA é ajustado em lotes (IncrementalPCA), com memória fixa
+INCREMENTAL_MIN_ROWS = 200_000
+PROJECTION_BATCH = 20_000
+# teto de pontos crus enviados ao navegador; acima disso, só células
+MAX_POINTS = 5_000
+GRID_BINS = 60
+
+Bounds = Tuple[float, float, float, float]  # (x0, x1, y0, y1)
+
+
+def project_2d(embeddings: np.ndarray, seed: int = 42) -> np.ndarray:
+    """
+    Projeção 2-D (float32) dos vetores unitários por PCA: SVD randomizado
+    em memória, ou IncrementalPCA em lotes para matrizes muito grandes.
+    """
+    X = normalize_rows(np.asarray(embeddings))
+    n = len(X)
+    if n < 3:
+        return np.zeros((n, 2), dtype=np.float32)
+    if n >= INCREMENTAL_MIN_ROWS:
+        from sklearn.decomposition import IncrementalPCA
+        pca = IncrementalPCA(n_components=2, batch_size=PROJECTION_BATCH)
+        for start in range(0, n, PROJECTION_BATCH):
+            pca.partial_fit(X[start:start + PROJECTION_BATCH])
+        xy = np.vstack([pca.transform(X[s:s + PROJECTION_BATCH]) for s in range(0, n, PROJECTION_BATCH)])
+    else:
+        from sklearn.decomposition import PCA
+        xy = PCA(n_components=2, svd_solver="randomized", random_state=seed).fit_transform(X)
+    logger.info("🗺️ Projeção 2-D de %d pontos", n)
+    return xy.astype(np.float32)
+
+
+def bounds_of(xy: np.ndarray) -> Bounds:
+    if len(xy) == 0:
+        return (0.0, 1.0, 0.0, 1.0)
+    (x0, y0), (x1, y1) = xy.min(axis=0), xy.max(axis=0)
+    # intervalo nunca vazio (sliders e grade precisam de largura > 0)
+    return (float(x0), float(max(x1, x0 + 1e-3)), float(y0), float(max(y1, y0 + 1e-3)))
+
+
+def in_bounds(xy: np.ndarray, bounds: Bounds) -> np.ndarray:
+    x0, x1, y0, y1 = bounds
+    return (xy[:, 0] >= x0) & (xy[:, 0] <= x1) & (xy[:, 1] >= y0) & (xy[:, 1] <= y1)
+
+
+def grid_bins(xy: np.ndarray, labels: np.ndarray, weights: Optional[Sequence[int]] = None,
+              bounds: Optional[Bounds] = None, bins: int = GRID_BINS) -> pd.DataFrame:
+    """
+    Agrega os pontos dentro de `bounds` numa grade bins x bins: uma linha
+    por célula ocupada com o centro (x, y), o total (ponderado), o cluster
+    dominante e sua fração. O resultado tem no máximo bins² linhas,
+    qualquer que seja o nº de pontos.
+    """
+    labels = np.asarray(labels)
+    w = np.ones(len(labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+    bounds = bounds or bounds_of(xy)
+    mask = in_bounds(xy, bounds)
+    pts, labels, w = xy[mask], labels[mask], w[mask]
+    x0, x1, y0, y1 = bounds
+    sx, sy = max(x1 - x0, 1e-9) / bins, max(y1 - y0, 1e-9) / bins
+    cx = np.clip(((pts[:, 0] - x0) / sx).astype(np.int64), 0, bins - 1)
+    cy = np.clip(((pts[:, 1] - y0) / sy).astype(np.int64), 0, bins - 1)
+    cell = cx * bins + cy
+
+    # peso por (célula, cluster); o dominante é o de maior peso em cada célula
+    ids, lab_pos = np.unique(labels, return_inverse=True)
+    pair, pair_pos = np.unique(cell * len(ids) + lab_pos, return_inverse=True)
+    pair_w = np.bincount(pair_pos, weights=w)
+    pair_cell, pair_lab = pair // max(len(ids), 1), pair % max(len(ids), 1)
+    order = np.lexsort((-pair_w, pair_cell))
+    first = np.unique(pair_cell[order], return_index=True)[1]
+    cells = pair_cell[order][first]
+    total = np.bincount(np.searchsorted(cells, pair_cell), weights=pair_w, minlength=len(cells))
+    return pd.DataFrame({
+        "x": x0 + (cells // bins + 0.5) * sx,
+        "y": y0 + (cells % bins + 0.5) * sy,
+        "count": total.astype(np.int64),
+        "cluster": ids[pair_lab[order][first]] if len(ids) else np.empty(0, dtype=np.int64),
+        "purity": pair_w[order][first] / np.where(total == 0, 1, total),
+    })
+
+
+def region_points(xy: np.ndarray, bounds: Bounds, limit: int = MAX_POINTS,
+                  seed: int = 0) -> Tuple[np.ndarray, int]:
+    """Índices dos pontos dentro de `bounds` (amostrados até `limit`) e o total na região."""
+    idx = np.flatnonzero(in_bounds(xy, bounds))
+    total = len(idx)
+    if total > limit:
+        idx = np.sort(np.random.default_rng(seed).choice(idx, limit, replace=False))
+    return idx, total
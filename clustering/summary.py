@@ -0,0 +1,121 @@
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+from clustering.neighbors import normalize_rows
+
+# palavras vazias do português (o sklearn só traz as do inglês)
+STOPWORDS_PT = sorted(set("""
+a ao aos as até com como da das de dela dele deles depois do dos e ela elas ele eles em
+entre era eram essa esse esta está estão este eu foi foram há isso isto já lhe mais mas
+me mesmo meu minha muito na nas nem no nos nós não o os ou para pela pelas pelo pelos
+por qual quando que quem se sem ser seu sua são só também te tem têm ter teu tua um uma
+umas uns você vocês vai vou fui sou estou estava tinha tenho pois porque então ainda
+aqui lá dia dias hoje sobre após fiz feito fez nada pra pro nao ja ate
+""".split()))
+
+
+class ClusterSummary(NamedTuple):
+    """
+    - table: uma linha por cluster (size, keywords, medoid, exemplars e a
+      fatia `start:end` de `order` com os seus membros)
+    - order: posições dos textos por cluster, do mais ao menos representativo
+      (similaridade ao centróide), para paginar os membros sob demanda
+    - sources / categories: composição (fração) de cada cluster
+    """
+    table: pd.DataFrame
+    order: np.ndarray
+    sources: pd.DataFrame
+    categories: pd.DataFrame
+
+
+def _membership(labels: np.ndarray, weights: np.ndarray):
+    ids, pos = np.unique(labels, return_inverse=True)
+    member = sparse.csr_matrix((weights, (pos, np.arange(len(labels)))),
+                               shape=(len(ids), len(labels)))
+    return ids, pos, member
+
+
+def ctfidf_keywords(texts: Sequence[str], labels: np.ndarray,
+                    weights: Optional[Sequence[int]] = None,
+                    top_n: int = 8) -> List[List[str]]:
+    """
+    Termos de maior class-TF-IDF por cluster (ordem de `np.unique(labels)`).
+
+    Os textos de cada cluster viram um único documento (soma esparsa das
+    contagens, ponderada por duplicados); tf = frequência no cluster,
+    idf = log(1 + média de palavras por cluster / frequência do termo).
+    """
+    labels = np.asarray(labels)
+    w = np.ones(len(labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+    ids, _, member = _membership(labels, w)
+    try:
+        vec = CountVectorizer(stop_words=STOPWORDS_PT, token_pattern=r"(?u)\b[^\W\d_]{3,}\b",
+                              min_df=2 if len(texts) > 50 else 1, max_features=50_000)
+        counts = vec.fit_transform(texts)
+    except ValueError:  # vocabulário vazio
+        return [[] for _ in ids]
+    per_class = (member @ counts).tocsr()
+    class_len = np.asarray(per_class.sum(axis=1)).ravel()
+    tf = sparse.diags(1.0 / np.where(class_len == 0, 1, class_len)) @ per_class
+    term_freq = np.asarray(per_class.sum(axis=0)).ravel()
+    idf = np.log1p(class_len.mean() / np.where(term_freq == 0, 1, term_freq))
+    scores = (tf @ sparse.diags(idf)).tocsr()
+
+    vocab = vec.get_feature_names_out()
+    keywords = []
+    for r in range(scores.shape[0]):
+        row = scores.getrow(r)
+        top = row.indices[np.argsort(-row.data, kind="stable")[:top_n]]
+        keywords.append(vocab[top].tolist())
+    return keywords
+
+
+def summarize_clusters(texts: Sequence[str], labels: np.ndarray, embeddings: np.ndarray,
+                       weights: Optional[Sequence[int]] = None,
+                       frame: Optional[pd.DataFrame] = None, inverse: Optional[np.ndarray] = None,
+                       top_n: int = 8, n_exemplars: int = 3) -> ClusterSummary:
+    """
+    Resumo vetorizado dos clusters sobre os textos únicos (`texts`, alinhados
+    a `labels`/`embeddings`, com `weights` = tamanho de cada grupo):
+
+    - keywords: termos de class-TF-IDF;
+    - medoid: o texto mais próximo do centróide (vetores unitários) — o
+      medóide de cosseno aproximado, sem a matriz de distâncias do cluster;
+    - exemplars: os `n_exemplars` seguintes na mesma ordem.
+
+    Com `frame` (todas as linhas) e `inverse` (linha → texto único), inclui
+    a composição por fonte e por categoria.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    w = np.ones(len(labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+    ids, pos, member = _membership(labels, w)
+    size = np.asarray(member.sum(axis=1)).ravel()
+
+    X = normalize_rows(np.asarray(embeddings))
+    centroids = normalize_rows(np.asarray(member @ X))
+    sims = np.einsum("ij,ij->i", X, centroids[pos])
+    # agrupa por cluster e, dentro dele, do mais ao menos similar ao centróide
+    order = np.lexsort((-sims, pos))
+    starts = np.searchsorted(pos[order], np.arange(len(ids)))
+    ends = np.append(starts[1:], len(order))
+
+    keywords = ctfidf_keywords(texts, labels, w, top_n)
+    table = pd.DataFrame({
+        "cluster": ids,
+        "size": size.astype(np.int64),
+        "keywords": [", ".join(k) for k in keywords],
+        "medoid": [texts[order[s]] for s in starts],
+        "exemplars": [[texts[i] for i in order[s + 1:min(e, s + 1 + n_exemplars)]]
+                      for s, e in zip(starts, ends)],
+        "start": starts,
+        "end": ends,
+    }).sort_values("size", ascending=False, kind="stable").reset_index(drop=True)
+
+    sources = categories = pd.DataFrame()
+    if frame is not None and inverse is not None:
+        row_cluster = pd.Series(labels[inverse], index=frame.index, name="cluster")
+        sources = pd.crosstab(row_cluster, frame["source"], normalize="index")
+        categories = pd.crosstab(row_cluster, frame["category"], normalize="index")
+    return ClusterSummary(table, order, sources, categories)
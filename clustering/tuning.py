@@ -0,0 +1,116 @@
+import logging, os
+from typing import Dict, Optional, Sequence
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from clustering.neighbors import knn_graph, normalize_rows
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# vizinhos guardados por ponto: limite superior de min_samples nos sliders
+TUNING_K = int(os.environ.get("SPOTLIGHT_TUNING_K", 32))
+# pontos amostrados para a silhueta (O(m²) no tamanho da amostra)
+SILHOUETTE_SAMPLE = 2_000
+
+
+class DensityGraph:
+    """
+    Estrutura k-NN calculada uma vez por empresa, no estilo OPTICS, da qual
+    qualquer par (eps, min_samples) é extraído em milissegundos.
+
+    Guarda, para cada ponto, os `k` vizinhos mais próximos com as
+    distâncias de cosseno. Para extrair:
+
+    - core distance = distância em que o peso acumulado dos vizinhos
+      (o próprio ponto incluso) alcança `min_samples`; core se <= eps;
+    - clusters = componentes conexas do grafo core–core com arestas <= eps;
+    - pontos de borda herdam o cluster do core mais próximo a até eps.
+
+    Coincide com o DBSCAN enquanto nenhum core tiver mais que `k` vizinhos
+    dentro de eps; acima disso, alguns clusters densos podem sair partidos.
+    """
+
+    def __init__(self, dist: np.ndarray, ids: np.ndarray,
+                 weights: Optional[Sequence[int]] = None):
+        self.dist = dist
+        self.ids = ids
+        self.n, self.k = ids.shape
+        self.weights = np.ones(self.n) if weights is None else np.asarray(weights, dtype=np.float64)
+        self._valid = ids >= 0
+        self._nbr = np.where(self._valid, ids, 0)
+        # peso acumulado ao longo dos vizinhos, em ordem de distância
+        self._cumw = np.cumsum(np.where(self._valid, self.weights[self._nbr], 0.0), axis=1)
+
+    @classmethod
+    def build(cls, embeddings: np.ndarray, weights: Optional[Sequence[int]] = None,
+              k: int = TUNING_K, mode: str = "exact") -> "DensityGraph":
+        dist, ids = knn_graph(np.asarray(embeddings), k, mode=mode)
+        return cls(dist, ids, weights)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dist.nbytes + self.ids.nbytes + self._nbr.nbytes + self._cumw.nbytes
+
+    def core_distance(self, min_samples: int) -> np.ndarray:
+        """Raio mínimo para cada ponto ser core com `min_samples` (inf se além de k)."""
+        reached = self._cumw >= min_samples
+        first = reached.argmax(axis=1)
+        cd = self.dist[np.arange(self.n), first]
+        return np.where(reached.any(axis=1), cd, np.inf)
+
+    def extract(self, eps: float, min_samples: int) -> np.ndarray:
+        """Rótulos estilo DBSCAN (IDs por tamanho a partir de 1; ruído = -1)."""
+        labels = np.full(self.n, -1, dtype=np.int64)
+        if self.n == 0:
+            return labels
+        core = self.core_distance(min_samples) <= eps
+        near_core = self._valid & (self.dist <= eps) & core[self._nbr]
+        edges = near_core & core[:, None]
+        rows, pos = np.nonzero(edges)
+        graph = sparse.coo_matrix(
+            (np.ones(len(rows), dtype=np.int8), (rows, self._nbr[rows, pos])),
+            shape=(self.n, self.n),
+        )
+        _, comp = connected_components(graph, directed=True, connection="weak")
+        labels[core] = comp[core]
+        # borda: o primeiro core dentro de eps é o mais próximo (colunas ordenadas)
+        border = ~core & near_core.any(axis=1)
+        first = near_core[border].argmax(axis=1)
+        labels[border] = comp[self._nbr[border, first]]
+
+        clustered = labels >= 0
+        if clustered.any():
+            raw, inv = np.unique(labels[clustered], return_inverse=True)
+            sizes = np.bincount(inv, weights=self.weights[clustered])
+            new_id = np.empty(len(raw), dtype=np.int64)
+            new_id[np.argsort(-sizes, kind="stable")] = np.arange(1, len(raw) + 1)
+            labels[clustered] = new_id[inv]
+        return labels
+
+
+def extraction_report(labels: np.ndarray, embeddings: np.ndarray,
+                      weights: Optional[Sequence[int]] = None,
+                      sample: int = SILHOUETTE_SAMPLE, seed: int = 0) -> Dict[str, float]:
+    """
+    Nº de clusters, fração de ruído (ponderada) e silhueta de cosseno numa
+    amostra dos pontos clusterizados (None com menos de dois clusters).
+    """
+    labels = np.asarray(labels)
+    w = np.ones(len(labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+    noise = labels == -1
+    clustered = np.flatnonzero(~noise)
+    n_clusters = len(np.unique(labels[clustered]))
+    silhouette = None
+    if 2 <= n_clusters < len(clustered):
+        from sklearn.metrics import silhouette_score
+        if len(clustered) > sample:
+            clustered = np.random.default_rng(seed).choice(clustered, sample, replace=False)
+        if len(np.unique(labels[clustered])) >= 2:
+            X = normalize_rows(np.asarray(embeddings)[clustered])
+            silhouette = float(silhouette_score(X, labels[clustered], metric="cosine"))
+    return {
+        "clusters": n_clusters,
+        "noise_ratio": float(w[noise].sum() / w.sum()) if len(w) else 0.0,
+        "silhouette": silhouette,
+    }
@@ -0,0 +1,136 @@
+import json, logging, os, subprocess, sys, threading, time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+INFER_ADDRESS = os.environ.get("SPOTLIGHT_INFER_ADDRESS", "tcp://127.0.0.1:5757")
+# auto: usa o servidor se estiver no ar; spawn: sobe um se não estiver; off: sempre local
+INFER_MODE = os.environ.get("SPOTLIGHT_INFERENCE", "auto")
+INFER_TIMEOUT_MS = int(os.environ.get("SPOTLIGHT_INFER_TIMEOUT_MS", 120_000))
+# textos por pedido: pedidos menores intercalam melhor com os de outras sessões
+CLIENT_CHUNK = 1024
+# depois de uma falha, tenta o servidor de novo só após esse intervalo
+RETRY_AFTER_S = 30
+SPAWN_WAIT_S = 15
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+class InferenceClient:
+    """Cliente REQ do `InferenceServer`; um socket por thread (zmq não é thread-safe)."""
+
+    def __init__(self, address: str = INFER_ADDRESS, timeout_ms: int = INFER_TIMEOUT_MS):
+        import zmq
+        self._zmq = zmq
+        self.address = address
+        self.timeout_ms = timeout_ms
+        self._local = threading.local()
+
+    def _socket(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._zmq.Context.instance().socket(self._zmq.REQ)
+            sock.setsockopt(self._zmq.LINGER, 0)
+            sock.connect(self.address)
+            self._local.sock = sock
+        return sock
+
+    def _request(self, msg: dict, timeout_ms: Optional[int] = None) -> List[bytes]:
+        sock = self._socket()
+        sock.setsockopt(self._zmq.RCVTIMEO, timeout_ms or self.timeout_ms)
+        try:
+            sock.send(json.dumps(msg).encode())
+            frames = sock.recv_multipart()
+        except self._zmq.ZMQError as e:
+            # um REQ sem resposta fica travado: descarta e recria no próximo pedido
+            sock.close()
+            self._local.sock = None
+            raise InferenceError(f"Servidor de inferência indisponível ({self.address}): {e}")
+        header = json.loads(frames[0])
+        if not header.get("ok"):
+            raise InferenceError(f"Erro no servidor de inferência: {header.get('error')}")
+        return frames
+
+    def ping(self, timeout_ms: int = 500) -> bool:
+        try:
+            self._request({"task": "ping"}, timeout_ms)
+            return True
+        except InferenceError:
+            return False
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings float32 (len(texts), dim), na ordem de `texts`."""
+        parts = []
+        for start in range(0, len(texts), CLIENT_CHUNK):
+            header, payload = self._request({"task": "embed",
+                                             "texts": list(texts[start:start + CLIENT_CHUNK])})
+            meta = json.loads(header)
+            parts.append(np.frombuffer(payload, dtype=meta["dtype"]).reshape(meta["shape"]))
+        return np.vstack(parts) if parts else np.empty((0, 0), dtype=np.float32)
+
+    def sentiment(self, texts: Sequence[str]) -> List[str]:
+        """Negative/Neutral/Positive para cada texto."""
+        labels: List[str] = []
+        for start in range(0, len(texts), CLIENT_CHUNK):
+            frames = self._request({"task": "sentiment",
+                                    "texts": list(texts[start:start + CLIENT_CHUNK])})
+            labels.extend(json.loads(frames[0])["labels"])
+        return labels
+
+
+_client: Optional[InferenceClient] = None
+_down_until = 0.0
+_lock = threading.Lock()
+
+
+def spawn_server() -> subprocess.Popen:
+    """Sobe `python -m inference.server` em segundo plano (um 2º servidor sai sozinho: endereço em uso)."""
+    root = Path(__file__).resolve().parents[1]
+    return subprocess.Popen([sys.executable, "-m", "inference.server"], cwd=str(root),
+                            start_new_session=True)
+
+
+def get_client() -> Optional[InferenceClient]:
+    """Cliente conectado a um servidor no ar, ou None (usar o modelo local)."""
+    global _client, _down_until
+    if INFER_MODE == "off" or time.monotonic() < _down_until:
+        return None
+    with _lock:
+        if _client is None:
+            try:
+                _client = InferenceClient()
+            except ImportError:
+                logger.warning("⚠️ pyzmq indisponível; inferência local")
+                _down_until = float("inf")
+                return None
+        if _client.ping():
+            return _client
+        if INFER_MODE == "spawn":
+            spawn_server()
+            deadline = time.monotonic() + SPAWN_WAIT_S
+            while time.monotonic() < deadline:
+                if _client.ping():
+                    logger.info("🛰️ Servidor de inferência iniciado em %s", _client.address)
+                    return _client
+        logger.info("ℹ️ Servidor de inferência fora do ar (%s); inferência local", _client.address)
+        _down_until = time.monotonic() + RETRY_AFTER_S
+        return None
+
+
+def run(task: str, texts: Sequence[str],
+        local: Callable[[List[str]], Union[np.ndarray, List[str]]]):
+    """Executa `task` no servidor compartilhado; sem servidor (ou em falha), chama `local(texts)`."""
+    global _down_until
+    client = get_client()
+    if client is not None:
+        try:
+            return getattr(client, task)(texts)
+        except InferenceError as e:
+            logger.warning("⚠️ %s; inferência local", e)
+            _down_until = time.monotonic() + RETRY_AFTER_S
+    return local(list(texts))
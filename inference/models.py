@@ -0,0 +1,36 @@
+from typing import List, Sequence
+
+SENTIMENT_MODEL = "nlptown/bert-base-multilingual-uncased-sentiment"
+SENTIMENT_BATCH_SIZE = 32
+# o modelo aceita até 512 tokens; cortar caracteres antes evita tokenizar textos enormes
+MAX_CHARS = 512
+
+
+def load_sentiment_pipeline():
+    """
+    Carrega pipeline de sentiment-analysis multilingue (inclui PT).
+    Modelo: nlptown/bert-base-multilingual-uncased-sentiment
+    """
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+
+
+def stars_to_sentiment(label: str) -> str:
+    """Rótulos '1 star' ... '5 stars' → Negative/Neutral/Positive."""
+    try:
+        stars = int(label.split()[0])
+    except (ValueError, IndexError, AttributeError):
+        stars = 3
+    if stars <= 2:
+        return "Negative"
+    elif stars == 3:
+        return "Neutral"
+    return "Positive"
+
+
+def classify_sentiment(pipe, texts: Sequence[str], batch_size: int = SENTIMENT_BATCH_SIZE) -> List[str]:
+    """Classifica em lotes (o pipeline agrupa `batch_size` textos por forward)."""
+    if not texts:
+        return []
+    outs = pipe([t[:MAX_CHARS] for t in texts], batch_size=batch_size, truncation=True)
+    return [stars_to_sentiment(o.get("label", "3 stars")) for o in outs]
@@ -0,0 +1,174 @@
+import json, logging, os, queue, threading, time
+from typing import Callable, List, Optional, Sequence, Tuple
+import numpy as np
+import zmq
+from inference.client import INFER_ADDRESS
+from inference.models import classify_sentiment, load_sentiment_pipeline
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# um lote fecha ao juntar MAX_BATCH textos ou MAX_LATENCY_MS após o 1º pedido
+MAX_BATCH = int(os.environ.get("SPOTLIGHT_INFER_MAX_BATCH", 256))
+MAX_LATENCY_MS = float(os.environ.get("SPOTLIGHT_INFER_MAX_LATENCY_MS", 20))
+_RESULTS = "inproc://spotlight-infer-results"
+
+Frames = List[bytes]
+
+
+class Batcher:
+    """
+    Lote dinâmico para uma tarefa: pedidos concorrentes (de páginas,
+    sessões e processos diferentes) entram numa fila e são executados num
+    único forward quando o lote enche ou o prazo do primeiro vence. Cada
+    cliente recebe só a sua fatia do resultado.
+    """
+
+    def __init__(self, name: str, run: Callable[[List[str]], Sequence],
+                 reply: Callable[[Sequence], List[Frames]], context: zmq.Context,
+                 max_batch: int = MAX_BATCH, max_latency_ms: float = MAX_LATENCY_MS):
+        self.name = name
+        self.run = run
+        self.reply = reply
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.queue: "queue.Queue[Tuple[bytes, List[str]]]" = queue.Queue()
+        self._context = context
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, ident: bytes, texts: List[str]) -> None:
+        self.queue.put((ident, texts))
+
+    def _collect(self) -> List[Tuple[bytes, List[str]]]:
+        pending = [self.queue.get()]
+        size = len(pending[0][1])
+        deadline = time.monotonic() + self.max_latency
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[1])
+        return pending
+
+    def _loop(self) -> None:
+        # sockets zmq não são thread-safe: cada batcher tem o seu PUSH
+        sink = self._context.socket(zmq.PUSH)
+        sink.connect(_RESULTS)
+        while True:
+            pending = self._collect()
+            texts = [t for _, ts in pending for t in ts]
+            start = time.perf_counter()
+            try:
+                out = self.run(texts)
+            except Exception as e:
+                logger.exception("❌ Falha no lote %s", self.name)
+                error = json.dumps({"ok": False, "error": str(e)}).encode()
+                for ident, _ in pending:
+                    sink.send_multipart([ident, b"", error])
+                continue
+            logger.info("📦 %s: %d pedidos, %d textos em %.0fms", self.name, len(pending),
+                        len(texts), 1000 * (time.perf_counter() - start))
+            offset = 0
+            for ident, ts in pending:
+                part = out[offset:offset + len(ts)]
+                offset += len(ts)
+                sink.send_multipart([ident, b"", *self.reply(part)])
+
+
+def _embed_reply(vectors: np.ndarray) -> Frames:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    header = {"ok": True, "shape": list(vectors.shape), "dtype": "float32"}
+    return [json.dumps(header).encode(), vectors.tobytes()]
+
+
+def _sentiment_reply(labels: Sequence[str]) -> Frames:
+    return [json.dumps({"ok": True, "labels": list(labels)}).encode()]
+
+
+class InferenceServer:
+    """
+    Servidor local de inferência (ZeroMQ ROUTER): carrega cada modelo uma
+    vez e atende `embed` e `sentiment` para todas as páginas/sessões.
+
+    Protocolo (multipart, via REQ): [json {"task", "texts"}] →
+    embed: [json {"ok", "shape", "dtype"}, bytes float32];
+    sentiment: [json {"ok", "labels"}]; `ping`: [json {"ok", "tasks"}].
+    Erros voltam como {"ok": false, "error"}.
+    """
+
+    def __init__(self, address: str = INFER_ADDRESS, max_batch: int = MAX_BATCH,
+                 max_latency_ms: float = MAX_LATENCY_MS):
+        self.address = address
+        self.context = zmq.Context.instance()
+        self.frontend = self.context.socket(zmq.ROUTER)
+        self.frontend.bind(address)
+        self.results = self.context.socket(zmq.PULL)
+        self.results.bind(_RESULTS)
+        # modelos carregam no 1º lote de cada tarefa
+        self._engine = None
+        self._pipe = None
+        self.batchers = {
+            "embed": Batcher("embed", self._embed, _embed_reply, self.context,
+                             max_batch, max_latency_ms),
+            "sentiment": Batcher("sentiment", self._sentiment, _sentiment_reply, self.context,
+                                 max_batch, max_latency_ms),
+        }
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if self._engine is None:
+            from clustering.embedding import EmbeddingEngine
+            self._engine = EmbeddingEngine()
+        return self._engine.encode_raw(texts)
+
+    def _sentiment(self, texts: List[str]) -> List[str]:
+        if self._pipe is None:
+            self._pipe = load_sentiment_pipeline()
+        return classify_sentiment(self._pipe, texts)
+
+    def _handle(self, frames: Frames) -> Optional[Frames]:
+        """Despacha um pedido; devolve a resposta imediata (ou None se foi para um lote)."""
+        ident, body = frames[0], frames[-1]
+        try:
+            msg = json.loads(body)
+            task = msg["task"]
+            if task == "ping":
+                return [ident, b"", json.dumps({"ok": True, "tasks": list(self.batchers)}).encode()]
+            batcher = self.batchers[task]
+            texts = [str(t) for t in msg.get("texts", [])]
+        except (ValueError, KeyError, TypeError) as e:
+            return [ident, b"", json.dumps({"ok": False, "error": f"pedido inválido: {e}"}).encode()]
+        batcher.submit(ident, texts)
+        return None
+
+    def serve_forever(self) -> None:
+        poller = zmq.Poller()
+        poller.register(self.frontend, zmq.POLLIN)
+        poller.register(self.results, zmq.POLLIN)
+        logger.info("🛰️ Servidor de inferência em %s (lote até %d, prazo %.0fms)",
+                    self.address, self.batchers["embed"].max_batch,
+                    1000 * self.batchers["embed"].max_latency)
+        while True:
+            events = dict(poller.poll())
+            if self.frontend in events:
+                reply = self._handle(self.frontend.recv_multipart())
+                if reply is not None:
+                    self.frontend.send_multipart(reply)
+            if self.results in events:
+                self.frontend.send_multipart(self.results.recv_multipart())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    try:
+        InferenceServer().serve_forever()
+    except zmq.ZMQError as e:
+        # endereço em uso: outro servidor já atende
+        logger.warning("⚠️ Servidor não iniciado (%s): %s", INFER_ADDRESS, e)
+    except KeyboardInterrupt:
+        pass
@@ -1,11 +1,45 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
+from plugins.schema import PluginResult
 
 class IngestPlugin(ABC):
     @abstractmethod
-    def fetch(self, empresa: str) -> List[str]:
+    def fetch(self, empresa: str) -> PluginResult:
         """
-        Deve retornar uma lista de textos de reclamações
+        Deve retornar um PluginResult com as reclamações
         para a empresa passada.
         """
         pass
+
+    def fetch_many(self, empresas: List[str]) -> Dict[str, PluginResult]:
+        """
+        Busca várias empresas de uma vez, retornando {empresa: PluginResult}.
+        Implementação padrão: um fetch por empresa. Plugins que varrem
+        arquivos grandes sobrescrevem com uma única passada.
+        """
+        return {e: self.fetch(e) for e in empresas}
+
+    def refresh(self, empresa: str, previous: Optional[PluginResult] = None) -> PluginResult:
+        """
+        Atualiza um resultado já salvo. Padrão: extração completa (ignora
+        `previous`). Plugins com marca d'água extraem só o que é novo e
+        mesclam em `previous`.
+        """
+        return self.fetch(empresa)
+
+    async def arefresh(self, empresa: str, previous: Optional[PluginResult] = None) -> PluginResult:
+        """Versão assíncrona de `refresh`."""
+        return await asyncio.to_thread(self.refresh, empresa, previous)
+
+    async def afetch(self, empresa: str) -> PluginResult:
+        """
+        Versão assíncrona de `fetch`. Padrão: roda `fetch` numa thread;
+        plugins que fazem I/O pelo `HttpEngine` sobrescrevem.
+        """
+        return await asyncio.to_thread(self.fetch, empresa)
+
+    async def afetch_many(self, empresas: List[str]) -> Dict[str, PluginResult]:
+        """Versão assíncrona de `fetch_many`."""
+        results = await asyncio.gather(*(self.afetch(e) for e in empresas))
+        return dict(zip(empresas, results))
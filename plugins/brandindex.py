@@ -0,0 +1,198 @@
+# plugins/brandindex.py
+import json, logging, os, re, tempfile, threading, unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    import pyarrow.dataset as ds
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# só json/stdlib no topo: o Discover sugere marcas sem carregar pandas/pyarrow
+SNAPSHOT_DIR = Path(os.environ.get("SPOTLIGHT_SNAPSHOT_DIR", "data/snapshots"))
+INDEX_FILE = "_brands.json"
+# valores maiores que isso são texto livre (ex.: `objeto` da CVM), não nomes
+MAX_NAME_LEN = 160
+_NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+
+
+def fold(text: str) -> str:
+    """Nome normalizado: sem acentos, maiúsculo, pontuação vira espaço ("Claro S.A." → "CLARO S A")."""
+    t = unicodedata.normalize("NFKD", text or "")
+    t = "".join(ch for ch in t if not unicodedata.combining(ch)).upper()
+    return _NON_ALNUM.sub(" ", t).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class BrandIndex:
+    """
+    Índice de marcas de um snapshot.
+
+    - `keys`: nomes normalizados (`fold`) distintos; cada chave agrupa as
+      grafias brutas que a produzem (tabela de apelidos: "CLARO S/A" e
+      "Claro S.A." caem na mesma chave);
+    - postings de trigramas sobre as chaves, para achar em milissegundos
+      as chaves que contêm o termo buscado;
+    - por chave, o total de linhas e os anos (partições) em que aparece,
+      para que a consulta leia só as partições e linhas dessas marcas.
+
+    `columns` são as colunas de marca indexadas; colunas de texto livre
+    ficam de fora e continuam sendo filtradas por regex.
+    """
+
+    def __init__(self, columns: List[str], keys: List[str], names: List[List[str]],
+                 rows: List[int], years: List[List[int]], trigrams: Dict[str, List[int]]):
+        self.columns = columns
+        self.keys = keys
+        self.names = names
+        self.rows = rows
+        self.years = years
+        self.trigrams = trigrams
+
+    # --- construção ---
+    @classmethod
+    def build(cls, dataset: "ds.Dataset", columns: Iterable[str],
+              partition_col: Optional[str] = None) -> "BrandIndex":
+        """Percorre só as colunas de marca do dataset, em lotes."""
+        import pandas as pd
+        names = set(dataset.schema.names)
+        indexed = [c for c in columns if c and c in names]
+        extra = [partition_col] if partition_col and partition_col in names else []
+        counts: Counter = Counter()
+        for batch in dataset.to_batches(columns=indexed + extra):
+            df = batch.to_pandas()
+            for col in list(indexed):
+                values = df[col].dropna()
+                if values.str.len().max() > MAX_NAME_LEN:
+                    logger.info("   → coluna '%s' é texto livre; fica fora do índice", col)
+                    indexed.remove(col)
+                    counts = Counter({k: n for k, n in counts.items() if k[0] != col})
+                    continue
+                if extra:
+                    years = df.loc[values.index, partition_col]
+                    groups = values.groupby([values, years], dropna=False).size()
+                else:
+                    groups = values.groupby(values).size()
+                for key, n in groups.items():
+                    raw, year = key if extra else (key, None)
+                    # ano nulo (data inválida) é marcado com -1
+                    year = -1 if extra and pd.isna(year) else year
+                    counts[(col, raw, None if year is None else int(year))] += int(n)
+
+        by_key: Dict[str, Counter] = defaultdict(Counter)
+        key_years: Dict[str, Set[int]] = defaultdict(set)
+        for (_, raw, year), n in counts.items():
+            key = fold(raw)
+            if not key:
+                continue
+            by_key[key][raw] += n
+            if year is not None:
+                key_years[key].add(year)
+
+        keys = sorted(by_key)
+        trigrams: Dict[str, List[int]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            for tri in _trigrams(key):
+                trigrams[tri].append(i)
+        return cls(
+            columns=indexed,
+            keys=keys,
+            # grafia mais frequente primeiro (usada nas sugestões)
+            names=[[raw for raw, _ in by_key[k].most_common()] for k in keys],
+            rows=[sum(by_key[k].values()) for k in keys],
+            years=[sorted(key_years[k]) for k in keys],
+            trigrams=dict(trigrams),
+        )
+
+    def save(self, path: Path) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(vars(self), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # --- consulta ---
+    def _lookup(self, query: str) -> List[int]:
+        q = fold(query)
+        if not q:
+            return []
+        if len(q) < 3:
+            return [i for i, k in enumerate(self.keys) if q in k]
+        candidates: Optional[Set[int]] = None
+        # termos mais raros primeiro encolhem a interseção mais rápido
+        for tri in sorted(_trigrams(q), key=lambda t: len(self.trigrams.get(t, ()))):
+            ids = self.trigrams.get(tri)
+            if not ids:
+                return []
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if q in self.keys[i])
+
+    def resolve(self, company: str) -> Set[str]:
+        """Grafias brutas cujas formas normalizadas contêm o nome buscado."""
+        return {raw for i in self._lookup(company) for raw in self.names[i]}
+
+    def partitions(self, company: str) -> Optional[Set[int]]:
+        """
+        Anos em que alguma marca que casa com `company` aparece, ou None
+        quando não dá para podar partições (índice sem anos ou linhas sem data).
+        """
+        years = {y for i in self._lookup(company) for y in self.years[i]}
+        if -1 in years or any(not self.years[i] for i in self._lookup(company)):
+            return None
+        return years
+
+    def suggest(self, query: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """
+        [(grafia mais comum, linhas)] das marcas que contêm `query`, mais
+        frequentes primeiro; `query` vazia lista as mais frequentes do índice.
+        """
+        ids = self._lookup(query) if fold(query) else range(len(self.keys))
+        hits = sorted(ids, key=lambda i: -self.rows[i])[:limit]
+        return [(self.names[i][0], self.rows[i]) for i in hits]
+
+
+# índices já carregados neste processo, por (caminho, mtime)
+_loaded: Dict[str, Tuple[float, BrandIndex]] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_index(path: Path) -> Optional[BrandIndex]:
+    """Carrega (com cache em memória) o índice em `path`, ou None se não existir."""
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+    with _loaded_lock:
+        hit = _loaded.get(str(path))
+        if hit and hit[0] == mtime:
+            return hit[1]
+    try:
+        index = BrandIndex(**json.loads(path.read_text(encoding="utf-8")))
+    except Exception as e:
+        logger.warning("⚠️ Índice de marcas ilegível (%s): %s", path, e)
+        return None
+    with _loaded_lock:
+        _loaded[str(path)] = (mtime, index)
+    return index
+
+
+def suggest_brands(query: str, limit: int = 10, root: Optional[Path] = None) -> List[Tuple[str, int]]:
+    """
+    Autocompletar: marcas que contêm `query` nos índices dos snapshots já
+    gerados em `root` (todas as fontes), mais frequentes primeiro; `query`
+    vazia lista as mais frequentes. Só lê os `_brands.json`; não baixa nada.
+    """
+    totals: Dict[str, int] = {}
+    for file in (root or SNAPSHOT_DIR).glob(f"*/*/{INDEX_FILE}"):
+        if file.parent.name.startswith("."):
+            continue
+        index = load_index(file)
+        for name, rows in (index.suggest(query, limit) if index else []):
+            totals[name] = totals.get(name, 0) + rows
+    return sorted(totals.items(), key=lambda kv: -kv[1])[:limit]
@@ -0,0 +1,235 @@
+# plugins/cache.py
+import hashlib, json, logging, os, tempfile, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+import httpx
+from plugins.httpclient import get_engine, run_sync
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+CACHE_DIR = Path(os.environ.get("SPOTLIGHT_CACHE_DIR", "data/cache"))
+CACHE_MAX_BYTES = int(os.environ.get("SPOTLIGHT_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+# entradas revalidadas há menos que isso (s) são servidas sem ir à rede
+CACHE_REVALIDATE_AFTER = float(os.environ.get("SPOTLIGHT_CACHE_REVALIDATE_AFTER", 60))
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Trava exclusiva entre processos (flock; msvcrt no Windows) no arquivo `path`."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SourceCache:
+    """
+    Cache local dos arquivos públicos baixados pelos plugins.
+
+    - Endereçado por conteúdo: cada arquivo fica em `blobs/<sha256>`,
+      e o índice mapeia URL -> sha256 + validadores HTTP.
+    - Revalidação com ETag/Last-Modified: um GET condicional que
+      responde 304 custa um único round trip, sem corpo.
+    - Escrita atômica: baixa em arquivo temporário no mesmo diretório
+      e publica com `os.replace`.
+    - Despejo LRU quando o total de blobs passa de `max_bytes`.
+    - Entradas revalidadas há menos de `revalidate_after` segundos são
+      servidas direto (ex.: download em thread seguido do parse em outro
+      processo, no "Atualizar todos").
+    - O índice é lido, alterado e regravado sob uma trava de arquivo
+      (`index.lock`), pois os workers do "Atualizar todos" rodam em
+      processos separados e também baixam, tocam e despejam entradas.
+
+    Os downloads passam pelo `HttpEngine` compartilhado (pool de conexões,
+    retentativas e limite por host); `fetch` é o atalho síncrono de `afetch`.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES,
+                 revalidate_after: float = CACHE_REVALIDATE_AFTER):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / "index.lock"
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+
+    # --- índice ---
+    def _read_index(self) -> Dict[str, dict]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            return json.loads(self.index_path.read_text(encoding="utf-8"))
+        except Exception:
+            logger.warning("⚠️ Índice do cache corrompido, recriando: %s", self.index_path)
+            return {}
+
+    def _write_index(self, index: Dict[str, dict]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index-", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Trava as threads deste processo e os outros processos que usam o mesmo `root`."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, _locked(self.lock_path):
+            yield
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blob_dir / sha256
+
+    def entry(self, url: str) -> Optional[dict]:
+        """Retorna a entrada do índice para `url` (ou None)."""
+        with self._lock:
+            return self._read_index().get(url)
+
+    # --- API pública ---
+    def fetch(self, url: str, timeout: int = 300,
+              headers: Optional[Dict[str, str]] = None) -> Path:
+        """Versão síncrona de `afetch` (roda no loop de fundo do engine HTTP)."""
+        return run_sync(self.afetch(url, timeout=timeout, headers=headers))
+
+    async def afetch(self, url: str, timeout: int = 300,
+                     headers: Optional[Dict[str, str]] = None) -> Path:
+        """
+        Garante uma cópia local e atualizada de `url` e devolve o caminho.
+        Se o servidor responder 304, reaproveita o blob sem baixar nada.
+        Em caso de falha de rede com cópia local, usa a cópia (stale).
+        """
+        with self._lock:
+            index = self._read_index()
+        cached = index.get(url)
+        if cached and not self.blob_path(cached["sha256"]).exists():
+            cached = None
+        if cached and time.time() - cached.get("checked_at", 0) < self.revalidate_after:
+            path = self._touch(url, cached)
+            if path is not None:
+                return path
+            cached = None
+
+        req_headers = dict(headers or {})
+        if cached:
+            if cached.get("etag"):
+                req_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                req_headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            async with get_engine().stream(url, headers=req_headers, timeout=timeout) as resp:
+                if resp.status_code == 304 and cached:
+                    logger.info("♻️ Cache válido (304) para %s", url)
+                    path = self._touch(url, cached, checked=True)
+                    if path is not None:
+                        return path
+                    # despejado por outro processo durante a revalidação: baixa de novo
+                    return await self.afetch(url, timeout=timeout, headers=headers)
+                resp.raise_for_status()
+                sha, size = await self._store(resp)
+        except Exception as e:
+            if cached:
+                path = self._touch(url, cached)
+                if path is not None:
+                    logger.warning("⚠️ Falha ao revalidar %s (%s); usando cópia local", url, e)
+                    return path
+            raise
+
+        logger.info("✅ Download concluído (%d bytes) → blob %s", size, sha[:12])
+        with self._index_lock():
+            index = self._read_index()
+            index[url] = {
+                "sha256": sha,
+                "size": size,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "last_access": time.time(),
+                "checked_at": time.time(),
+            }
+            self._evict(index, keep=sha)
+            self._write_index(index)
+        return self.blob_path(sha)
+
+    # --- internos ---
+    def _touch(self, url: str, cached: dict, checked: bool = False) -> Optional[Path]:
+        """
+        Marca o uso de `url` (e a revalidação, se `checked`). Se outro processo
+        tirou a entrada do índice desde a leitura, ela volta a partir de `cached`
+        enquanto o blob existir; sem o blob, devolve None.
+        """
+        with self._index_lock():
+            index = self._read_index()
+            entry = index.get(url)
+            if entry is None or not self.blob_path(entry["sha256"]).exists():
+                if not self.blob_path(cached["sha256"]).exists():
+                    return None
+                entry = index[url] = dict(cached)
+            entry["last_access"] = time.time()
+            if checked:
+                entry["checked_at"] = time.time()
+            self._write_index(index)
+            return self.blob_path(entry["sha256"])
+
+    async def _store(self, resp: httpx.Response) -> tuple[str, int]:
+        """Grava o corpo em streaming, calculando o sha256, e publica atomicamente."""
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=self.blob_dir, prefix=".dl-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in resp.aiter_bytes(chunk_size=1024 * 1024):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            os.replace(tmp, self.blob_path(sha))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return sha, size
+
+    def _evict(self, index: Dict[str, dict], keep: str) -> None:
+        """Remove entradas menos usadas até o total de blobs caber em `max_bytes`."""
+        blobs: Dict[str, int] = {e["sha256"]: e["size"] for e in index.values()}
+        total = sum(blobs.values())
+        for url, e in sorted(index.items(), key=lambda kv: kv[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if e["sha256"] == keep:
+                continue
+            del index[url]
+            if not any(o["sha256"] == e["sha256"] for o in index.values()):
+                self.blob_path(e["sha256"]).unlink(missing_ok=True)
+                total -= blobs[e["sha256"]]
+                logger.info("🧹 Cache: blob %s removido (LRU)", e["sha256"][:12])
+
+
+_default_cache: Optional[SourceCache] = None
+
+
+def get_cache() -> SourceCache:
+    """Cache compartilhado por todos os plugins do processo."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SourceCache()
+    return _default_cache
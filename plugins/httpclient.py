@@ -0,0 +1,163 @@
+# plugins/httpclient.py
+import asyncio, logging, os, threading, weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Dict, Optional, TypeVar
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+T = TypeVar("T")
+
+USER_AGENT = "Spotlight/1.0"
+MAX_CONNECTIONS = int(os.environ.get("SPOTLIGHT_HTTP_MAX_CONNECTIONS", 20))
+PER_HOST_LIMIT = int(os.environ.get("SPOTLIGHT_HTTP_PER_HOST", 4))
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(e: BaseException) -> bool:
+    if isinstance(e, httpx.TransportError):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code in RETRY_STATUS
+
+
+class HttpEngine:
+    """
+    Cliente HTTP assíncrono compartilhado pelos plugins.
+
+    - Um único `httpx.AsyncClient` com pool de conexões (keep-alive).
+    - Retentativas com backoff exponencial e jitter para erros de rede
+      e status 429/5xx.
+    - Limite de requisições simultâneas por host; o slot fica ocupado
+      enquanto o corpo é consumido, o que dá backpressure aos downloads.
+    - Ritmo opcional por host (`set_rate_limit`), para crawlers educados.
+    - Corpos em streaming via `stream()`.
+    """
+
+    def __init__(self, max_connections: int = MAX_CONNECTIONS, per_host: int = PER_HOST_LIMIT,
+                 attempts: int = 4, backoff: float = 0.5, max_backoff: float = 30.0,
+                 timeout: float = 60.0):
+        self.per_host = per_host
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            timeout=timeout,
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+        )
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._intervals: Dict[str, float] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    def set_rate_limit(self, url: str, per_second: float) -> None:
+        """Limita o host de `url` a `per_second` inícios de requisição por segundo."""
+        self._intervals[httpx.URL(url).host] = 1.0 / per_second
+
+    async def _pace(self, url: str) -> None:
+        host = httpx.URL(url).host
+        interval = self._intervals.get(host)
+        if not interval:
+            return
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start.get(host, now))
+        # reserva o próximo horário antes de dormir (o loop é single-thread)
+        self._next_start[host] = start + interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def _retrying(self) -> AsyncRetrying:
+        return AsyncRetrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=wait_random_exponential(multiplier=self.backoff, max=self.max_backoff),
+            retry=retry_if_exception(_is_retryable),
+            reraise=True,
+        )
+
+    @asynccontextmanager
+    async def stream(self, url: str, method: str = "GET",
+                     headers: Optional[Dict[str, str]] = None,
+                     timeout: Optional[float] = None) -> AsyncIterator[httpx.Response]:
+        """
+        Abre a resposta em streaming (status já conferido contra 429/5xx).
+        Demais status, inclusive 304, ficam a cargo de quem chamou.
+        """
+        async with self._slot(url):
+            resp: Optional[httpx.Response] = None
+            async for attempt in self._retrying():
+                with attempt:
+                    await self._pace(url)
+                    extra = {"timeout": timeout} if timeout is not None else {}
+                    req = self.client.build_request(method, url, headers=headers, **extra)
+                    resp = await self.client.send(req, stream=True)
+                    if resp.status_code in RETRY_STATUS:
+                        await resp.aclose()
+                        logger.warning("⚠️ %s respondeu %d, tentando de novo", url, resp.status_code)
+                        resp.raise_for_status()
+            try:
+                yield resp
+            finally:
+                await resp.aclose()
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None) -> httpx.Response:
+        """GET com corpo lido por inteiro; levanta erro para status != 2xx."""
+        async with self.stream(url, headers=headers, timeout=timeout) as resp:
+            await resp.aread()
+        resp.raise_for_status()
+        return resp
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# um engine por event loop (o AsyncClient fica preso ao loop em que foi usado)
+_engines: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpEngine]" = weakref.WeakKeyDictionary()
+
+
+def get_engine() -> HttpEngine:
+    """Engine compartilhado do event loop corrente."""
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = HttpEngine()
+    return engine
+
+
+# --- shim síncrono (páginas Streamlit, pools de threads/processos) ---
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="spotlight-http", daemon=True).start()
+    return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Executa `coro` no event loop de fundo do processo e espera o resultado.
+    Todas as chamadas síncronas compartilham o mesmo loop e, portanto, o
+    mesmo pool de conexões.
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync chamado de dentro do loop de fundo; use await")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
@@ -1,77 +1,58 @@
-import requests
 import pandas as pd
-import io
 import logging
-from typing import List
-from plugins.base import IngestPlugin
-from plugins.schema import PluginResult, Complaint
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from plugins.snapshot import SnapshotPlugin
+from plugins.streaming import IterTextIO, iter_file
+from plugins.schema import ComplaintBatch, build_complaints
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-class ConsumidorGovPlugin(IngestPlugin):
+class ConsumidorGovPlugin(SnapshotPlugin):
+    NAME = "CONSUMIDOR_GOV"
+    LABEL = "Consumidor.gov.br"
     URL = (
         "https://dados.mj.gov.br/dataset/"
         "0182f1bf-e73d-42b1-ae8c-fa94d9ce9451/resource/"
         "8f22bdc1-3044-46ee-9dd1-4ace84da28e4/"
         "download/basecompleta2025-04.csv"
     )
-
-    def fetch(self, company: str) -> PluginResult:
-        logger.info("🔄 Iniciando download do CSV do Consumidor.gov.br")
-        try:
-            resp = requests.get(self.URL, timeout=60, headers={"User-Agent": "Spotlight/1.0"})
-            resp.raise_for_status()
-            content = resp.content.decode('utf-8-sig')
-            logger.info("✅ Download concluído (tamanho %d bytes)", len(resp.content))
-        except Exception as e:
-            logger.error("❌ Erro HTTP ao baixar CSV: %s", e, exc_info=True)
-            raise RuntimeError(f"Erro HTTP ao baixar dados do Consumidor.gov.br: {e}")
-
-        complaints: List[Complaint] = []
-        total_raw = 0
-        try:
-            df = pd.read_csv(io.StringIO(content), sep=';', dtype=str)
-            df.columns = df.columns.str.strip()
-            total_raw = len(df)
-            logger.info("📥 CSV lido com %d linhas", total_raw)
-
+    DOWNLOAD_TIMEOUT = 60
+    # converte DD/MM/YYYY para datetime
+    DATE_FORMAT = "%d/%m/%Y"
+    CHUNK_ROWS = 100_000
+
+    def _read_source(self, path: Path) -> Iterator[pd.DataFrame]:
+        # decodifica e lê em chunks: o pico de memória acompanha CHUNK_ROWS,
+        # não o tamanho do CSV nacional
+        text = IterTextIO(iter_file(path), encoding='utf-8-sig')
+        total = 0
+        for chunk in pd.read_csv(text, sep=';', dtype=str, chunksize=self.CHUNK_ROWS):
+            total += len(chunk)
+            yield chunk
+        logger.info("📥 CSV lido com %d linhas", total)
+
+    def _columns(self, names: List[str]) -> Dict[str, Any]:
+        return {
+            "date": "Data Abertura",
             # filtra pelo "Nome Fantasia"
-            mask = df['Nome Fantasia'].str.contains(company, case=False, na=False)
-            filtered = df[mask]
-            logger.info("🔎 %d linhas correspondentes à empresa '%s'", len(filtered), company)
-
-            for _, row in filtered.iterrows():
-                date_str = row.get('Data Abertura', '').strip()
-                # converte DD/MM/YYYY para datetime
-                try:
-                    date = datetime.strptime(date_str, "%d/%m/%Y")
-                except Exception:
-                    logger.warning("Formato de data inválido '%s', usando now()", date_str)
-                    date = datetime.utcnow()
-                    
-                c = Complaint(
-                    date=date,
-                    category=row.get('Assunto', ''),
-                    description=row.get('Problema', ''),
-                    razao_social=row.get('Nome Fantasia', '')
-                )
-                complaints.append(c)
-        except Exception as e:
-            logger.error("❌ Falha ao processar CSV do Consumidor.gov.br: %s", e, exc_info=True)
-            raise RuntimeError(f"Erro ao processar CSV do Consumidor.gov.br: {e}")
-
-        result = PluginResult(
-            plugin='CONSUMIDOR_GOV',
-            company=company,
-            total_raw=total_raw,
-            complaints=complaints
-        )
-        logger.info(
-            "🏁 Consumidor.gov.br: total_raw=%d, complaints=%d",
-            result.total_raw,
-            len(result.complaints)
+            "brands": ["Nome Fantasia"],
+            "category": "Assunto",
+            "description": "Problema",
+        }
+
+    def _build_batch(self, df: pd.DataFrame, cols: Dict[str, Any]) -> ComplaintBatch:
+        invalid = int(df[cols["date"]].isna().sum()) if cols["date"] in df.columns else len(df)
+        if invalid:
+            logger.warning("%d datas de abertura inválidas, usando now()", invalid)
+        return build_complaints(
+            df,
+            date=cols["date"],
+            category=cols["category"],
+            description=cols["description"],
+            brand="Nome Fantasia",
+            date_format=self.DATE_FORMAT,
+            default_date=datetime.utcnow(),
         )
-        return result
-
@@ -1,94 +1,83 @@
-import requests, zipfile, tempfile, pandas as pd, logging
-from typing import List
-from plugins.base import IngestPlugin
-from plugins.schema import PluginResult, Complaint
+import zipfile, pandas as pd, logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from plugins.snapshot import SnapshotPlugin, normalize_columns
+from plugins.schema import ComplaintBatch, build_complaints
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-class CVMPlugin(IngestPlugin):
+class CVMPlugin(SnapshotPlugin):
+    NAME = "CVM"
+    LABEL = "CVM"
     URL = (
       "https://dados.cvm.gov.br/"
       "dados/PROCESSO/SANCIONADOR/DADOS/processo_sancionador.zip"
     )
     CSV_MAIN   = "processo_sancionador.csv"
     CSV_ACC    = "processo_sancionador_acusado.csv"
+    DOWNLOAD_TIMEOUT = 120
 
-    def fetch(self, company: str) -> PluginResult:
-        logger.info("🔄 Download do ZIP CVM")
-        resp = requests.get(self.URL, stream=True, timeout=120,
-                            headers={"User-Agent":"Spotlight/1.0"})
-        resp.raise_for_status()
-
-        # leitura dos CSVs em memória
-        with tempfile.TemporaryFile() as tmp:
-            for chunk in resp.iter_content(8192):
-                tmp.write(chunk)
-            tmp.seek(0)
-            with zipfile.ZipFile(tmp) as z:
-                # 1) DataFrame principal
-                with z.open(self.CSV_MAIN) as f_main:
-                    df_proc = pd.read_csv(
-                        f_main, sep=";", encoding="latin1", dtype=str,
-                        on_bad_lines="warn"
-                    )
-                # 2) DataFrame de acusados
-                with z.open(self.CSV_ACC) as f_acc:
-                    df_acc = pd.read_csv(
-                        f_acc, sep=";", encoding="latin1", dtype=str,
-                        on_bad_lines="warn"
-                    )
+    def _read_source(self, path: Path) -> Iterator[pd.DataFrame]:
+        # leitura dos CSVs a partir do ZIP em cache
+        with zipfile.ZipFile(path) as z:
+            # 1) DataFrame principal
+            with z.open(self.CSV_MAIN) as f_main:
+                df_proc = pd.read_csv(
+                    f_main, sep=";", encoding="latin1", dtype=str,
+                    on_bad_lines="warn"
+                )
+            # 2) DataFrame de acusados
+            with z.open(self.CSV_ACC) as f_acc:
+                df_acc = pd.read_csv(
+                    f_acc, sep=";", encoding="latin1", dtype=str,
+                    on_bad_lines="warn"
+                )
 
         # 3) Normalize colunas
-        df_proc.columns = [c.replace("\ufeff","").strip() for c in df_proc.columns]
-        df_acc.columns  = [c.replace("\ufeff","").strip() for c in df_acc.columns]
+        df_proc.columns = normalize_columns(df_proc.columns)
+        df_acc.columns  = normalize_columns(df_acc.columns)
 
         # 4) Merge pelos NUPs
-        df = df_proc.merge(df_acc, on="NUP", how="left", suffixes=("","_acusado"))
-        total_raw = len(df_proc)
+        yield df_proc.merge(df_acc, on="NUP", how="left", suffixes=("","_acusado"))
 
+    def _count_raw(self, chunk: pd.DataFrame) -> int:
+        # o merge repete o processo por acusado; conta processos distintos
+        return chunk["NUP"].nunique()
+
+    def _columns(self, names: List[str]) -> Dict[str, Any]:
         # 5) Detectar nomes de coluna dinamicamente
-        date_col  = next((c for c in df.columns if c.lower().startswith("data_abertura")), None)
-        obj_col   = next((c for c in df.columns if c.lower() == "objeto"), None)
-        acc_col   = next((c for c in df.columns if c.lower().startswith("nome_acusado")), None)
-        ementa_col= next((c for c in df.columns if c.lower() == "ementa"), None)
+        date_col  = next((c for c in names if c.lower().startswith("data_abertura")), None)
+        obj_col   = next((c for c in names if c.lower() == "objeto"), None)
+        acc_col   = next((c for c in names if c.lower().startswith("nome_acusado")), None)
+        ementa_col= next((c for c in names if c.lower() == "ementa"), None)
 
         if not all([date_col, ementa_col]) or not (acc_col or obj_col):
             raise RuntimeError(
                 f"Colunas faltando: date={date_col}, ementa={ementa_col}, "
                 f"acusado={acc_col}, objeto={obj_col}"
             )
+        return {
+            "date": date_col,
+            # 6) Filtrar por acusado OU objeto
+            "brands": [c for c in (acc_col, obj_col) if c],
+            "accused": acc_col,
+            "object": obj_col,
+            "description": ementa_col,
+        }
 
-        # 6) Filtrar por acusado OU objeto
-        # força string e substitui NaN por "" para não gerar float
-        serie_acc = df.get(acc_col, pd.Series()).fillna("").astype(str)
-        serie_obj = df.get(obj_col,  pd.Series()).fillna("").astype(str)
-        mask = (
-            serie_acc.str.contains(company, case=False, na=False)
-            | serie_obj.str.contains(company, case=False, na=False)
-        )
-        matched = df[mask]
-        logger.info("🔎 %d processos encontrados para '%s'", len(matched), company)
-
-        # 7) Construir lista de Complaint
-        complaints: List[Complaint] = []
-        for _, row in matched.iterrows():
-            raw_name = row.get(acc_col) or row.get(obj_col) or ""
-            name     = str(raw_name).strip()
-            complaints.append(
-                Complaint(
-                    date        = str(row[date_col]).strip(),
-                    category    = str(row.get(obj_col, "") or "").strip(),
-                    description = str(row.get(ementa_col, "") or "").strip(),
-                    razao_social= name
-                )
-            )
-        logger.info("🏁 linhas brutas: %d; reclamações extraídas: %d",
-                    total_raw, len(complaints))
-
-        return PluginResult(
-            plugin="CVM",
-            company=company,
-            total_raw=total_raw,
-            complaints=complaints,
+    def _build_batch(self, df: pd.DataFrame, cols: Dict[str, Any]) -> ComplaintBatch:
+        # 7) Construir Complaints: nome do acusado, ou o objeto quando ausente
+        acc_col, obj_col = cols["accused"], cols["object"]
+        empty = pd.Series(None, index=df.index, dtype=object)
+        accused = df[acc_col] if acc_col in df.columns else empty
+        obj = df[obj_col] if obj_col in df.columns else empty
+        name = accused.where(accused.fillna("").str.strip() != "", obj)
+        return build_complaints(
+            df,
+            date=cols["date"],
+            category=obj,
+            description=cols["description"],
+            brand=name,
+            date_format=self.DATE_FORMAT,
         )
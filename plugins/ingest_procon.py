@@ -1,64 +1,89 @@
 import pandas as pd
 import logging
-from typing import List
-from plugins.base import IngestPlugin
-from plugins.schema import PluginResult, Complaint
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from openpyxl import load_workbook
+from plugins.snapshot import SnapshotPlugin, normalize_columns
+from plugins.schema import ComplaintBatch, build_complaints
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-class ProconPlugin(IngestPlugin):
+
+def _cell_str(value: Any) -> Any:
+    """Valor de célula como texto (equivalente ao `dtype=str` do read_excel)."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ProconPlugin(SnapshotPlugin):
+    NAME = "PROCON"
+    LABEL = "PROCON"
     URL = (
         "http://dados.mj.gov.br/dataset/"
         "8ff7032a-d6db-452b-89f1-d860eb6965ff/resource/"
         "e0c5eaea-ace1-457d-a945-9645644d2783/"
         "download/cnrf2023dadosabertos.xlsx"
     )
+    DOWNLOAD_TIMEOUT = 300
+    CHUNK_ROWS = 50_000
+    # só estas colunas vão para o snapshot; o resto da planilha é descartado na leitura
+    COLUMNS = [
+        "DataAbertura", "DescricaoAssunto", "DescricaoProblema",
+        "strRazaoSocial", "strNomeFantasia", "RazaoSocialRFB", "NomeFantasiaRFB",
+    ]
 
-    def fetch(self, company: str) -> PluginResult:
-        logger.info("🔄 Iniciando download do Excel do PROCON")
+    def _read_source(self, path: Path) -> Iterator[pd.DataFrame]:
+        # openpyxl em modo read_only percorre o XML da planilha linha a linha,
+        # sem carregar o workbook inteiro: memória acompanha CHUNK_ROWS
+        wb = load_workbook(path, read_only=True, data_only=True)
         try:
-            df = pd.read_excel(self.URL, dtype=str)
-            df.columns = df.columns.str.strip()
-            total_raw = len(df)
-            logger.info("📥 Excel lido com %d linhas", total_raw)
-        except Exception as e:
-            logger.error("❌ Falha ao baixar/ler PROCON: %s", e, exc_info=True)
-            raise RuntimeError(f"Erro ao ler dados do PROCON: {e}")
+            rows = wb.active.iter_rows(values_only=True)
+            header = normalize_columns(["" if v is None else v for v in next(rows, ())])
+            keep = [(i, name) for i, name in enumerate(header) if name in self.COLUMNS]
+            if not keep:
+                raise RuntimeError(f"Planilha sem as colunas esperadas: {header[:10]}")
+            names = [name for _, name in keep]
 
-        complaints: List[Complaint] = []
-        try:
-            # filtro pelas colunas de razão social
-            mask = (
-                df['strRazaoSocial'].str.contains(company, case=False, na=False)
-                | df['strNomeFantasia'].str.contains(company, case=False, na=False)
-                | df['RazaoSocialRFB'].str.contains(company, case=False, na=False)
-                | df['NomeFantasiaRFB'].str.contains(company, case=False, na=False)
-            )
-            filtered = df[mask]
-            logger.info("🔎 %d linhas correspondentes à empresa '%s'", len(filtered), company)
+            total = 0
+            buffer: List[List[Any]] = []
+            for row in rows:
+                values = [_cell_str(row[i]) if i < len(row) else None for i, _ in keep]
+                if not any(values):
+                    continue
+                buffer.append(values)
+                if len(buffer) >= self.CHUNK_ROWS:
+                    total += len(buffer)
+                    yield pd.DataFrame(buffer, columns=names)
+                    buffer = []
+            if buffer or not total:
+                total += len(buffer)
+                yield pd.DataFrame(buffer, columns=names)
+            logger.info("📥 Excel lido com %d linhas", total)
+        finally:
+            wb.close()
 
-            for _, row in filtered.iterrows():
-                c = Complaint(
-                    date=row.get('DataAbertura', ''),
-                    category=row.get('DescricaoAssunto', ''),
-                    description=row.get('DescricaoProblema', ''),
-                    razao_social=row.get('strRazaoSocial', '')
-                )
-                complaints.append(c)
-        except Exception as e:
-            logger.error("❌ Falha ao processar dados do PROCON: %s", e, exc_info=True)
-            raise RuntimeError(f"Erro ao processar dados do PROCON: {e}")
+    def _columns(self, names: List[str]) -> Dict[str, Any]:
+        return {
+            "date": "DataAbertura",
+            # filtro pelas colunas de razão social
+            "brands": ['strRazaoSocial', 'strNomeFantasia', 'RazaoSocialRFB', 'NomeFantasiaRFB'],
+            "category": "DescricaoAssunto",
+            "description": "DescricaoProblema",
+        }
 
-        result = PluginResult(
-            plugin='PROCON',
-            company=company,
-            total_raw=total_raw,
-            complaints=complaints
-        )
-        logger.info(
-            "🏁 PROCON: total_raw=%d, complaints=%d",
-            result.total_raw,
-            len(result.complaints)
+    def _build_batch(self, df: pd.DataFrame, cols: Dict[str, Any]) -> ComplaintBatch:
+        return build_complaints(
+            df,
+            date=cols["date"],
+            category=cols["category"],
+            description=cols["description"],
+            brand="strRazaoSocial",
+            date_format=self.DATE_FORMAT,
         )
-        return result
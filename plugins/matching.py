@@ -0,0 +1,88 @@
+# plugins/matching.py
+import re
+from typing import Dict, Iterable, List, Optional, Set
+import pandas as pd
+from plugins.brandindex import BrandIndex
+
+# metacaracteres comuns ao `re` do Python e ao RE2 do Arrow
+_META = re.compile(r"([\\.^$|?*+()\[\]{}])")
+
+
+def escape(text: str) -> str:
+    """Escapa `text` para casar literalmente tanto no `re` quanto no RE2 (pyarrow)."""
+    return _META.sub(r"\\\1", text)
+
+
+class CompanyMatcher:
+    """
+    Casa várias empresas em uma única varredura das colunas de marca.
+
+    Uma alternância compilada (`claro|vivo|tim`) percorre a coluna inteira
+    uma só vez; apenas as linhas candidatas são testadas empresa a empresa
+    para rotear cada linha ao(s) resultado(s) certo(s). O custo fica perto
+    de uma varredura, independente do número de empresas.
+
+    Com um `BrandIndex`, as colunas indexadas deixam de ser varridas por
+    regex: cada empresa vira o conjunto de grafias brutas resolvidas no
+    índice (sem acento/pontuação, "Claro S.A." casa "CLARO S/A") e o teste
+    é por igualdade. Colunas fora do índice seguem no regex.
+    """
+
+    def __init__(self, companies: Iterable[str], index: Optional[BrandIndex] = None):
+        # preserva a ordem e ignora vazios/duplicados
+        self.companies: List[str] = list(dict.fromkeys(c for c in companies if c and c.strip()))
+        self._patterns = {
+            c: re.compile(escape(c.strip()), re.IGNORECASE) for c in self.companies
+        }
+        # alternativas mais longas primeiro para o motor de regex
+        self.pattern = "|".join(
+            sorted((escape(c.strip()) for c in self.companies), key=len, reverse=True)
+        )
+        self._any = re.compile(self.pattern, re.IGNORECASE) if self.companies else None
+
+        self.index = index
+        self.indexed: Set[str] = set(index.columns) if index else set()
+        self.values: Dict[str, Set[str]] = (
+            {c: index.resolve(c) for c in self.companies} if index else {}
+        )
+        self.all_values: Set[str] = set().union(*self.values.values())
+
+    def partitions(self) -> Optional[Set[int]]:
+        """Anos onde há marcas das empresas (None = sem poda), segundo o índice."""
+        if self.index is None:
+            return None
+        years: Set[int] = set()
+        for c in self.companies:
+            found = self.index.partitions(c)
+            if found is None:
+                return None
+            years |= found
+        return years
+
+    def _mask(self, df: pd.DataFrame, columns: List[str], pattern: re.Pattern,
+              values: Set[str]) -> pd.Series:
+        mask = pd.Series(False, index=df.index)
+        for col in columns:
+            if col in self.indexed:
+                mask |= df[col].isin(values)
+            else:
+                mask |= df[col].fillna("").astype(str).str.contains(pattern, na=False)
+        return mask
+
+    def split(self, df: pd.DataFrame, columns: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Retorna {empresa: linhas de `df` cujo valor em alguma de `columns`
+        contém o nome da empresa (sem diferenciar maiúsculas; nas colunas
+        indexadas, também sem acentos e pontuação).
+        """
+        columns = [c for c in columns if c and c in df.columns]
+        if self._any is None or not columns:
+            return {c: df.iloc[0:0] for c in self.companies}
+
+        candidates = df[self._mask(df, columns, self._any, self.all_values)]
+        if len(self.companies) == 1:
+            return {self.companies[0]: candidates}
+        return {
+            c: candidates[self._mask(candidates, columns, pat, self.values.get(c, set()))]
+            for c, pat in self._patterns.items()
+        }
@@ -0,0 +1,109 @@
+# plugins/registry.py
+import importlib, logging, threading
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from plugins.base import IngestPlugin
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# capacidades declaradas no manifesto
+SNAPSHOT = "snapshot"        # arquivo público grande, consultado via snapshot Parquet
+INCREMENTAL = "incremental"  # `refresh` extrai só o que é novo (marca d'água)
+SCRAPING = "scraping"        # páginas HTML, sem arquivo para baixar
+
+
+class PluginSpec(NamedTuple):
+    """Metadados de um plugin; suficientes para desenhar o card sem importá-lo."""
+    key: str  # também prefixo dos arquivos em data/
+    module: str
+    cls: str
+    label: str
+    url: str
+    capabilities: FrozenSet[str]
+
+
+# Manifesto: novos plugins entram aqui. Nada é importado até o primeiro uso.
+MANIFEST: List[PluginSpec] = [
+    PluginSpec(
+        key="ingest_anatel",
+        module="plugins.ingest_anatel",
+        cls="AnatelPlugin",
+        label="Anatel",
+        url="https://www.anatel.gov.br/dadosabertos/paineis_de_dados/consumidor/consumidor_reclamacoes.zip",
+        capabilities=frozenset({SNAPSHOT, INCREMENTAL}),
+    ),
+    PluginSpec(
+        key="ingest_consumidor_gov",
+        module="plugins.ingest_consumidor_gov",
+        cls="ConsumidorGovPlugin",
+        label="Consumidor.gov.br",
+        url="https://dados.mj.gov.br/dataset/0182f1bf-e73d-42b1-ae8c-fa94d9ce9451/resource/"
+            "8f22bdc1-3044-46ee-9dd1-4ace84da28e4/download/basecompleta2025-04.csv",
+        capabilities=frozenset({SNAPSHOT, INCREMENTAL}),
+    ),
+    PluginSpec(
+        key="ingest_cvm",
+        module="plugins.ingest_cvm",
+        cls="CVMPlugin",
+        label="CVM",
+        url="https://dados.cvm.gov.br/dados/PROCESSO/SANCIONADOR/DADOS/processo_sancionador.zip",
+        capabilities=frozenset({SNAPSHOT, INCREMENTAL}),
+    ),
+    PluginSpec(
+        key="ingest_procon",
+        module="plugins.ingest_procon",
+        cls="ProconPlugin",
+        label="PROCON",
+        url="http://dados.mj.gov.br/dataset/8ff7032a-d6db-452b-89f1-d860eb6965ff/resource/"
+            "e0c5eaea-ace1-457d-a945-9645644d2783/download/cnrf2023dadosabertos.xlsx",
+        capabilities=frozenset({SNAPSHOT, INCREMENTAL}),
+    ),
+    PluginSpec(
+        key="ingest_reclameaqui",
+        module="plugins.ingest_reclameaqui",
+        cls="ReclameAquiPlugin",
+        label="ReclameAQUI",
+        url="https://www.reclameaqui.com.br/",
+        capabilities=frozenset({SCRAPING}),
+    ),
+]
+
+_SPECS: Dict[str, PluginSpec] = {s.key: s for s in MANIFEST}
+_instances: Dict[str, "IngestPlugin"] = {}
+_lock = threading.Lock()
+
+
+def specs() -> Dict[str, PluginSpec]:
+    """{key: PluginSpec} na ordem do manifesto, sem importar nenhum plugin."""
+    return dict(_SPECS)
+
+
+def get_plugin(key: str) -> "IngestPlugin":
+    """
+    Instância do plugin `key`, importando o módulo só agora.
+    A instância é reaproveitada pelo processo (reruns do Streamlit inclusive).
+    """
+    with _lock:
+        plugin = _instances.get(key)
+        if plugin is not None:
+            return plugin
+        spec = _SPECS.get(key)
+        if spec is None:
+            raise KeyError(f"Plugin desconhecido: {key}")
+        # importado aqui para quem só lê metadados não carregar pandas/pydantic
+        from plugins.base import IngestPlugin
+        cls = getattr(importlib.import_module(spec.module), spec.cls)
+        if not (isinstance(cls, type) and issubclass(cls, IngestPlugin)):
+            raise TypeError(f"{spec.module}.{spec.cls} não é um IngestPlugin")
+        if getattr(cls, "URL", spec.url) != spec.url:
+            logger.warning("⚠️ URL de %s diverge do manifesto", key)
+        plugin = _instances[key] = cls()
+        logger.info("🔌 Plugin %s carregado", key)
+        return plugin
+
+
+def get_plugins(keys: Optional[List[str]] = None) -> Dict[str, "IngestPlugin"]:
+    """{key: instância} para `keys` (padrão: todos do manifesto)."""
+    return {k: get_plugin(k) for k in (keys or _SPECS)}
@@ -0,0 +1,76 @@
+# plugins/runner.py
+import importlib, logging, multiprocessing, os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, NamedTuple, Optional
+from plugins.base import IngestPlugin
+from plugins.schema import PluginResult
+from plugins.snapshot import SnapshotPlugin
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+
+class RefreshEvent(NamedTuple):
+    """Evento de progresso do `refresh_all`, na ordem em que acontece."""
+    key: str
+    stage: str  # "downloaded" | "done" | "error"
+    result: Optional[PluginResult] = None
+    error: Optional[BaseException] = None
+
+
+def _refresh_job(module: str, cls_name: str, empresa: str,
+                 previous: Optional[PluginResult]) -> PluginResult:
+    # roda no pool de processos: reimporta o plugin pelo nome
+    cls = getattr(importlib.import_module(module), cls_name)
+    return cls().refresh(empresa, previous)
+
+
+def refresh_all(plugins: Dict[str, IngestPlugin], empresa: str,
+                previous: Optional[Dict[str, PluginResult]] = None,
+                max_downloads: int = 4, max_parsers: Optional[int] = None) -> Iterator[RefreshEvent]:
+    """
+    Atualiza todos os plugins da empresa em paralelo.
+
+    Downloads (I/O) vão para um pool de threads; assim que cada arquivo
+    chega, o parse (CPU) do plugin vai para um pool de processos. Plugins
+    sem arquivo baixável (ex.: scraping) rodam inteiros no pool de threads.
+    Os eventos são emitidos à medida que cada etapa termina, então o tempo
+    total fica perto da fonte mais lenta.
+
+    `previous` ({key: PluginResult salvo}) permite atualização incremental.
+    """
+    previous = previous or {}
+    max_parsers = max_parsers or min(len(plugins), os.cpu_count() or 1)
+    ctx = multiprocessing.get_context("spawn")
+    with ThreadPoolExecutor(max_workers=max_downloads, thread_name_prefix="download") as io_pool, \
+         ProcessPoolExecutor(max_workers=max_parsers, mp_context=ctx) as cpu_pool:
+        pending: Dict[Future, tuple[str, str]] = {}
+        for key, plugin in plugins.items():
+            if isinstance(plugin, SnapshotPlugin):
+                pending[io_pool.submit(plugin.download)] = (key, "download")
+            else:
+                pending[io_pool.submit(plugin.refresh, empresa, previous.get(key))] = (key, "fetch")
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key, stage = pending.pop(fut)
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    logger.error("❌ %s falhou em '%s': %s", key, stage, e)
+                    yield RefreshEvent(key, "error", error=e)
+                    continue
+
+                if stage == "download":
+                    yield RefreshEvent(key, "downloaded")
+                    cls = type(plugins[key])
+                    job = cpu_pool.submit(_refresh_job, cls.__module__, cls.__name__,
+                                          empresa, previous.get(key))
+                    pending[job] = (key, "fetch")
+                elif not isinstance(value, PluginResult):
+                    yield RefreshEvent(key, "error", error=TypeError(
+                        f"{key} retornou {type(value).__name__}, esperado PluginResult"
+                    ))
+                else:
+                    yield RefreshEvent(key, "done", result=value)
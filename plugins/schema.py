@@ -1,6 +1,7 @@
 from datetime import datetime
-from typing import List, Any, Dict
-from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from typing import List, Any, Dict, NamedTuple, Optional, Union
+import pandas as pd
+from pydantic import BaseModel, Field, ConfigDict, PrivateAttr, field_validator, model_validator
 
 class Complaint(BaseModel):
     model_config = ConfigDict(
@@ -46,6 +47,107 @@ class Complaint(BaseModel):
             raise ValueError("date cannot be in the future")
         return v
 
+    def dedup_key(self) -> tuple:
+        """Identidade de conteúdo (não é única: fontes com data só no dia repetem chaves)."""
+        return (self.date, self.category, self.description, self.raw_brand)
+
+
+class ComplaintBatch(BaseModel):
+    """Resultado de `build_complaints`: reclamações válidas + linhas rejeitadas."""
+    complaints: List[Complaint]
+    # posição da linha no DataFrame de entrada -> motivo(s) da rejeição
+    rejected: Dict[int, str] = Field(default_factory=dict)
+    # maior data lida da fonte (sem as preenchidas por `default_date`): base da marca d'água
+    max_source_date: Optional[datetime] = None
+
+
+def build_complaints(
+    df: pd.DataFrame,
+    *,
+    date: Union[str, pd.Series],
+    category: Union[str, pd.Series],
+    description: Union[str, pd.Series],
+    brand: Union[str, pd.Series],
+    date_format: str = "ISO8601",
+    default_date: Optional[datetime] = None,
+) -> ComplaintBatch:
+    """
+    Caminho em lote para montar Complaint a partir de colunas de um DataFrame.
+
+    Aplica as mesmas regras dos validators de Complaint, mas coluna a coluna:
+    strip/upper vetorizado, `pd.to_datetime` com formato explícito da fonte
+    e checagem de data futura. Linhas inválidas são reunidas em `rejected`
+    em vez de abortar a busca inteira; as válidas viram Complaint via
+    `model_construct`, sem revalidar linha a linha.
+
+    Cada campo aceita o nome de uma coluna de `df` ou uma Series alinhada.
+    """
+    n = len(df)
+    if n == 0:
+        return ComplaintBatch(complaints=[])
+
+    def column(spec: Union[str, pd.Series]) -> pd.Series:
+        if isinstance(spec, pd.Series):
+            s = spec
+        elif spec in df.columns:
+            s = df[spec]
+        else:
+            s = pd.Series(None, index=df.index, dtype=object)
+        return s.reset_index(drop=True)
+
+    reasons = pd.Series("", index=pd.RangeIndex(n), dtype=object)
+
+    # strip_and_upper, em bloco
+    texts: Dict[str, pd.Series] = {}
+    for name, spec in (("category", category), ("description", description), ("raw_brand", brand)):
+        s = column(spec).fillna("").astype(str).str.strip().str.upper()
+        reasons = reasons.mask(s == "", reasons + f"{name} vazio; ")
+        texts[name] = s
+
+    # parse_date + date_not_future, em bloco
+    raw_dates = column(date)
+    if pd.api.types.is_datetime64_any_dtype(raw_dates):
+        dates = raw_dates
+    else:
+        dates = pd.to_datetime(raw_dates, format=date_format, errors="coerce")
+    parsed = dates.notna()
+    if default_date is not None:
+        dates = dates.fillna(pd.Timestamp(default_date))
+    reasons = reasons.mask(dates.isna(), reasons + "data inválida; ")
+    reasons = reasons.mask(dates > pd.Timestamp(datetime.utcnow()), reasons + "data no futuro; ")
+
+    ok = reasons == ""
+    source_dates = dates[ok & parsed]
+    max_source_date = source_dates.max().to_pydatetime() if len(source_dates) else None
+    complaints = [
+        Complaint.model_construct(date=d, category=c, description=t, raw_brand=b)
+        for d, c, t, b in zip(
+            pd.DatetimeIndex(dates[ok]).to_pydatetime(),
+            texts["category"][ok],
+            texts["description"][ok],
+            texts["raw_brand"][ok],
+        )
+    ]
+    rejected = {int(i): r.rstrip("; ") for i, r in reasons[~ok].items()}
+    return ComplaintBatch.model_construct(complaints=complaints, rejected=rejected,
+                                          max_source_date=max_source_date)
+
+
+class Watermark(BaseModel):
+    """Até onde um PluginResult já foi extraído: maior data + versão do arquivo de origem."""
+    max_date: Optional[datetime] = None
+    source_version: Optional[str] = None
+
+
+class Increment(NamedTuple):
+    """
+    Parte nova de um resultado mesclado por `refresh`: as linhas salvas com
+    data >= `since` foram trocadas por `complaints[start:]`. `since` None:
+    nada foi trocado (fonte inalterada ou só acréscimos).
+    """
+    since: Optional[datetime]
+    start: int
+
 
 class PluginResult(BaseModel):
     model_config = ConfigDict(
@@ -76,6 +178,13 @@ class PluginResult(BaseModel):
     fetched_at: datetime = Field(default_factory=datetime.utcnow)
     total_raw: int
     complaints: List[Complaint]
+    watermark: Optional[Watermark] = None
+    # preenchido por `merge`/`unchanged`: permite ao store gravar só a diferença
+    _increment: Optional[Increment] = PrivateAttr(default=None)
+
+    @property
+    def increment(self) -> Optional[Increment]:
+        return self._increment
 
     # strip+upper e não vazio
     @field_validator("plugin", "company", mode="before")
@@ -121,4 +230,39 @@ class PluginResult(BaseModel):
             raise ValueError("complaints must be a list or a dict")
         return data
 
+    def merge(self, newer: "PluginResult", since: Optional[datetime] = None) -> "PluginResult":
+        """
+        Mescla uma extração incremental (`newer`) neste resultado.
+
+        `newer` é a fonte relida a partir de `since` (por padrão, a marca
+        d'água deste resultado): ficam as reclamações anteriores com data
+        < `since` e entram todas as de `newer`. Não há deduplicação por
+        chave — em fontes com data só no dia, reclamações distintas podem
+        ter a mesma `dedup_key`. Metadados e marca d'água vêm de `newer`.
+        """
+        if since is None and self.watermark is not None:
+            since = self.watermark.max_date
+        kept = [c for c in self.complaints if since is not None and c.date < since]
+        dates = [w.max_date for w in (self.watermark, newer.watermark) if w and w.max_date]
+        watermark = Watermark(
+            max_date=max(dates) if dates else None,
+            source_version=newer.watermark.source_version if newer.watermark else None,
+        )
+        merged = PluginResult.model_construct(
+            plugin=newer.plugin,
+            company=newer.company,
+            fetched_at=newer.fetched_at,
+            total_raw=newer.total_raw,
+            complaints=kept + newer.complaints,
+            watermark=watermark,
+        )
+        merged._increment = Increment(since=since, start=len(kept))
+        return merged
+
+    def unchanged(self) -> "PluginResult":
+        """Cópia marcada como incremento vazio (fonte sem novidades: nada a regravar)."""
+        copy = self.model_copy()
+        copy._increment = Increment(since=None, start=len(self.complaints))
+        return copy
+
 # Note: Removed non_empty_complaints validator to allow empty complaints list
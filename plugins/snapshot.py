@@ -0,0 +1,325 @@
+# plugins/snapshot.py
+import asyncio, json, logging, os, shutil, uuid
+from abc import abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from plugins.base import IngestPlugin
+from plugins.brandindex import INDEX_FILE, SNAPSHOT_DIR, BrandIndex, load_index
+from plugins.brandindex import suggest_brands as _suggest_brands
+from plugins.cache import get_cache
+from plugins.httpclient import run_sync
+from plugins.matching import CompanyMatcher
+from plugins.schema import PluginResult, ComplaintBatch, Watermark
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+PARTITION_COL = "ano"
+# versões do snapshot mantidas por fonte: a atual e a anterior, que outro
+# processo (ou sessão) ainda pode estar consultando
+SNAPSHOT_KEEP = int(os.environ.get("SPOTLIGHT_SNAPSHOT_KEEP", 2))
+
+
+def normalize_columns(columns) -> List[str]:
+    """Remove BOM (inclusive o mojibake `ï»¿`) e espaços dos nomes de coluna."""
+    return [str(c).replace("\ufeff", "").replace("ï»¿", "").strip() for c in columns]
+
+
+class SnapshotPlugin(IngestPlugin):
+    """
+    Plugin de arquivo público grande, respondido a partir de um snapshot colunar.
+
+    Na primeira consulta de uma versão do arquivo (sha256 do cache de
+    downloads), a fonte é convertida uma única vez em um dataset Parquet
+    particionado por ano, com colunas normalizadas e datas tipadas.
+    As consultas seguintes leem só as colunas necessárias e empurram o
+    filtro de empresa para o leitor do Arrow, sem reparsear o texto.
+    Junto do snapshot fica um índice de marcas (`BrandIndex`): a empresa
+    é resolvida nele para grafias exatas e anos, e a consulta vira um
+    `isin` nas partições certas em vez de um regex sobre a coluna toda.
+
+    `refresh` é incremental: se a versão do arquivo não mudou desde a
+    marca d'água salva, nada é lido; senão só linhas com data a partir
+    da marca são extraídas e mescladas no resultado anterior.
+
+    Subclasses definem `NAME`, `LABEL`, `URL` e os ganchos abaixo.
+    """
+
+    NAME: str = ""
+    LABEL: str = ""
+    URL: str = ""
+    DOWNLOAD_TIMEOUT: int = 300
+    DATE_FORMAT: str = "ISO8601"
+
+    @abstractmethod
+    def _read_source(self, path: Path) -> Iterator[pd.DataFrame]:
+        """Lê o arquivo bruto em chunks de DataFrame (dtype=str)."""
+
+    @abstractmethod
+    def _columns(self, names: List[str]) -> Dict[str, Any]:
+        """
+        Resolve os nomes de coluna do snapshot. Deve conter ao menos
+        `date` (coluna de data) e `brands` (lista de colunas de marca).
+        """
+
+    @abstractmethod
+    def _build_batch(self, df: pd.DataFrame, cols: Dict[str, Any]) -> ComplaintBatch:
+        """Converte as linhas filtradas em Complaint (via `build_complaints`)."""
+
+    def _count_raw(self, chunk: pd.DataFrame) -> int:
+        return len(chunk)
+
+    # --- snapshot ---
+    async def adownload(self) -> Path:
+        """Baixa (ou revalida) a fonte no cache compartilhado e devolve o arquivo local."""
+        logger.info("🔄 Iniciando download de %s", self.LABEL)
+        try:
+            return await get_cache().afetch(self.URL, timeout=self.DOWNLOAD_TIMEOUT)
+        except Exception as e:
+            logger.error("❌ Erro HTTP ao baixar %s: %s", self.LABEL, e, exc_info=True)
+            raise RuntimeError(f"Erro HTTP ao baixar dados de {self.LABEL}: {e}")
+
+    def download(self) -> Path:
+        return run_sync(self.adownload())
+
+    def snapshot(self) -> Tuple[ds.Dataset, Dict[str, Any]]:
+        """Baixa (ou revalida) a fonte e devolve o snapshot correspondente."""
+        return self._open_snapshot(self.download())
+
+    def _open_snapshot(self, path: Path) -> Tuple[ds.Dataset, Dict[str, Any]]:
+        """Abre (gerando na primeira vez) o snapshot da versão em `path`."""
+        # blobs do cache são nomeados pelo sha256 do conteúdo
+        version = path.name
+        target = SNAPSHOT_DIR / self.NAME / version
+        if not (target / "_meta.json").exists():
+            try:
+                self._build_snapshot(path, target)
+            except Exception as e:
+                logger.error("❌ Falha ao converter %s: %s", self.LABEL, e, exc_info=True)
+                raise RuntimeError(f"Erro ao processar dados de {self.LABEL}: {e}")
+
+        meta = json.loads((target / "_meta.json").read_text(encoding="utf-8"))
+        dataset = ds.dataset(target / "data", format="parquet", partitioning="hive")
+        return dataset, meta
+
+    def _build_snapshot(self, path: Path, target: Path) -> None:
+        logger.info("🧱 Gerando snapshot Parquet de %s (%s)", self.LABEL, target.name[:12])
+        tmp = target.parent / f".{target.name}.{uuid.uuid4().hex}.tmp"
+        total_raw = 0
+        schema: Optional[pa.Schema] = None
+        cols: Dict[str, Any] = {}
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            for idx, chunk in enumerate(self._read_source(path), start=1):
+                chunk.columns = normalize_columns(chunk.columns)
+                if schema is None:
+                    cols = self._columns(list(chunk.columns))
+                    schema = pa.schema(
+                        [(c, pa.timestamp("ns") if c == cols["date"] else pa.string())
+                         for c in chunk.columns]
+                        + [(PARTITION_COL, pa.int32())]
+                    )
+                total_raw += self._count_raw(chunk)
+
+                chunk[cols["date"]] = pd.to_datetime(
+                    chunk[cols["date"]], format=self.DATE_FORMAT, errors="coerce"
+                )
+                chunk[PARTITION_COL] = chunk[cols["date"]].dt.year.astype("Int32")
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                ds.write_dataset(
+                    table, tmp / "data", format="parquet",
+                    partitioning=[PARTITION_COL], partitioning_flavor="hive",
+                    basename_template=f"part-{idx}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                logger.info("   → chunk %d convertido (%d linhas)", idx, len(chunk))
+
+            if schema is None:
+                raise RuntimeError(f"Arquivo de {self.LABEL} sem linhas")
+            index = BrandIndex.build(
+                ds.dataset(tmp / "data", format="parquet", partitioning="hive"),
+                cols["brands"], PARTITION_COL,
+            )
+            index.save(tmp / INDEX_FILE)
+            logger.info("   → índice de marcas: %d nomes", len(index.keys))
+            meta = {
+                "plugin": self.NAME,
+                "version": target.name,
+                "total_raw": total_raw,
+                "columns": cols,
+                "created_at": datetime.utcnow().isoformat(),
+            }
+            tmp.mkdir(parents=True, exist_ok=True)
+            (tmp / "_meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                # outro processo publicou a mesma versão primeiro
+                if not (target / "_meta.json").exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        self._prune_versions(target)
+        logger.info("✅ Snapshot pronto: %d linhas brutas", total_raw)
+
+    def _prune_versions(self, target: Path) -> None:
+        """Apaga as versões da fonte além das `SNAPSHOT_KEEP` mais recentes (nunca `target`)."""
+        def created(path: Path) -> float:
+            try:
+                meta = json.loads((path / "_meta.json").read_text(encoding="utf-8"))
+                return datetime.fromisoformat(meta["created_at"]).replace(tzinfo=timezone.utc).timestamp()
+            except Exception:
+                return path.stat().st_mtime
+
+        versions = sorted(
+            (p for p in target.parent.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=created, reverse=True,
+        )
+        keep = {target, *versions[:SNAPSHOT_KEEP]}
+        for old in versions:
+            if old not in keep:
+                logger.info("🧹 Snapshot antigo de %s removido (%s)", self.LABEL, old.name[:12])
+                shutil.rmtree(old, ignore_errors=True)
+
+    def _open_index(self, path: Path, dataset: ds.Dataset,
+                    cols: Dict[str, Any]) -> Optional[BrandIndex]:
+        """Índice de marcas do snapshot de `path` (gerado aqui para snapshots antigos)."""
+        file = SNAPSHOT_DIR / self.NAME / path.name / INDEX_FILE
+        index = load_index(file)
+        if index is None and file.parent.exists():
+            try:
+                BrandIndex.build(dataset, cols["brands"], PARTITION_COL).save(file)
+                index = load_index(file)
+            except Exception as e:
+                # sem índice a consulta cai no regex; não é motivo para falhar
+                logger.warning("⚠️ Não foi possível indexar marcas de %s: %s", self.LABEL, e)
+        return index
+
+    # --- consulta ---
+    def _query(self, dataset: ds.Dataset, cols: Dict[str, Any],
+               matcher: CompanyMatcher, since: Optional[datetime] = None) -> pd.DataFrame:
+        names = set(dataset.schema.names)
+        brands = [c for c in cols["brands"] if c and c in names]
+        projection = sorted({
+            c for v in cols.values() for c in (v if isinstance(v, list) else [v])
+            if c and c in names
+        })
+        expr = None
+        for col in brands:
+            if col in matcher.indexed:
+                # marcas resolvidas no índice: igualdade, sem regex
+                if not matcher.all_values:
+                    continue
+                e = pc.field(col).isin(sorted(matcher.all_values))
+            else:
+                e = pc.match_substring_regex(pc.field(col), pattern=matcher.pattern, ignore_case=True)
+            expr = e if expr is None else (expr | e)
+        if expr is None:
+            return pd.DataFrame(columns=projection)
+        years = matcher.partitions()
+        if years is not None and PARTITION_COL in names and all(c in matcher.indexed for c in brands):
+            # só as partições (anos) em que as marcas aparecem são lidas
+            expr = expr & pc.field(PARTITION_COL).isin(sorted(years))
+        if since is not None:
+            # ">=": linhas do mesmo dia da marca podem ter sido publicadas depois;
+            # o merge descarta as anteriores a partir de `since` e fica com estas.
+            # Linhas sem data não entram na marca d'água: são relidas a cada atualização
+            date = pc.field(cols["date"])
+            expr = expr & ((date >= pa.scalar(since, pa.timestamp("ns"))) | date.is_null())
+            if PARTITION_COL in dataset.schema.names:
+                year = pc.field(PARTITION_COL)
+                expr = expr & ((year >= since.year) | year.is_null())
+        return dataset.to_table(columns=projection, filter=expr).to_pandas()
+
+    def fetch(self, company: str) -> PluginResult:
+        return self.fetch_many([company])[company]
+
+    def fetch_many(self, companies: List[str]) -> Dict[str, PluginResult]:
+        if not CompanyMatcher(companies).companies:
+            return {}
+        return self._fetch_from(self.download(), companies)
+
+    async def afetch(self, company: str) -> PluginResult:
+        return (await self.afetch_many([company]))[company]
+
+    def refresh(self, company: str, previous: Optional[PluginResult] = None) -> PluginResult:
+        return self._refresh_from(self.download(), company, previous)
+
+    async def arefresh(self, company: str, previous: Optional[PluginResult] = None) -> PluginResult:
+        path = await self.adownload()
+        return await asyncio.to_thread(self._refresh_from, path, company, previous)
+
+    def _refresh_from(self, path: Path, company: str,
+                      previous: Optional[PluginResult]) -> PluginResult:
+        watermark = previous.watermark if previous else None
+        if watermark and watermark.source_version == path.name:
+            logger.info("⏭️ %s inalterado desde a última extração; nada a fazer", self.LABEL)
+            return previous.unchanged()
+
+        since = watermark.max_date if watermark else None
+        newer = self._fetch_from(path, [company], since=since)[company]
+        if previous is None or since is None:
+            return newer
+        merged = previous.merge(newer, since=since)
+        logger.info(
+            "➕ %s: %d reclamações novas desde %s",
+            self.LABEL, len(merged.complaints) - len(previous.complaints), since.date()
+        )
+        return merged
+
+    async def afetch_many(self, companies: List[str]) -> Dict[str, PluginResult]:
+        if not CompanyMatcher(companies).companies:
+            return {}
+        path = await self.adownload()
+        # conversão/consulta do snapshot é CPU: fora do event loop
+        return await asyncio.to_thread(self._fetch_from, path, companies)
+
+    def _fetch_from(self, path: Path, companies: List[str],
+                    since: Optional[datetime] = None) -> Dict[str, PluginResult]:
+        dataset, meta = self._open_snapshot(path)
+        cols, total_raw = meta["columns"], meta["total_raw"]
+        matcher = CompanyMatcher(companies, index=self._open_index(path, dataset, cols))
+
+        try:
+            candidates = self._query(dataset, cols, matcher, since=since)
+            logger.info("🔎 %d linhas candidatas no snapshot de %s", len(candidates), self.LABEL)
+            results: Dict[str, PluginResult] = {}
+            for company, filtered in matcher.split(candidates, cols["brands"]).items():
+                logger.info("   → %d correspondências para '%s'", len(filtered), company)
+                batch = self._build_batch(filtered, cols)
+                if batch.rejected:
+                    logger.warning(
+                        "⚠️ %d linhas inválidas ignoradas para '%s' (ex.: %s)",
+                        len(batch.rejected), company, list(batch.rejected.values())[:3]
+                    )
+                # só datas lidas da fonte: uma linha sem data preenchida com now()
+                # levaria a marca para o presente e esconderia o que chegar depois
+                dates = [d for d in (batch.max_source_date, since) if d is not None]
+                max_date = max(dates) if dates else None
+                results[company] = PluginResult(
+                    plugin=self.NAME,
+                    company=company,
+                    total_raw=total_raw,
+                    complaints=batch.complaints,
+                    watermark=Watermark(max_date=max_date, source_version=path.name),
+                )
+        except Exception as e:
+            logger.error("❌ Falha ao consultar %s: %s", self.LABEL, e, exc_info=True)
+            raise RuntimeError(f"Erro ao processar dados de {self.LABEL}: {e}")
+
+        logger.info(
+            "🏁 %s: total_raw=%d, complaints=%s",
+            self.LABEL, total_raw, {c: len(r.complaints) for c, r in results.items()}
+        )
+        return results
+
+
+def suggest_brands(query: str, limit: int = 10) -> List[Tuple[str, int]]:
+    """`brandindex.suggest_brands` sobre os snapshots de `SNAPSHOT_DIR`."""
+    return _suggest_brands(query, limit, root=SNAPSHOT_DIR)
@@ -0,0 +1,65 @@
+# plugins/streaming.py
+import codecs, io
+from pathlib import Path
+from typing import Iterable, Iterator
+
+BLOCK_SIZE = 1024 * 1024
+
+
+def iter_file(path: Path, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Lê `path` em blocos de bytes, no mesmo formato de `resp.iter_content`."""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+class IterTextIO(io.TextIOBase):
+    """
+    Arquivo de texto somente-leitura sobre um iterador de bytes.
+
+    Decodifica incrementalmente (sem juntar o arquivo inteiro em memória),
+    então pode alimentar `pd.read_csv(..., chunksize=...)` direto de
+    `resp.iter_content()` ou de `iter_file()`. O buffer interno nunca
+    passa muito do tamanho pedido em `read`.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], encoding: str = "utf-8"):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._buf = ""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int, until: str = "") -> None:
+        while not self._eof and (size < 0 or len(self._buf) < size):
+            if until and until in self._buf:
+                return
+            try:
+                raw = next(self._chunks)
+            except StopIteration:
+                self._buf += self._decoder.decode(b"", final=True)
+                self._eof = True
+                return
+            self._buf += self._decoder.decode(raw)
+
+    def read(self, size: int = -1) -> str:
+        size = -1 if size is None else size
+        self._fill(size)
+        if size < 0:
+            out, self._buf = self._buf, ""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+    def readline(self, size: int = -1) -> str:
+        self._fill(-1, until="\n")
+        end = self._buf.find("\n") + 1 or len(self._buf)
+        if size is not None and size >= 0:
+            end = min(end, size)
+        out, self._buf = self._buf[:end], self._buf[end:]
+        return out
@@ -0,0 +1,122 @@
+# storage/data.py
+import json, logging, os, re, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, Optional, Sequence, Tuple
+import pandas as pd
+from storage.ipc import read_frame, read_metadata, write_frame
+from storage.store import get_store
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+FRAME_CACHE_MAX_BYTES = int(os.environ.get("SPOTLIGHT_FRAME_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+DEFAULT_COLUMNS = ("source", "date", "category", "description")
+CATEGORICAL = ("source", "category")
+# cópias Arrow IPC (sem compressão, lidas via mmap) dos DataFrames por empresa:
+# outro processo ou um restart do Streamlit não precisa reler o SQLite
+FRAME_DIR = Path(os.environ.get("SPOTLIGHT_FRAME_DIR", "data/frames"))
+
+
+class FrameCache:
+    """
+    LRU de DataFrames limitado pelo uso de memória (`memory_usage(deep=True)`),
+    não pelo número de entradas. Cada entrada guarda a versão dos dados de
+    origem; versão diferente conta como ausência.
+    """
+
+    def __init__(self, max_bytes: int = FRAME_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items: "OrderedDict[Hashable, Tuple[Hashable, pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None or hit[0] != version:
+                return None
+            self._items.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: Hashable, version: Hashable, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[2]
+            if size > self.max_bytes:
+                return
+            self._items[key] = (version, df, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, _, evicted) = self._items.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+
+# compartilhado por todas as páginas e sessões do processo Streamlit
+_frames = FrameCache()
+
+
+def _frame_path(store_path: str, empresa: str, columns: Sequence[str]) -> Path:
+    name = re.sub(r"[^\w.-]+", "_", f"{Path(store_path).stem}__{empresa}__{'-'.join(columns)}")
+    return FRAME_DIR / f"{name}.arrow"
+
+
+def _read_ipc(path: Path, version: str) -> Optional[pd.DataFrame]:
+    """DataFrame da cópia IPC, se ela for da mesma versão do banco."""
+    if not path.exists():
+        return None
+    try:
+        if read_metadata(path).get("spotlight.version") != version:
+            return None
+        return read_frame(path)
+    except Exception as e:
+        logger.warning("⚠️ Cópia IPC ilegível ignorada (%s): %s", path.name, e)
+        return None
+
+
+def load_complaints(empresa: str, columns: Sequence[str] = DEFAULT_COLUMNS) -> pd.DataFrame:
+    """
+    Reclamações da empresa como DataFrame colunar (`source`/`category`
+    categóricos), memoizado no processo pela versão dos dados no banco.
+    Trocar de página ou de sessão não relê nada enquanto o Discover não
+    gravar um resultado novo para a empresa.
+
+    Fora do cache do processo, a leitura vem de uma cópia Arrow IPC
+    mapeada em memória (`FRAME_DIR`); o SQLite só é consultado quando a
+    cópia falta ou é de outra versão, e a cópia é regravada em seguida.
+
+    Devolve uma cópia rasa: adicionar colunas não afeta o cache.
+    """
+    store = get_store()
+    key = (str(store.path), empresa.strip().upper(), tuple(columns))
+    version = store.version(empresa)
+    df = _frames.get(key, version)
+    if df is None:
+        path = _frame_path(*key)
+        tag = json.dumps(version)
+        df = _read_ipc(path, tag)
+        if df is None:
+            df = store.query(empresa, columns=columns)
+            for col in CATEGORICAL:
+                if col in df.columns:
+                    df[col] = df[col].astype("category")
+            try:
+                write_frame(df, path, {"spotlight.version": tag})
+            except OSError as e:
+                logger.warning("⚠️ Cópia IPC não gravada (%s): %s", path.name, e)
+        _frames.put(key, version, df)
+        logger.info("📚 %d reclamações de %s carregadas (cache: %.1f MB)",
+                    len(df), key[1], _frames.nbytes / 1024 ** 2)
+    return df.copy(deep=False)
+
+
+def data_version(empresa: str) -> tuple:
+    """Versão dos dados da empresa, para chavear caches das páginas (ex.: `st.cache_data`)."""
+    return get_store().version(empresa)
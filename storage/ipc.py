@@ -0,0 +1,206 @@
+# storage/ipc.py
+import json, os, tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import pandas as pd
+import pyarrow as pa
+from plugins.schema import Complaint, PluginResult, Watermark
+
+FORMAT_VERSION = "1"
+SCHEMA = pa.schema([
+    ("date", pa.timestamp("us")),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("description", pa.string()),
+    ("raw_brand", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+def to_table(result: PluginResult) -> pa.Table:
+    """
+    PluginResult → tabela Arrow. As reclamações viram colunas (categoria e
+    marca com dicionário); os metadados vão no schema.
+    """
+    cs = result.complaints
+    wm = result.watermark
+    metadata = {
+        "spotlight.format": FORMAT_VERSION,
+        "plugin": result.plugin,
+        "company": result.company,
+        "fetched_at": result.fetched_at.isoformat(),
+        "total_raw": str(result.total_raw),
+        "watermark": json.dumps(wm.model_dump(mode="json")) if wm else "",
+    }
+    columns = [
+        pa.array([c.date for c in cs], type=pa.timestamp("us")),
+        pa.array([c.category for c in cs], type=pa.string()).dictionary_encode(),
+        pa.array([c.description for c in cs], type=pa.string()),
+        pa.array([c.raw_brand for c in cs], type=pa.string()).dictionary_encode(),
+    ]
+    return pa.Table.from_arrays(columns, schema=SCHEMA.with_metadata(metadata))
+
+
+def _result_meta(table: pa.Table) -> Dict[str, str]:
+    meta = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    if "spotlight.format" not in meta:
+        raise ValueError("tabela Arrow sem metadados de PluginResult")
+    return meta
+
+
+def _complaints(table: pa.Table) -> List[Complaint]:
+    # coluna a coluna via pandas: bem mais rápido que `to_pylist` (dicionários, datas)
+    df = table.to_pandas()
+    cols = {name: df[name].astype(object).tolist() for name in ("category", "description", "raw_brand")}
+    cols["date"] = pd.DatetimeIndex(df["date"]).to_pydatetime()
+    return [
+        Complaint.model_construct(date=d, category=cat, description=desc, raw_brand=brand)
+        for d, cat, desc, brand in zip(cols["date"], cols["category"],
+                                       cols["description"], cols["raw_brand"])
+    ]
+
+
+def _watermark(meta: Dict[str, str]) -> Optional[Watermark]:
+    wm = json.loads(meta["watermark"]) if meta.get("watermark") else None
+    return Watermark.model_validate(wm) if wm else None
+
+
+def from_table(table: pa.Table) -> PluginResult:
+    """Inverso de `to_table` (sem revalidar: os dados já passaram pelo schema)."""
+    meta = _result_meta(table)
+    return PluginResult.model_construct(
+        plugin=meta["plugin"],
+        company=meta["company"],
+        fetched_at=datetime.fromisoformat(meta["fetched_at"]),
+        total_raw=int(meta["total_raw"]),
+        complaints=_complaints(table),
+        watermark=_watermark(meta),
+    )
+
+
+class ArrowResult:
+    """
+    PluginResult lido de um arquivo IPC sem montar as reclamações: os
+    metadados ficam como atributos e as linhas na tabela Arrow (mapeada,
+    se o arquivo não tiver compressão). `complaints` monta um Complaint por
+    linha só no primeiro acesso; `to_frame` não monta nenhum.
+    """
+
+    def __init__(self, table: pa.Table):
+        meta = _result_meta(table)
+        self.table = table
+        self.plugin = meta["plugin"]
+        self.company = meta["company"]
+        self.fetched_at = datetime.fromisoformat(meta["fetched_at"])
+        self.total_raw = int(meta["total_raw"])
+        self.watermark = _watermark(meta)
+        self._complaints: Optional[List[Complaint]] = None
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def complaints(self) -> List[Complaint]:
+        if self._complaints is None:
+            self._complaints = _complaints(self.table)
+        return self._complaints
+
+    def to_frame(self) -> pd.DataFrame:
+        return _frame(self.table)
+
+    def to_result(self) -> PluginResult:
+        return PluginResult.model_construct(
+            plugin=self.plugin, company=self.company, fetched_at=self.fetched_at,
+            total_raw=self.total_raw, complaints=self.complaints, watermark=self.watermark,
+        )
+
+
+def write_result(result: Union[PluginResult, pa.Table], path: Path,
+                 compression: Optional[str] = None) -> None:
+    """
+    Grava em Arrow IPC (formato de arquivo/Feather v2), sem compressão por
+    padrão: a leitura é via mmap e os buffers Arrow apontam direto para as
+    páginas do arquivo. `compression="zstd"` é para exportar/arquivar
+    (`json_to_arrow`): ler descomprime tudo para a memória.
+
+    Com 1 milhão de reclamações (`python -m tests.test_ipc`): 78 MB sem
+    compressão contra 8,5 MB com zstd; abrir leva ~1 ms contra ~60 ms, e o
+    DataFrame sai ~1,6x mais rápido. Montar os Complaints custa o mesmo
+    nos dois (~7 s), por isso `read_result` só os monta sob demanda.
+    """
+    table = result if isinstance(result, pa.Table) else to_table(result)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # nome temporário único: dois processos podem gravar o mesmo arquivo
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    os.close(fd)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_frame(df: pd.DataFrame, path: Path, metadata: Optional[Dict[str, str]] = None,
+                compression: Optional[str] = None) -> None:
+    """
+    DataFrame de reclamações em Arrow IPC, sem compressão por padrão (é o
+    formato que `read_frame` mapeia). Colunas `category` viram dicionário.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    meta = {**(table.schema.metadata or {}), **{k.encode(): v.encode() for k, v in (metadata or {}).items()}}
+    write_result(table.replace_schema_metadata(meta), path, compression=compression)
+
+
+def read_table(path: Path) -> pa.Table:
+    """
+    Abre o arquivo via mmap. Sem compressão, as colunas são fatias do
+    próprio arquivo (zero-cópia: só as páginas tocadas saem do disco); com
+    zstd, cada buffer é descomprimido para a memória.
+    """
+    with pa.memory_map(str(path), "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_metadata(path: Path) -> Dict[str, str]:
+    """Metadados do schema, sem ler as colunas."""
+    with pa.memory_map(str(path), "r") as source:
+        meta = pa.ipc.open_file(source).schema.metadata or {}
+    return {k.decode(): v.decode() for k, v in meta.items()}
+
+
+def read_result(path: Path) -> ArrowResult:
+    """Abre o resultado gravado por `write_result`; as reclamações só são montadas sob demanda."""
+    return ArrowResult(read_table(path))
+
+
+def _frame(table: pa.Table) -> pd.DataFrame:
+    df = table.to_pandas()
+    meta = table.schema.metadata or {}
+    if "source" not in df.columns and b"plugin" in meta:
+        df.insert(0, "source", pd.Categorical([meta.get(b"plugin", b"").decode()] * len(df)))
+    return df
+
+
+def read_frame(path: Path) -> pd.DataFrame:
+    """
+    Reclamações como DataFrame direto das colunas Arrow, sem montar um
+    Complaint por linha; categoria e marca chegam como `category`. Datas e
+    códigos das categorias saem dos buffers mapeados; as colunas de texto
+    ainda podem ser copiadas na conversão para pandas.
+    """
+    return _frame(read_table(path))
+
+
+# --- conversão JSON ↔ Arrow (sem perdas) ---
+def json_to_arrow(json_path: Path, arrow_path: Path, compression: Optional[str] = "zstd") -> None:
+    # exportação/arquivo: zstd por padrão
+    result = PluginResult.model_validate_json(json_path.read_text(encoding="utf-8"))
+    write_result(result, arrow_path, compression=compression)
+
+
+def arrow_to_json(arrow_path: Path, json_path: Path) -> None:
+    # mesmo formato que o Discover gravava
+    json_path.write_text(read_result(arrow_path).to_result().model_dump_json(by_alias=True, indent=2),
+                         encoding="utf-8")
@@ -0,0 +1,347 @@
+# storage/store.py
+import logging, os, sqlite3, threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from plugins.schema import PluginResult
+
+# pandas/pydantic só nos métodos que os usam: abrir o banco e ler metadados
+# (cards do Discover) fica só em sqlite3
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DB_PATH = Path(os.environ.get("SPOTLIGHT_DB", "data/spotlight.db"))
+# onde o Discover gravava `{plugin}_{empresa}.json` antes do banco
+LEGACY_DIR = Path("data")
+COLUMNS = ["source", "date", "category", "description", "raw_brand"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id                INTEGER PRIMARY KEY,
+    key               TEXT NOT NULL,      -- chave do plugin no Discover (ex.: ingest_anatel)
+    plugin            TEXT NOT NULL,      -- PluginResult.plugin (ex.: ANATEL)
+    company           TEXT NOT NULL,
+    fetched_at        TEXT NOT NULL,
+    total_raw         INTEGER NOT NULL,
+    watermark_date    TEXT,
+    watermark_version TEXT,
+    UNIQUE (key, company)
+);
+CREATE TABLE IF NOT EXISTS complaints (
+    id          INTEGER PRIMARY KEY,
+    result_id   INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    company     TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    date        TEXT NOT NULL,            -- ISO 8601, ordena como texto
+    category    TEXT NOT NULL,
+    description TEXT NOT NULL,
+    raw_brand   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_complaints_company_source_date ON complaints (company, source, date);
+CREATE INDEX IF NOT EXISTS ix_complaints_company_date ON complaints (company, date);
+CREATE INDEX IF NOT EXISTS ix_complaints_company_category ON complaints (company, category);
+CREATE INDEX IF NOT EXISTS ix_complaints_result ON complaints (result_id);
+CREATE TABLE IF NOT EXISTS imports (
+    path  TEXT PRIMARY KEY,
+    mtime REAL NOT NULL
+);
+"""
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class ComplaintStore:
+    """
+    Banco SQLite local com os resultados dos plugins.
+
+    - `results`: um registro por (plugin, empresa), com metadados e marca d'água;
+    - `complaints`: uma linha por reclamação, com índices por empresa +
+      fonte/data/categoria, para filtrar e paginar em SQL;
+    - modo WAL: páginas leem enquanto o Discover grava;
+    - gravação em lote (`executemany`) numa única transação por resultado.
+
+    Cada thread usa a própria conexão.
+    """
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- escrita ---
+    def _upsert_result(self, conn: sqlite3.Connection, key: str, result: "PluginResult") -> int:
+        """Grava os metadados de `result`; devolve o id da linha em `results`."""
+        from plugins.schema import Watermark
+        wm = result.watermark or Watermark()
+        conn.execute(
+            """
+            INSERT INTO results (key, plugin, company, fetched_at, total_raw,
+                                 watermark_date, watermark_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key, company) DO UPDATE SET
+                plugin = excluded.plugin,
+                fetched_at = excluded.fetched_at,
+                total_raw = excluded.total_raw,
+                watermark_date = excluded.watermark_date,
+                watermark_version = excluded.watermark_version
+            """,
+            (key, result.plugin, result.company, _iso(result.fetched_at), result.total_raw,
+             _iso(wm.max_date), wm.source_version),
+        )
+        (result_id,) = conn.execute(
+            "SELECT id FROM results WHERE key = ? AND company = ?", (key, result.company)
+        ).fetchone()
+        return result_id
+
+    def _insert(self, conn: sqlite3.Connection, result_id: int, result: "PluginResult",
+                complaints: Sequence) -> None:
+        conn.executemany(
+            """
+            INSERT INTO complaints (result_id, company, source, date, category,
+                                    description, raw_brand)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                (result_id, result.company, result.plugin, _iso(c.date),
+                 c.category, c.description, c.raw_brand)
+                for c in complaints
+            ),
+        )
+
+    def save(self, key: str, result: "PluginResult") -> None:
+        """Grava (substituindo) o resultado do plugin `key` para `result.company`."""
+        with self._conn() as conn:
+            result_id = self._upsert_result(conn, key, result)
+            conn.execute("DELETE FROM complaints WHERE result_id = ?", (result_id,))
+            self._insert(conn, result_id, result, result.complaints)
+        logger.info("💾 %s/%s: %d reclamações gravadas", key, result.company, len(result.complaints))
+
+    def save_increment(self, key: str, result: "PluginResult") -> None:
+        """
+        Grava um resultado mesclado por `refresh` sem reescrevê-lo: apaga só
+        as linhas com data >= `increment.since` e insere `complaints[start:]`.
+
+        Cai em `save` quando não há incremento ou quando o banco não tem as
+        `start` linhas anteriores ao corte que o incremento supõe (ex.: outra
+        sessão regravou o resultado no meio do caminho).
+        """
+        inc = result.increment
+        if inc is None:
+            return self.save(key, result)
+        with self._conn() as conn:
+            # trava de escrita já na conferência: ninguém regrava entre ela e o DELETE
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT id FROM results WHERE key = ? AND company = ?",
+                               (key, result.company)).fetchone()
+            if row is not None:
+                if inc.since is None:
+                    (kept,) = conn.execute("SELECT COUNT(*) FROM complaints WHERE result_id = ?",
+                                           row).fetchone()
+                else:
+                    (kept,) = conn.execute(
+                        "SELECT COUNT(*) FROM complaints WHERE result_id = ? AND date < ?",
+                        (row[0], _iso(inc.since)),
+                    ).fetchone()
+            if row is None or kept != inc.start:
+                conn.rollback()
+            else:
+                result_id = self._upsert_result(conn, key, result)
+                if inc.since is not None:
+                    conn.execute("DELETE FROM complaints WHERE result_id = ? AND date >= ?",
+                                 (result_id, _iso(inc.since)))
+                self._insert(conn, result_id, result, result.complaints[inc.start:])
+                logger.info("💾 %s/%s: +%d reclamações (incremental)", key, result.company,
+                            len(result.complaints) - inc.start)
+                return
+        logger.info("ℹ️ %s/%s: incremento não confere com o banco; gravando tudo", key, result.company)
+        self.save(key, result)
+
+    def import_json(self, data_dir: Path = LEGACY_DIR) -> int:
+        """
+        Importa os `{plugin}_{empresa}.json` antigos (e `.arrow`, ver
+        `storage.ipc`). Arquivos já importados (mesmo caminho e mtime) são
+        pulados; retorna quantos entraram.
+        """
+        from plugins.registry import specs
+        keys = sorted(specs(), key=len, reverse=True)
+        conn = self._conn()
+        done = dict(conn.execute("SELECT path, mtime FROM imports").fetchall())
+        imported = 0
+        files = sorted([*data_dir.glob("*_*.json"), *data_dir.glob("*_*.arrow")])
+        for f in files:
+            mtime = f.stat().st_mtime
+            if done.get(str(f)) == mtime:
+                continue
+            try:
+                if f.suffix == ".arrow":
+                    from storage.ipc import read_result
+                    pr = read_result(f)
+                else:
+                    from plugins.schema import PluginResult
+                    pr = PluginResult.model_validate_json(f.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.warning("⚠️ %s ignorado na importação: %s", f.name, e)
+                continue
+            key = next((k for k in keys if f.stem.startswith(k + "_")), pr.plugin)
+            self.save(key, pr)
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO imports (path, mtime) VALUES (?, ?)",
+                             (str(f), mtime))
+            imported += 1
+        if imported:
+            logger.info("📦 %d arquivos importados para %s", imported, self.path)
+        return imported
+
+    # --- leitura ---
+    def load(self, key: str, company: str) -> Optional["PluginResult"]:
+        """PluginResult salvo do plugin `key` para a empresa, ou None."""
+        from plugins.schema import Complaint, PluginResult, Watermark
+        conn = self._conn()
+        row = conn.execute(
+            """
+            SELECT id, plugin, company, fetched_at, total_raw, watermark_date, watermark_version
+            FROM results WHERE key = ? AND company = ?
+            """,
+            (key, company.strip().upper()),
+        ).fetchone()
+        if row is None:
+            return None
+        result_id, plugin, company, fetched_at, total_raw, wm_date, wm_version = row
+        complaints = [
+            Complaint.model_construct(date=datetime.fromisoformat(d), category=cat,
+                                      description=desc, raw_brand=brand)
+            for d, cat, desc, brand in conn.execute(
+                "SELECT date, category, description, raw_brand FROM complaints "
+                "WHERE result_id = ? ORDER BY id",
+                (result_id,),
+            )
+        ]
+        watermark = None
+        if wm_date or wm_version:
+            watermark = Watermark(
+                max_date=datetime.fromisoformat(wm_date) if wm_date else None,
+                source_version=wm_version,
+            )
+        return PluginResult.model_construct(
+            plugin=plugin, company=company, fetched_at=datetime.fromisoformat(fetched_at),
+            total_raw=total_raw, complaints=complaints, watermark=watermark,
+        )
+
+    def _where(self, company: str, sources: Optional[Sequence[str]],
+               categories: Optional[Sequence[str]], since: Optional[datetime],
+               until: Optional[datetime]) -> tuple:
+        clauses, params = ["company = ?"], [company.strip().upper()]
+        if sources:
+            clauses.append(f"source IN ({', '.join('?' * len(sources))})")
+            params += list(sources)
+        if categories:
+            clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+            params += list(categories)
+        if since is not None:
+            clauses.append("date >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("date < ?")
+            params.append(_iso(until))
+        return " AND ".join(clauses), params
+
+    def query(self, company: str, *, sources: Optional[Sequence[str]] = None,
+              categories: Optional[Sequence[str]] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None,
+              columns: Sequence[str] = COLUMNS,
+              limit: Optional[int] = None, offset: int = 0) -> "pd.DataFrame":
+        """
+        Reclamações da empresa como DataFrame, filtradas e paginadas no SQL
+        (ordem estável: data, id). `until` é exclusivo.
+        """
+        import pandas as pd
+        cols = [c for c in columns if c in COLUMNS]
+        where, params = self._where(company, sources, categories, since, until)
+        sql = f"SELECT {', '.join(cols)} FROM complaints WHERE {where} ORDER BY date, id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        df = pd.read_sql_query(sql, self._conn(), params=params)
+        if "date" in df.columns:
+            df["date"] = pd.to_datetime(df["date"], format="ISO8601")
+        return df
+
+    def count(self, company: str, *, sources: Optional[Sequence[str]] = None,
+              categories: Optional[Sequence[str]] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        where, params = self._where(company, sources, categories, since, until)
+        return self._conn().execute(f"SELECT COUNT(*) FROM complaints WHERE {where}", params).fetchone()[0]
+
+    def pages(self, company: str, page_size: int = 10_000, **filters: Any) -> Iterator["pd.DataFrame"]:
+        """Percorre `query` em páginas de `page_size` linhas."""
+        offset = 0
+        while True:
+            page = self.query(company, limit=page_size, offset=offset, **filters)
+            if page.empty:
+                return
+            yield page
+            offset += len(page)
+
+    def version(self, company: str) -> tuple:
+        """
+        Assinatura dos dados da empresa: muda sempre que algum resultado é
+        regravado. Serve de chave para caches de quem lê o banco.
+        """
+        return tuple(self._conn().execute(
+            "SELECT key, fetched_at, total_raw FROM results WHERE company = ? ORDER BY key",
+            (company.strip().upper(),),
+        ).fetchall())
+
+    def results(self, company: str) -> List[Dict[str, Any]]:
+        """Metadados dos resultados salvos da empresa (sem as reclamações)."""
+        cur = self._conn().execute(
+            "SELECT key, plugin, fetched_at, total_raw, "
+            "(SELECT COUNT(*) FROM complaints c WHERE c.result_id = r.id) "
+            "FROM results r WHERE company = ? ORDER BY key",
+            (company.strip().upper(),),
+        )
+        names = ["key", "plugin", "fetched_at", "total_raw", "complaints"]
+        return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def brand_counts(self, key: str, company: str) -> List[tuple]:
+        """[(marca bruta, reclamações)] do resultado de `key`, mais frequentes primeiro."""
+        return self._conn().execute(
+            "SELECT c.raw_brand, COUNT(*) FROM complaints c JOIN results r ON r.id = c.result_id "
+            "WHERE r.key = ? AND r.company = ? GROUP BY c.raw_brand ORDER BY 2 DESC, 1",
+            (key, company.strip().upper()),
+        ).fetchall()
+
+
+_store: Optional[ComplaintStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ComplaintStore:
+    """Store compartilhado do processo; na primeira abertura importa os JSON antigos."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ComplaintStore()
+            try:
+                _store.import_json()
+            except Exception as e:
+                logger.warning("⚠️ Falha ao importar JSON antigos: %s", e)
+        return _store
@@ -3,11 +3,12 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 import streamlit as st
-import importlib, pkgutil, logging
-from pathlib import Path
-from collections import Counter
-from plugins.schema import PluginResult
-from plugins.base import IngestPlugin
+import logging
+from typing import TYPE_CHECKING
+from plugins.registry import SNAPSHOT, get_plugin, get_plugins, specs
+
+if TYPE_CHECKING:
+    from plugins.schema import PluginResult
 
 # configura logger para plugins
 LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
@@ -17,32 +18,55 @@ logging.basicConfig(
     handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger("discovery-page")
+# marcas mais frequentes oferecidas no autocompletar, além das parecidas
+BRAND_OPTIONS = 2_000
 st.set_page_config(page_title="Spotlight", page_icon="🔎", layout="wide")
 
 # --- Helpers ---
-def load_plugins() -> dict[str, IngestPlugin]:
-    plugins = {}
-    for _, name, _ in pkgutil.iter_modules(["plugins"]):
-        if name.startswith("ingest_"):
-            module = importlib.import_module(f"plugins.{name}")
-            for obj in vars(module).values():
-                if isinstance(obj, type) and issubclass(obj, IngestPlugin) and obj is not IngestPlugin:
-                    plugins[name] = obj()
-    return plugins
+# Só sqlite3 e json até um card ser atualizado: o PluginResult completo
+# (pydantic) e os plugins (pandas/pyarrow) carregam só nessa hora.
+def stored_results(empresa: str) -> dict:
+    """{key: metadados do resultado salvo} da empresa (sem as reclamações)."""
+    from storage.store import get_store
+    return {r["key"]: r for r in get_store().results(empresa)}
 
 
-def path_for(plugin_key: str, empresa: str) -> Path:
-    return Path("data") / f"{plugin_key}_{empresa}.json"
+def brand_counts(plugin_key: str, empresa: str) -> list[tuple[str, int]]:
+    from storage.store import get_store
+    return get_store().brand_counts(plugin_key, empresa)
 
 
 def load_result(plugin_key: str, empresa: str):
-    file = path_for(plugin_key, empresa)
-    if not file.exists():
-        return None
-    try:
-        return PluginResult.model_validate_json(file.read_text(encoding="utf-8"))
-    except Exception:
-        return None
+    from storage.store import get_store
+    return get_store().load(plugin_key, empresa)
+
+
+def save_result(plugin_key: str, empresa: str, pr: "PluginResult") -> None:
+    # resultado mesclado por `refresh`: grava só a parte nova
+    from storage.store import get_store
+    get_store().save_increment(plugin_key, pr)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def brand_suggestions(query: str, limit: int = 10) -> list[tuple[str, int]]:
+    # só os `_brands.json` dos snapshots já gerados (não baixa nem importa pandas)
+    from plugins.brandindex import suggest_brands
+    return suggest_brands(query, limit=limit)
+
+
+def use_brand() -> None:
+    # callback roda antes do rerun: troca a empresa e limpa a escolha
+    choice = (st.session_state.get("brand_choice") or "").strip()
+    if choice:
+        st.session_state["empresa_cache"] = choice
+    st.session_state["brand_choice"] = None
+
+
+def metrics_text(total_raw: int, complaints: int) -> str:
+    return (
+        f"**Total de reclamações analisadas:** {total_raw}\n\n"
+        f"Reclamações para a empresa: {complaints}"
+    )
 
 # Configura o a barra lateral com o nome da empresa
 st.session_state.setdefault("empresa_cache", "")
@@ -79,8 +103,31 @@ if not empresa:
 else:
     st.title(f"🔎 Encontre reclamações de **{empresa.upper()}**")
 
-
-plugins = load_plugins()
+# Autocompletar: grafias da marca encontradas nos dados já baixados, só
+# quando pedido. O selectbox filtra a cada tecla no navegador; as opções vêm
+# dos índices de marcas (parecidas com a empresa primeiro, depois as mais
+# frequentes).
+if st.toggle("🔤 Marcas nos dados já baixados", key="show_brands"):
+    options = dict(brand_suggestions(empresa))
+    for name, rows in brand_suggestions("", limit=BRAND_OPTIONS):
+        options.setdefault(name, rows)
+    if options:
+        st.selectbox(
+            f"Marcas ({len(options)}) — digite para filtrar",
+            list(options),
+            index=None,
+            placeholder=empresa,
+            format_func=lambda n: f"{n} — {options[n]} registros" if n in options else n,
+            accept_new_options=True,
+            key="brand_choice",
+            on_change=use_brand,
+        )
+    else:
+        st.caption("Nenhum índice de marcas ainda: atualize uma fonte primeiro.")
+
+
+# só metadados: os módulos dos plugins são importados ao atualizar
+plugins = specs()
 if not plugins:
     st.error("Nenhum plugin encontrado.")
     st.stop()
@@ -90,27 +137,31 @@ if not plugins:
 for key in plugins:
     st.session_state.setdefault(f"loading_{key}", False)
 
-# Render cards
+# Atualização concorrente de todas as fontes
+refresh_all_btn = st.button("⚡ Atualizar todos", help="Baixa e processa todas as fontes em paralelo")
+
+# Render cards (metadados do banco; reclamações só ao atualizar)
+stored = stored_results(empresa)
 cols = st.columns(min(len(plugins), 3), gap="large")
-for idx, (key, plugin) in enumerate(plugins.items()):
-    label = key.replace("ingest_", "").upper()
+metrics_areas, progress_areas, msg_areas = {}, {}, {}
+for idx, (key, spec) in enumerate(plugins.items()):
+    label = spec.label
     col = cols[idx % len(cols)]
     with col:
         st.markdown(f"### {label}")
+        kind = "arquivo público" if SNAPSHOT in spec.capabilities else "páginas web"
+        st.caption(f"[{kind}]({spec.url})")
         
-        # Load existing data
-        result = load_result(key, empresa)
+        meta = stored.get(key)
         # Placeholder for metrics
         metrics_area = st.empty()
+        metrics_areas[key] = metrics_area
         
         # Initial render of metrics
-        if result:
-            metrics_area.markdown(
-                f"**Total de reclamações analisadas:** {result.total_raw}\n\n"
-                f"Reclamações para a empresa: {len(result.complaints)}"
-            )
+        if meta:
+            metrics_area.markdown(metrics_text(meta["total_raw"], meta["complaints"]))
             st.markdown("**Reclamações por marca:**")
-            for brand, qty in Counter(c.raw_brand for c in result.complaints).most_common():
+            for brand, qty in brand_counts(key, empresa):
                 st.markdown(f"- {brand}: {qty}")
         else:
             metrics_area.markdown("*Nenhum dado disponível.*")
@@ -122,8 +173,10 @@ for idx, (key, plugin) in enumerate(plugins.items()):
         with b2:
             detail_btn = st.button("ℹ️ Detalhes", key=f"info_{key}")
 
-        # Messages container
+        # Progress + messages containers
+        progress_areas[key] = st.empty()
         msg = st.empty()
+        msg_areas[key] = msg
 
         # Handle update
         if update_btn:
@@ -131,17 +184,37 @@ for idx, (key, plugin) in enumerate(plugins.items()):
         if st.session_state[f"loading_{key}"]:
             with st.spinner(f"Atualizando {label}..."):
                 try:
-                    pr = plugin.fetch(empresa)
-                    path = path_for(key, empresa)
-                    path.parent.mkdir(exist_ok=True)
-                    path.write_text(pr.model_dump_json(by_alias=True, indent=2), encoding="utf-8")
+                    # incremental: só o que for novo desde a última extração
+                    previous = load_result(key, empresa) if meta else None
+                    pr = get_plugin(key).refresh(empresa, previous)
+                    save_result(key, empresa, pr)
                     st.session_state[f"loading_{key}"] = False
                     msg.success(f"{len(pr.complaints)} reclamações coletadas de {label}.")
                     # Update metrics inline after fetch
-                    metrics_area.markdown(
-                        f"**Total de reclamações analisadas:** {pr.total_raw}\n\n"
-                        f"Reclamações para a empresa: {len(pr.complaints)}"
-                    )
+                    metrics_area.markdown(metrics_text(pr.total_raw, len(pr.complaints)))
                 except Exception as e:
                     st.session_state[f"loading_{key}"] = False
-                    msg.warning(f"Falha em {label}: {e}")
\ No newline at end of file
+                    msg.warning(f"Falha em {label}: {e}")
+
+# Handle "Atualizar todos": cada card é repintado quando seu resultado chega
+if refresh_all_btn:
+    for key in plugins:
+        progress_areas[key].progress(0, text="⏳ Baixando...")
+    previous = {key: r for key in plugins if key in stored and (r := load_result(key, empresa))}
+    from plugins.runner import refresh_all
+    for event in refresh_all(get_plugins(list(plugins)), empresa, previous=previous):
+        label = plugins[event.key].label
+        if event.stage == "downloaded":
+            progress_areas[event.key].progress(50, text="⚙️ Processando...")
+        elif event.stage == "done":
+            save_result(event.key, empresa, event.result)
+            progress_areas[event.key].progress(100, text="✅ Concluído")
+            metrics_areas[event.key].markdown(
+                metrics_text(event.result.total_raw, len(event.result.complaints))
+            )
+            msg_areas[event.key].success(
+                f"{len(event.result.complaints)} reclamações coletadas de {label}."
+            )
+        else:
+            progress_areas[event.key].empty()
+            msg_areas[event.key].warning(f"Falha em {label}: {event.error}")
@@ -1,14 +1,15 @@
 import sys, os
 import torch
-from pathlib import Path
 import streamlit as st
 
 torch.classes.__path__ = [os.path.join(torch.__path__[0], torch.classes.__file__)]
 
 import logging
-import pandas as pd
-from collections import Counter
-from plugins.schema import PluginResult
+from typing import List
+from storage.data import load_complaints
+from clustering.dedup import dedup_texts
+from inference import client as inference
+from inference.models import classify_sentiment, load_sentiment_pipeline
 
 # Ajusta PYTHONPATH para importar plugins
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
@@ -45,52 +46,17 @@ logger = logging.getLogger("mood-explorer-page")
 
 # --- Helpers ---
 
-def load_records(empresa: str) -> pd.DataFrame:
-    """
-    Carrega reclamações/processos JSON para a empresa e retorna DataFrame.
-    Campos: source, date, category, description
-    """
-    data_dir = Path("data")
-    rows = []
-    for f in data_dir.glob(f"*_{empresa}.json"):
-        pr: PluginResult = PluginResult.model_validate_json(f.read_text(encoding="utf-8"))
-        for c in pr.complaints:
-            rows.append({
-                "source": pr.plugin,
-                "date": c.date,
-                "category": c.category,
-                "description": c.description
-            })
-    return pd.DataFrame(rows)
-
 @st.cache_resource(show_spinner=False)
 def load_sentiment_model():
-    """
-    Carrega pipeline de sentiment-analysis multilingue (inclui PT).
-    Modelo: nlptown/bert-base-multilingual-uncased-sentiment
-    """
-    # Hugging Face pipeline para análise de sentimento em PT
-    from transformers import pipeline
-    return pipeline("sentiment-analysis", model="nlptown/bert-base-multilingual-uncased-sentiment")
+    """Pipeline local: só carregado quando o servidor de inferência está fora do ar."""
+    return load_sentiment_pipeline()
 
 @st.cache_data(show_spinner=False)
-def analyze_sentiment(_sentiment_model, text: str) -> str:
-    """Classifica texto em Positive/Neutral/Negative via Hugging Face."""
-    # Limita texto para o modelo (>=512 tokens pode quebrar)
-    truncated = text[:512]
-    out = _sentiment_model(truncated)[0]
-    # rótulos: '1 star', ..., '5 stars'
-    label = out.get("label", "3 stars")
-    try:
-        stars = int(label.split()[0])
-    except:
-        stars = 3
-    if stars <= 2:
-        return "Negative"
-    elif stars == 3:
-        return "Neutral"
-    else:
-        return "Positive"
+def analyze_sentiments(texts: List[str]) -> List[str]:
+    """Classifica em Positive/Neutral/Negative, em lotes (servidor compartilhado ou local)."""
+    return inference.run(
+        "sentiment", texts, lambda todo: classify_sentiment(load_sentiment_model(), todo)
+    )
 
         
 # Carrega dados
@@ -99,16 +65,20 @@ if not empresa:
     st.warning("▶️ Defina a empresa na sidebar para analisar sentimentos.")
     st.stop()
 
-df = load_records(empresa)
+df = load_complaints(empresa)
 if df.empty:
     st.error("Nenhum dado encontrado para análise de sentimentos.")
     st.stop()
 
 # Botão de ação
-_sentiment_model = load_sentiment_model()
 if st.button("🔍 Identificar Sentimentos"):
     with st.spinner("Classificando sentimentos... 🧠"):
-        df["sentiment"] = df["description"].apply(lambda txt: analyze_sentiment(_sentiment_model, txt))
+        # classifica só um texto por grupo de duplicados e espalha o rótulo
+        dd = dedup_texts(df["description"].tolist())
+        canon = df["description"].iloc[dd.canonical]
+        df["sentiment"] = dd.broadcast(analyze_sentiments(canon.tolist()))
+        logger.info("Sentimento calculado para %d de %d textos (duplicados reaproveitados)",
+                    len(canon), len(df))
         st.session_state["mood_df"] = df
 
 # Verifica ausência de categoria
@@ -132,6 +102,7 @@ if "mood_df" in st.session_state:
         values="description",
         aggfunc="count",
         fill_value=0,
+        observed=True,  # source/category são categóricos
     )
     
     rename_map = {"Negative":"😠", "Neutral":"😐", "Positive":"😍"}
@@ -145,10 +116,10 @@ if "mood_df" in st.session_state:
     for src in sel:
         st.subheader(f"📑 Origem: {src}")
         grp = filt[filt["source"] == src]
-        table = (grp.groupby(["category", "sentiment"]).size().reset_index(name="count"))
+        table = (grp.groupby(["category", "sentiment"], observed=True).size().reset_index(name="count"))
         # calcula percentuais por categoria
         pct = table.copy()
-        table["pct"] = 100 * table["count"] / table.groupby("category")["count"].transform("sum")
+        table["pct"] = 100 * table["count"] / table.groupby("category", observed=True)["count"].transform("sum")
         pct["sentiment"] = pct["sentiment"].map(rename_map)
         st.dataframe(pct)
 
@@ -1,13 +1,19 @@
 import sys, os
-from pathlib import Path
 import streamlit as st
 import logging
+import altair as alt
+import numpy as np
 import pandas as pd
-from plugins.schema import PluginResult
+from storage.data import data_version, load_complaints
 
 # importa embedding e cluster
 from clustering.embedding import embed_texts
-from clustering.cluster import cluster_texts
+from clustering.incremental import cluster_incremental
+from clustering.cluster import cluster_stats
+from clustering.dedup import dedup_texts
+from clustering.projection import MAX_POINTS, bounds_of, grid_bins, project_2d, region_points
+from clustering.summary import ClusterSummary, summarize_clusters
+from clustering.tuning import TUNING_K, DensityGraph, extraction_report
 
 # Ajusta PYTHONPATH para importar plugins
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
@@ -48,53 +54,156 @@ LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 logger = logging.getLogger("data-explorer-page")
 
-# --- Helpers ---
-
-def load_records_all(empresa: str) -> pd.DataFrame:
-    """
-    Carrega todos os PluginResult JSONs para a empresa em DataFrame.
-    Campos: source, date, category, description
-    """
-    rows = []
-    for f in Path("data").glob(f"*_{empresa}.json"):
-        pr: PluginResult = PluginResult.model_validate_json(f.read_text(encoding="utf-8"))
-        for c in pr.complaints:
-            rows.append({
-                "source": pr.plugin,
-                "date": c.date,
-                "category": c.category,
-                "description": c.description
-            })
-    return pd.DataFrame(rows)
-
-# Botão de ação
+# reclamações por página no detalhe de um cluster
+PAGE_SIZE = 50
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def prepare(empresa: str, version: tuple):
+    """Embeddings dos textos únicos e grafo k-NN: calculados uma vez por versão dos dados."""
+    df = load_complaints(empresa)
+    # embeda/clusteriza só um texto por grupo de duplicados
+    dd = dedup_texts(df["description"].tolist())
+    texts = df["description"].iloc[dd.canonical].tolist()
+    embeddings = embed_texts(texts)
+    graph = DensityGraph.build(embeddings, dd.counts)
+    logger.info("Preparados %d textos canônicos de %d", len(texts), len(df))
+    return df, dd, texts, embeddings, graph
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def summarize(empresa: str, version: tuple, labels: np.ndarray) -> ClusterSummary:
+    """Palavras-chave, medóides e composição, em cache junto com os rótulos."""
+    df, dd, texts, embeddings, _ = prepare(empresa, version)
+    return summarize_clusters(texts, labels, embeddings, dd.counts, frame=df, inverse=dd.inverse)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def projection(empresa: str, version: tuple) -> np.ndarray:
+    """Coordenadas 2-D dos textos únicos: uma projeção por versão dos dados."""
+    return project_2d(prepare(empresa, version)[3])
+
+
+# Botão de ação: o resto da página sobrevive aos reruns dos sliders
 if st.button("🎯 Gerar clusters"):
-    df = load_records_all(empresa)
-    if df.empty:
-        st.error("Nenhum dado disponível para clusterização.")
-        st.stop()
-
-    with st.spinner("Gerando embeddings e clusters... 🧠"):
-        texts = df["description"].tolist()
-        embeddings = embed_texts(texts)
-        clusters_map = cluster_texts(embeddings, texts)  # dict[int, List[str]]
-        # converte para DataFrame de mapeamento
-        mapping = []
-        for cid, tlist in clusters_map.items():
-            for txt in tlist:
-                mapping.append({"description": txt, "cluster": cid})
-        map_df = pd.DataFrame(mapping)
-        # junta com df original
-        df2 = df.merge(map_df, on="description", how="left")
-
-    # gráfico de barras com tamanhos
-    cluster_counts = df2["cluster"].value_counts().sort_index()
-    st.subheader("📈 Tamanho de cada cluster")
-    st.bar_chart(cluster_counts)
-
-    # tabela detalhada
-    st.subheader("📝 Reclamações por cluster")
-    df2 = df2.sort_values("cluster")[["source", "category", "cluster", "description"]]
-    st.dataframe(df2.reset_index(drop=True))
-else:
+    st.session_state["explorer_empresa"] = empresa
+if st.session_state.get("explorer_empresa") != empresa:
     st.info("Clique em **🎯 Gerar clusters** para iniciar a clusterização.")
+    st.stop()
+
+if load_complaints(empresa).empty:
+    st.error("Nenhum dado disponível para clusterização.")
+    st.stop()
+with st.spinner("Gerando embeddings e grafo de vizinhos... 🧠"):
+    df, dd, texts, embeddings, graph = prepare(empresa, data_version(empresa))
+
+# ajuste instantâneo: cada par (eps, min_samples) é extraído do grafo em cache
+st.subheader("🎛️ Parâmetros do DBSCAN")
+col_eps, col_min = st.columns(2)
+eps = col_eps.slider("eps (distância de cosseno)", 0.05, 0.6, 0.3, 0.01)
+min_samples = col_min.slider("min_samples", 2, TUNING_K, 5)
+preview = graph.extract(eps, min_samples)
+report = extraction_report(preview, embeddings, dd.counts)
+m1, m2, m3 = st.columns(3)
+m1.metric("Clusters", report["clusters"])
+m2.metric("Ruído", f"{report['noise_ratio']:.0%}")
+m3.metric("Silhueta", "—" if report["silhouette"] is None else f"{report['silhouette']:.2f}")
+
+# aplicar grava o modelo da empresa (IDs estáveis, atribuição incremental)
+refit = st.checkbox("🔁 Reclusterizar do zero", value=False)
+results = st.session_state.setdefault("explorer_result", {})
+if st.button("💾 Aplicar parâmetros"):
+    with st.spinner("Clusterizando... 🧠"):
+        # textos já vistos mantêm o cluster; só os novos são atribuídos
+        labels, info = cluster_incremental(empresa, texts, embeddings, eps=eps,
+                                           min_samples=min_samples,
+                                           sample_weight=dd.counts, refit=refit)
+    results[empresa] = (eps, min_samples, labels, info)
+
+saved = results.get(empresa)
+if saved and saved[:2] == (eps, min_samples):
+    labels, info = saved[2], saved[3]
+    if info["mode"] == "incremental":
+        st.caption(
+            f"➕ {info['assigned']} textos novos atribuídos ao modelo salvo · "
+            f"ruído entre novos: {info['noise_ratio']:.0%} · crescimento: {info['growth']:.0%}"
+        )
+    else:
+        st.caption(f"🔁 Reclusterização completa ({info['reason']}): {info['clusters']} clusters")
+else:
+    labels = preview
+    st.caption("👀 Prévia (não salva): clique em **💾 Aplicar parâmetros** para gravar o modelo.")
+
+summary = summarize(empresa, data_version(empresa), labels)
+stats = cluster_stats(labels, embeddings, dd.counts)
+
+# gráfico de barras com tamanhos (já somados com os duplicados)
+st.subheader("📈 Tamanho de cada cluster")
+st.bar_chart(stats.set_index("cluster")["size"].sort_index())
+
+# resumo: uma linha por cluster em vez de todas as reclamações
+st.subheader("🧾 Resumo dos clusters")
+overview = summary.table.merge(stats[["cluster", "share", "cohesion"]], on="cluster")
+st.dataframe(
+    overview[["cluster", "size", "share", "cohesion", "keywords", "medoid"]],
+    column_config={
+        "size": "Reclamações",
+        "share": st.column_config.ProgressColumn("Fração", format="%.2f", min_value=0, max_value=1),
+        "cohesion": st.column_config.NumberColumn("Coesão", format="%.2f"),
+        "keywords": "Termos (c-TF-IDF)",
+        "medoid": "Reclamação típica",
+    },
+    hide_index=True,
+)
+
+# mapa: células agregadas no zoom amplo, pontos crus só numa região pequena
+st.subheader("🗺️ Mapa dos clusters")
+xy = projection(empresa, data_version(empresa))
+x0, x1, y0, y1 = bounds_of(xy)
+col_x, col_y = st.columns(2)
+zx = col_x.slider("Zoom X", x0, x1, (x0, x1), format="%.2f")
+zy = col_y.slider("Zoom Y", y0, y1, (y0, y1), format="%.2f")
+region = (*zx, *zy)
+idx, in_region = region_points(xy, region)
+if in_region <= MAX_POINTS:
+    points = pd.DataFrame({
+        "x": xy[idx, 0], "y": xy[idx, 1], "cluster": labels[idx].astype(str),
+        "reclamação": [texts[i][:120] for i in idx],
+    })
+    chart = alt.Chart(points).mark_circle(size=30, opacity=0.7).encode(
+        x="x:Q", y="y:Q", color="cluster:N", tooltip=["cluster", "reclamação"],
+    )
+    st.caption(f"{in_region} textos distintos na região")
+else:
+    cells = grid_bins(xy, labels, dd.counts, bounds=region).assign(cluster=lambda d: d["cluster"].astype(str))
+    chart = alt.Chart(cells).mark_square(opacity=0.8).encode(
+        x="x:Q", y="y:Q", color="cluster:N", size=alt.Size("count:Q", legend=None),
+        tooltip=["cluster", "count", alt.Tooltip("purity:Q", format=".0%")],
+    )
+    st.caption(f"{in_region} textos distintos na região, agregados em {len(cells)} células — "
+               f"aproxime até {MAX_POINTS} para ver os pontos")
+st.altair_chart(chart.properties(height=480), use_container_width=True)
+
+# detalhe de um cluster: composição e membros paginados sob demanda
+st.subheader("🔎 Detalhe do cluster")
+row = summary.table.set_index("cluster").loc[
+    st.selectbox("Cluster", summary.table["cluster"].tolist(),
+                 format_func=lambda c: "ruído (-1)" if c == -1 else f"{c}")
+]
+cid = row.name
+st.markdown(f"**Termos:** {row['keywords'] or '—'}")
+for ex in [row["medoid"], *row["exemplars"]]:
+    st.markdown(f"> {ex[:400]}")
+col_src, col_cat = st.columns(2)
+if cid in summary.sources.index:
+    col_src.bar_chart(summary.sources.loc[cid])
+    col_cat.bar_chart(summary.categories.loc[cid])
+
+members = summary.order[row["start"]:row["end"]]
+n_pages = max(1, -(-len(members) // PAGE_SIZE))
+page = st.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1)
+chunk = members[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+# só a página atual vai ao navegador: textos únicos, com nº de duplicados
+page_df = df.iloc[dd.canonical[chunk]][["source", "category", "description"]].copy()
+page_df.insert(0, "duplicados", dd.counts[chunk])
+st.dataframe(page_df.reset_index(drop=True), hide_index=True)
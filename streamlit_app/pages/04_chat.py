@@ -11,7 +11,6 @@ os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
 # Silence LangChain deprecation warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-from pathlib import Path
 import streamlit as st
 from langchain_community.chat_models import ChatOpenAI
 from langchain_community.embeddings import OpenAIEmbeddings
@@ -28,7 +27,8 @@ LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 logger = logging.getLogger("chatbot-page")
 
-from plugins.schema import PluginResult
+from storage.data import data_version, load_complaints
+from clustering.dedup import dedup_texts
 
 # Configuração de página
 st.set_page_config(page_title="Chat", page_icon="🤖", layout="wide")
@@ -39,16 +39,23 @@ st.sidebar.markdown("**Empresa:** " + st.session_state.get("empresa_cache", "N/D
 
 # --- Helpers ---
 @st.cache_data(show_spinner=False)
-def load_documents(empresa: str) -> list[Document]:
+def load_documents(empresa: str, version: tuple) -> list[Document]:
+    # `version` só entra na chave do cache: dados novos no banco invalidam
     logger.info(f"Loading documents for company: {empresa}")
-    docs = []
-    for f in Path("data").glob(f"*_{empresa}.json"):
-        pr = PluginResult.model_validate_json(f.read_text(encoding="utf-8"))
-        for c in pr.complaints:
-            docs.append(Document(page_content=c.description,
-                                 metadata={"source": pr.plugin, "category": c.category}))
-    logger.info(f"Loaded {len(docs)} documents for {empresa}")
-    return docs
+    df = load_complaints(empresa)
+    docs = [
+        Document(page_content=desc, metadata={"source": src, "category": cat})
+        for src, cat, desc in zip(df["source"], df["category"], df["description"])
+    ]
+    # indexa só um documento por grupo de duplicados
+    dd = dedup_texts([d.page_content for d in docs])
+    unique = []
+    for pos, count in zip(dd.canonical, dd.counts):
+        doc = docs[pos]
+        doc.metadata["duplicates"] = int(count)
+        unique.append(doc)
+    logger.info(f"Loaded {len(docs)} documents for {empresa} ({len(unique)} unique)")
+    return unique
 
 # Identificador da empresa
 empresa = st.session_state.get("empresa_cache", "").strip().upper()
@@ -64,7 +71,7 @@ initial_key = f"initial_messages_{empresa}"
 
 # Inicializa vector store por empresa
 if vstore_key not in st.session_state:
-    docs = load_documents(empresa)
+    docs = load_documents(empresa, data_version(empresa))
     if not docs:
         st.error("Nenhum dado disponível para chat.")
         st.stop()
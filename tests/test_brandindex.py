@@ -0,0 +1,79 @@
+import os
+from pathlib import Path
+import pytest
+import plugins.snapshot as snapshot
+from plugins.brandindex import INDEX_FILE, BrandIndex, load_index
+from plugins.ingest_consumidor_gov import ConsumidorGovPlugin
+
+HEADER = "Data Abertura;Nome Fantasia;Assunto;Problema"
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "snapshots")
+
+
+def build_snapshot(tmp_path: Path, rows) -> tuple:
+    """Gera o snapshot Parquet (e o índice) pelo caminho real do plugin."""
+    source = tmp_path / "source" / "v1"
+    source.parent.mkdir(parents=True, exist_ok=True)
+    source.write_text("\n".join([HEADER, *(";".join(r) for r in rows)]) + "\n", encoding="utf-8")
+    plugin = ConsumidorGovPlugin()
+    plugin._open_snapshot(source)
+    return plugin, source, tmp_path / "snapshots" / plugin.NAME / source.name
+
+
+def brand_rows(counts):
+    return [(f"{1 + i % 28:02d}/03/2025", brand, "Cobrança", f"{brand} {i}")
+            for brand, n in counts.items() for i in range(n)]
+
+
+def test_suggest_matches_accent_and_punctuation_insensitive(tmp_path):
+    _, _, target = build_snapshot(tmp_path, brand_rows({"Claro S.A.": 5, "CLARO S/A": 3, "Vivo": 7}))
+    index = load_index(target / INDEX_FILE)
+    assert [n for n, _ in index.suggest("claro s")] == ["Claro S.A."]
+    assert index.suggest("claro s")[0][1] == 8
+
+
+def test_empty_query_suggests_most_frequent_brands(tmp_path):
+    _, _, target = build_snapshot(tmp_path, brand_rows({"Claro S.A.": 5, "Vivo": 7, "Tim": 1}))
+    index = load_index(target / INDEX_FILE)
+    assert index.suggest("", limit=2) == [("Vivo", 7), ("Claro S.A.", 5)]
+    # resolver nunca casa com tudo
+    assert index.resolve("") == set()
+
+
+def test_fetch_resolves_spellings_and_skips_other_partitions(tmp_path):
+    plugin, source, target = build_snapshot(tmp_path, [
+        ("01/02/2023", "Claro S.A.", "Cobrança", "Fatura dupla"),
+        ("05/06/2025", "CLARO S/A", "Internet", "Sem sinal"),
+        ("07/07/2025", "CLARO S/A", "Internet", "Lentidão"),
+        ("03/03/2024", "Vivo", "Entrega", "Atraso"),
+    ])
+    index = load_index(target / INDEX_FILE)
+    assert index.resolve("Claro S.A.") == {"Claro S.A.", "CLARO S/A"}
+    assert index.partitions("Claro S.A.") == {2023, 2025}
+
+    # a partição de 2024 só tem Vivo: corrompida, não pode ser lida
+    for part in (target / "data" / f"{snapshot.PARTITION_COL}=2024").iterdir():
+        part.write_bytes(b"isto nao e parquet")
+    plugin.download = lambda: source
+    result = plugin.fetch("Claro S.A.")
+    assert sorted(c.raw_brand for c in result.complaints) == ["CLARO S.A.", "CLARO S/A", "CLARO S/A"]
+    with pytest.raises(RuntimeError):
+        plugin.fetch("Vivo")
+
+
+def test_load_index_reloads_after_mtime_change(tmp_path):
+    _, _, target = build_snapshot(tmp_path, brand_rows({"Claro S.A.": 2}))
+    file = target / INDEX_FILE
+    first = load_index(file)
+    assert load_index(file) is first
+
+    BrandIndex(columns=["Nome Fantasia"], keys=["VIVO"], names=[["Vivo"]], rows=[4],
+               years=[[2025]], trigrams={"VIV": [0], "IVO": [0]}).save(file)
+    mtime = file.stat().st_mtime + 10
+    os.utime(file, (mtime, mtime))
+    again = load_index(file)
+    assert again is not first
+    assert again.suggest("") == [("Vivo", 4)]
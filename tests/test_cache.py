@@ -0,0 +1,112 @@
+import hashlib, json, threading
+import multiprocessing as mp
+from conftest import QuietHandler
+from plugins.cache import SourceCache
+
+
+class VersionedFiles(QuietHandler):
+    """`/<nome>` devolve `files[nome]` com ETag; 304 quando o If-None-Match confere."""
+    files = {}
+    requests = []
+    lock = threading.Lock()
+
+    def do_GET(self):
+        name = self.path.lstrip("/")
+        body = self.files[name]
+        etag = f'"{hashlib.sha1(body).hexdigest()[:12]}"'
+        with self.lock:
+            self.requests.append((name, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.reply(304, headers={"ETag": etag})
+        else:
+            self.reply(200, body, {"ETag": etag})
+
+
+def make_handler(files):
+    return type("Handler", (VersionedFiles,), {"files": dict(files), "requests": []})
+
+
+def _fetch_many(root, base, names, barrier):
+    # roda em outro processo, como os workers do "Atualizar todos"
+    cache = SourceCache(root, revalidate_after=0)
+    barrier.wait()
+    for name in names:
+        assert cache.fetch(f"{base}/{name}").read_bytes() == name.encode() * 10
+
+
+def test_index_survives_concurrent_processes(http_server, tmp_path):
+    names = [f"f{i}" for i in range(120)]
+    base = http_server(make_handler({n: n.encode() * 10 for n in names}))
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(4)
+    # uma passada só: sem a trava, o índice gravado por um processo apaga o do outro
+    procs = [ctx.Process(target=_fetch_many, args=(tmp_path, base, names[i::4], barrier))
+             for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(120)
+        assert p.exitcode == 0
+
+    index = json.loads((tmp_path / "index.json").read_text(encoding="utf-8"))
+    assert sorted(index) == sorted(f"{base}/{n}" for n in names)
+    for url, entry in index.items():
+        assert (tmp_path / "blobs" / entry["sha256"]).read_bytes() == url.rsplit("/", 1)[1].encode() * 10
+
+
+def test_touch_restores_entry_removed_by_another_process(http_server, tmp_path):
+    base = http_server(make_handler({"base.csv": b"x"}))
+    cache = SourceCache(tmp_path, revalidate_after=3600)
+    path = cache.fetch(f"{base}/base.csv")
+    cached = cache.entry(f"{base}/base.csv")
+    (tmp_path / "index.json").write_text("{}", encoding="utf-8")
+    assert cache._touch(f"{base}/base.csv", cached) == path
+    assert cache.entry(f"{base}/base.csv")["sha256"] == cached["sha256"]
+    # sem o blob não há o que restaurar
+    path.unlink()
+    (tmp_path / "index.json").write_text("{}", encoding="utf-8")
+    assert cache._touch(f"{base}/base.csv", cached) is None
+
+
+def test_revalidation_uses_304_without_body(http_server, tmp_path):
+    handler = make_handler({"base.csv": b"a;b\n1;2\n"})
+    base = http_server(handler)
+    cache = SourceCache(tmp_path, revalidate_after=0)
+
+    first = cache.fetch(f"{base}/base.csv")
+    again = cache.fetch(f"{base}/base.csv")
+    assert again == first
+    assert first.read_bytes() == b"a;b\n1;2\n"
+    # o 2º pedido foi condicional (If-None-Match) e voltou 304
+    (_, cond1), (_, cond2) = handler.requests
+    assert cond1 is None and cond2 == cache.entry(f"{base}/base.csv")["etag"]
+
+    handler.files["base.csv"] = b"a;b\n1;2\n3;4\n"
+    fresh = cache.fetch(f"{base}/base.csv")
+    assert fresh != first
+    assert fresh.read_bytes() == b"a;b\n1;2\n3;4\n"
+
+
+def test_recent_entry_is_served_without_network(http_server, tmp_path):
+    handler = make_handler({"base.csv": b"x"})
+    base = http_server(handler)
+    cache = SourceCache(tmp_path, revalidate_after=3600)
+    cache.fetch(f"{base}/base.csv")
+    cache.fetch(f"{base}/base.csv")
+    assert len(handler.requests) == 1
+
+
+def test_lru_eviction_keeps_recently_used_blobs(http_server, tmp_path):
+    handler = make_handler({n: n.encode() * 100 for n in ("a", "b", "c")})
+    base = http_server(handler)
+    # cabem dois blobs de 100 bytes
+    cache = SourceCache(tmp_path, max_bytes=250, revalidate_after=3600)
+    a = cache.fetch(f"{base}/a")
+    b = cache.fetch(f"{base}/b")
+    cache.fetch(f"{base}/a")  # a passa a ser o mais recente
+    c = cache.fetch(f"{base}/c")
+
+    assert a.exists() and c.exists()
+    assert not b.exists()
+    assert cache.entry(f"{base}/b") is None
+    assert sum(p.stat().st_size for p in cache.blob_dir.iterdir()) <= 250
@@ -0,0 +1,60 @@
+import multiprocessing as mp
+import numpy as np
+from clustering.embcache import EmbeddingCache
+
+
+def fake_encode(texts):
+    # vetor determinístico por texto: dá para conferir quem leu o quê
+    return np.array([[len(t), sum(map(ord, t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def _writer(root, texts, barrier, out):
+    cache = EmbeddingCache("fake-model", root=root)
+    barrier.wait()  # os dois abrem o cache antes de qualquer escrita
+    for i in range(0, len(texts), 7):
+        cache.get_or_compute(texts[i:i + 7], fake_encode)
+    barrier.wait()
+    everything = [t for group in out["all"] for t in group]
+    got, encoded = cache.get_or_compute(everything, fake_encode)
+    out[mp.current_process().name] = (bool(np.array_equal(got, fake_encode(everything))), encoded)
+
+
+def test_two_processes_share_cache_files(tmp_path):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(2)
+    texts_a = [f"a{'a' * (i % 5)} {i}" for i in range(200)]
+    texts_b = [f"z{'z' * (i % 7)} {i}" for i in range(200)] + texts_a[:20]
+    with ctx.Manager() as manager:
+        out = manager.dict({"all": [texts_a, texts_b]})
+        procs = [ctx.Process(target=_writer, name=name, args=(tmp_path, texts, barrier, out))
+                 for name, texts in (("A", texts_a), ("B", texts_b))]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(60)
+            assert p.exitcode == 0
+        results = {k: out[k] for k in ("A", "B")}
+    # cada processo vê os vetores certos, inclusive os gravados pelo outro
+    for ok, encoded in results.values():
+        assert ok
+        assert encoded == 0
+
+    fresh = EmbeddingCache("fake-model", root=tmp_path)
+    everything = texts_a + texts_b[:200]
+    assert len(fresh) == len(everything)
+    got, encoded = fresh.get_or_compute(everything, fake_encode)
+    assert encoded == 0
+    assert np.array_equal(got, fake_encode(everything))
+
+
+def test_reopen_truncates_torn_tail(tmp_path):
+    cache = EmbeddingCache("fake-model", root=tmp_path)
+    cache.get_or_compute(["um", "dois"], fake_encode)
+    # escrita interrompida: vetor gravado sem a chave
+    with open(cache._vec_path, "ab") as f:
+        f.write(fake_encode(["tres"]).tobytes())
+    reopened = EmbeddingCache("fake-model", root=tmp_path)
+    assert len(reopened) == 2
+    got, encoded = reopened.get_or_compute(["tres", "um"], fake_encode)
+    assert encoded == 1
+    assert np.array_equal(got, fake_encode(["tres", "um"]))
@@ -0,0 +1,103 @@
+import os, sys, time
+import numpy as np
+import pytest
+from clustering.embedding import EmbeddingEngine, quantize
+
+# o benchmark completo (python -m tests.test_embedding) usa 100 mil textos
+BENCH_ROWS = int(os.environ.get("SPOTLIGHT_BENCH_EMBED_ROWS", 5_000))
+WORDS = ("cobrança indevida fatura plano internet sinal queda atendimento protocolo "
+         "cancelamento reembolso multa contrato portabilidade velocidade técnico visita "
+         "linha bloqueada recarga saldo débito automático cartão juros prazo entrega").split()
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list:
+    """Reclamações sintéticas com comprimento bem variado (de 3 a ~200 palavras)."""
+    rng = np.random.default_rng(seed)
+    lengths = np.minimum(rng.lognormal(3.0, 0.9, n).astype(int) + 3, 200)
+    return [" ".join(rng.choice(WORDS, size=k)) for k in lengths]
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    return (a * b).sum(1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def synthetic_embeddings(n: int, dim: int = 384, seed: int = 0) -> np.ndarray:
+    # grupos em torno de centros, como reclamações parecidas
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(50, dim)).astype(np.float32)
+    return centers[rng.integers(0, 50, n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("precision,itemsize,tol", [("float16", 2, 1e-3), ("int8", 1, 2e-2)])
+def test_quantized_output_preserves_cosine(precision, itemsize, tol):
+    embs = synthetic_embeddings(100_000)
+    q = quantize(embs, precision)
+    assert q.dtype.itemsize == itemsize
+    assert q.nbytes == embs.nbytes * itemsize // 4
+    # distância de cosseno (a do DBSCAN) entre pares aleatórios
+    rng = np.random.default_rng(1)
+    i, j = rng.integers(0, len(embs), (2, 20_000))
+    exact = cosine_rows(embs[i], embs[j])
+    approx = cosine_rows(q[i], q[j])
+    assert np.abs(exact - approx).max() < tol
+
+
+def test_int8_keeps_nearest_neighbours():
+    embs = synthetic_embeddings(20_000)
+    q = quantize(embs, "int8").astype(np.float32)
+    unit = embs / np.linalg.norm(embs, axis=1, keepdims=True)
+    qunit = q / np.linalg.norm(q, axis=1, keepdims=True)
+    probes = np.arange(0, len(embs), 100)
+    sims = unit[probes] @ unit.T
+    exact = np.sort(sims, axis=1)[:, -11:-1]
+    approx = np.argsort(-(qunit[probes] @ qunit.T), axis=1)[:, 1:11]
+    # vizinhos trocados só entre quase empatados: a similaridade real quase não cai
+    found = np.take_along_axis(sims, approx, axis=1)
+    assert np.abs(np.sort(found, axis=1) - exact).max() < 0.01
+
+
+def bench(n: int) -> dict:
+    """
+    Engine (lotes por comprimento de token, threads/pool configurados) contra a
+    chamada antiga `model.encode(texts)`. Devolve textos/s e o cosseno mínimo
+    de cada saída contra a antiga.
+    """
+    texts = synthetic_corpus(n)
+    engine = EmbeddingEngine()
+    model = engine.model
+    model.encode(texts[:64], show_progress_bar=False)  # aquece
+
+    start = time.perf_counter()
+    baseline = model.encode(texts, show_progress_bar=False, convert_to_numpy=True)
+    base_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    raw = engine.encode_raw(texts)
+    engine_s = time.perf_counter() - start
+    engine.close()
+
+    out = {"baseline": (n / base_s, 1.0), "engine": (n / engine_s, float(cosine_rows(raw, baseline).min()))}
+    for precision in ("float16", "int8"):
+        out[precision] = (n / engine_s, float(cosine_rows(quantize(raw, precision), baseline).min()))
+    return out
+
+
+def test_engine_matches_baseline_and_is_not_slower():
+    pytest.importorskip("sentence_transformers")
+    res = bench(BENCH_ROWS)
+    # a ordem original é restaurada depois de ordenar por comprimento
+    assert res["engine"][1] > 0.999
+    assert res["float16"][1] > 0.999
+    assert res["int8"][1] > 0.99
+    assert res["engine"][0] >= 0.9 * res["baseline"][0]
+
+
+if __name__ == "__main__":
+    # python -m tests.test_embedding [linhas]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    res = bench(n)
+    for name, (rate, cos) in res.items():
+        print(f"{name:9s} {rate:8.0f} textos/s  cosseno mín. vs. baseline {cos:.4f}")
+    print(f"speedup: {res['engine'][0] / res['baseline'][0]:.2f}x")
@@ -0,0 +1,99 @@
+import asyncio, threading, time
+import httpx
+import pytest
+from conftest import QuietHandler
+from plugins.httpclient import HttpEngine
+
+
+def flaky_handler(failures: int, status: int = 503):
+    """Responde `status` nas primeiras `failures` requisições e 200 depois."""
+    state = {"calls": 0}
+    lock = threading.Lock()
+
+    class Handler(QuietHandler):
+        def do_GET(self):
+            with lock:
+                state["calls"] += 1
+                n = state["calls"]
+            if n <= failures:
+                self.reply(status, b"erro")
+            else:
+                self.reply(200, b"ok")
+
+    return Handler, state
+
+
+def slow_handler(delay: float):
+    """Conta quantas requisições estão em andamento ao mesmo tempo."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class Handler(QuietHandler):
+        def do_GET(self):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(delay)
+            with lock:
+                state["active"] -= 1
+            self.reply(200, b"ok")
+
+    return Handler, state
+
+
+async def with_engine(fn, **kwargs):
+    engine = HttpEngine(backoff=0.01, max_backoff=0.05, **kwargs)
+    try:
+        return await fn(engine)
+    finally:
+        await engine.aclose()
+
+
+def test_retries_5xx_until_success(http_server):
+    handler, state = flaky_handler(failures=2)
+    base = http_server(handler)
+    resp = asyncio.run(with_engine(lambda e: e.get(f"{base}/x")))
+    assert resp.status_code == 200 and resp.text == "ok"
+    assert state["calls"] == 3
+
+
+def test_gives_up_after_max_attempts(http_server):
+    handler, state = flaky_handler(failures=10, status=502)
+    base = http_server(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(with_engine(lambda e: e.get(f"{base}/x"), attempts=3))
+    assert state["calls"] == 3
+
+
+def test_client_errors_are_not_retried(http_server):
+    handler, state = flaky_handler(failures=10, status=404)
+    base = http_server(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(with_engine(lambda e: e.get(f"{base}/x")))
+    assert state["calls"] == 1
+
+
+def test_per_host_concurrency_limit(http_server):
+    handler, state = slow_handler(delay=0.1)
+    base = http_server(handler)
+
+    async def burst(engine):
+        return await asyncio.gather(*(engine.get(f"{base}/{i}") for i in range(12)))
+
+    resps = asyncio.run(with_engine(burst, per_host=3))
+    assert all(r.status_code == 200 for r in resps)
+    assert state["peak"] == 3
+
+
+def test_rate_limit_spaces_request_starts(http_server):
+    handler, _ = slow_handler(delay=0)
+    base = http_server(handler)
+
+    async def paced(engine):
+        engine.set_rate_limit(base, 20.0)
+        start = time.perf_counter()
+        await asyncio.gather(*(engine.get(f"{base}/{i}") for i in range(5)))
+        return time.perf_counter() - start
+
+    # 5 inícios a 20/s: o último sai ~0,2 s depois do primeiro
+    assert asyncio.run(with_engine(paced)) >= 0.19
@@ -0,0 +1,160 @@
+import sys, time
+from datetime import datetime, timedelta
+from pathlib import Path
+import pandas as pd
+import pytest
+import storage.data as data
+from plugins.schema import Complaint, PluginResult, Watermark
+from storage.ipc import read_frame, read_result, read_table, write_result
+from storage.store import ComplaintStore
+
+BENCH_ROWS = 50_000
+
+
+def make_result(n: int) -> PluginResult:
+    start = datetime(2024, 1, 1)
+    complaints = [
+        Complaint.model_construct(
+            date=start + timedelta(minutes=i),
+            category=f"CATEGORIA {i % 40}",
+            description=f"RECLAMAÇÃO NÚMERO {i} SOBRE COBRANÇA INDEVIDA NA FATURA",
+            raw_brand=f"MARCA {i % 7}",
+        )
+        for i in range(n)
+    ]
+    return PluginResult.model_construct(
+        plugin="ANATEL", company="ACME", fetched_at=datetime(2025, 3, 1, 12),
+        total_raw=n * 3, complaints=complaints,
+        watermark=Watermark(max_date=start + timedelta(minutes=n - 1), source_version="abc"),
+    )
+
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def bench(n: int, root: Path) -> dict:
+    """
+    {formato: (bytes, escrita, abertura, DataFrame, Complaints)} para JSON
+    indentado, IPC zstd (exportação) e IPC sem compressão (padrão). Abertura
+    é o `read_result` (metadados + colunas); DataFrame e Complaints contam a
+    abertura mais `to_frame()`/`complaints`. No JSON, abrir já monta tudo.
+    """
+    result = make_result(n)
+    out = {}
+    json_path = root / "result.json"
+    _, write_s = timed(lambda: json_path.write_text(result.model_dump_json(by_alias=True, indent=2),
+                                                    encoding="utf-8"))
+    back, read_s = timed(lambda: PluginResult.model_validate_json(json_path.read_text(encoding="utf-8")))
+    _, frame_s = timed(lambda: pd.DataFrame([c.model_dump() for c in back.complaints]))
+    out["json"] = (json_path.stat().st_size, write_s, read_s, read_s + frame_s, read_s)
+    for name, compression in (("zstd", "zstd"), ("ipc", None)):
+        path = root / f"result-{name}.arrow"
+        _, write_s = timed(lambda: write_result(result, path, compression=compression))
+        _, open_s = timed(lambda: read_result(path))
+        _, frame_s = timed(lambda: read_result(path).to_frame())
+        _, objects_s = timed(lambda: read_result(path).complaints)
+        out[name] = (path.stat().st_size, write_s, open_s, frame_s, objects_s)
+    return out
+
+
+def test_roundtrip_is_lossless(tmp_path):
+    result = make_result(100)
+    for compression in ("zstd", None):
+        path = tmp_path / f"r-{compression}.arrow"
+        write_result(result, path, compression=compression)
+        back = read_result(path)
+        assert back.to_result().model_dump() == result.model_dump()
+
+
+def test_read_result_builds_complaints_on_demand(tmp_path):
+    path = tmp_path / "r.arrow"
+    write_result(make_result(50), path)
+    back = read_result(path)
+    assert (back.company, back.total_raw, len(back)) == ("ACME", 150, 50)
+    assert back._complaints is None
+    frame = back.to_frame()
+    assert back._complaints is None
+    assert list(frame["description"]) == [c.description for c in back.complaints]
+    assert back.complaints is back.complaints
+
+
+def test_uncompressed_read_maps_the_file(tmp_path):
+    path = tmp_path / "r.arrow"
+    # sem compressão é o padrão
+    write_result(make_result(1_000), path)
+    table = read_table(path)
+    # buffers sem compressão apontam para o mmap, não para memória alocada
+    buf = table.column("description").chunk(0).buffers()[2]
+    assert not buf.is_mutable
+
+
+def test_benchmark_against_json(tmp_path):
+    res = bench(BENCH_ROWS, tmp_path)
+    json_size, json_write, _, json_frame, json_objects = res["json"]
+    for name in ("zstd", "ipc"):
+        size, write_s, open_s, frame_s, _ = res[name]
+        assert size < json_size / 2
+        assert write_s < json_write
+        # sem montar um Complaint por linha, o IPC é ordens de grandeza mais rápido
+        assert frame_s < json_frame / 10
+        assert open_s < json_objects / 10
+    # zstd troca leitura mais lenta por arquivo menor
+    assert res["zstd"][0] < res["ipc"][0]
+
+
+def test_import_json_reads_arrow_files(tmp_path):
+    legacy = tmp_path / "legacy"
+    write_result(make_result(30), legacy / "ingest_anatel_ACME.arrow", compression="zstd")
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    assert store.import_json(legacy) == 1
+    back = store.load("ingest_anatel", "ACME")
+    assert back.model_dump() == make_result(30).model_dump()
+
+
+def test_load_complaints_reuses_ipc_copy(tmp_path, monkeypatch):
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    monkeypatch.setattr(data, "get_store", lambda: store)
+    monkeypatch.setattr(data, "FRAME_DIR", tmp_path / "frames")
+    monkeypatch.setattr(data, "_frames", data.FrameCache())
+    store.save("ingest_anatel", make_result(200))
+
+    first = data.load_complaints("ACME")
+    assert len(list((tmp_path / "frames").glob("*.arrow"))) == 1
+
+    # outro processo: cache vazio, o SQLite não deve ser consultado
+    monkeypatch.setattr(data, "_frames", data.FrameCache())
+    monkeypatch.setattr(store, "query", lambda *a, **k: pytest.fail("releu o SQLite"))
+    again = data.load_complaints("ACME")
+    pd.testing.assert_frame_equal(again, first, check_dtype=False, check_categorical=False)
+    assert list(again.columns) == list(data.DEFAULT_COLUMNS)
+    assert isinstance(again["category"].dtype, pd.CategoricalDtype)
+
+
+def test_load_complaints_rereads_on_new_version(tmp_path, monkeypatch):
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    monkeypatch.setattr(data, "get_store", lambda: store)
+    monkeypatch.setattr(data, "FRAME_DIR", tmp_path / "frames")
+    monkeypatch.setattr(data, "_frames", data.FrameCache())
+    store.save("ingest_anatel", make_result(10))
+    assert len(data.load_complaints("ACME")) == 10
+
+    store.save("ingest_anatel", make_result(20))
+    monkeypatch.setattr(data, "_frames", data.FrameCache())
+    assert len(data.load_complaints("ACME")) == 20
+
+
+if __name__ == "__main__":
+    # python -m tests.test_ipc [linhas]
+    import tempfile
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as d:
+        res = bench(n, Path(d))
+        for name, (size, write_s, open_s, frame_s, objects_s) in res.items():
+            print(f"{name:5s} {size / 2**20:8.1f} MB  escrita {write_s:6.2f}s  abertura {open_s:6.3f}s  "
+                  f"DataFrame {frame_s:6.2f}s  Complaints {objects_s:6.2f}s")
+        (zsize, _, zopen, zframe, _), (size, _, open_s, frame_s, _) = res["zstd"], res["ipc"]
+        print(f"sem compressão: arquivo {size / zsize:.1f}x maior que zstd, "
+              f"abertura {zopen / open_s:.0f}x e DataFrame {zframe / frame_s:.1f}x mais rápidos")
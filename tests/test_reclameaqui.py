@@ -0,0 +1,144 @@
+import re, sys, threading, time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+from plugins.ingest_reclameaqui import ReclameAquiPlugin, parse_page
+
+# página de listagem no formato do site (Next.js: CSS, __NEXT_DATA__, cards aninhados)
+FIXTURE = Path(__file__).parent / "fixtures" / "reclameaqui_pagina.html"
+
+TOTAL_PAGES = 8
+PER_PAGE = 3
+
+
+def render_page(page: int) -> str:
+    if page > TOTAL_PAGES:
+        return "<html><body><p>Nenhuma reclamação</p></body></html>"
+    cards = "".join(
+        f'<div class="complaint-card__title">Assunto {page}-{i}</div>'
+        f'<p class="complaint-card__text">Reclamação {page}-{i}</p>'
+        f'<time class="complaint-card__date" datetime="2025-03-{page:02d}T10:00:00"></time>'
+        for i in range(PER_PAGE)
+    )
+    # paginação em janela: "1 2 3 … 5" na primeira, vizinhas nas demais
+    window = {1, 2, 3, 5} if page == 1 else set(range(max(1, page - 2), min(TOTAL_PAGES, page + 2) + 1))
+    links = "".join(f'<a href="/empresa/acme/pagina/{n}/">{n}</a>' for n in sorted(window))
+    return f"<html><body>{cards}<nav>{links}</nav></body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        m = re.search(r"/pagina/(\d+)/", self.path)
+        body = render_page(int(m.group(1))).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/empresa/{{slug}}/"
+    server.shutdown()
+
+
+@pytest.fixture
+def plugin(stub_site, tmp_path):
+    p = ReclameAquiPlugin()
+    p.BASE = stub_site
+    p.CHECKPOINT_DIR = tmp_path / "checkpoints"
+    p.REQUESTS_PER_SECOND = 1000.0
+    return p
+
+
+def test_windowed_pagination_reads_every_page(plugin):
+    result = plugin.fetch("ACME")
+    assert len(result.complaints) == TOTAL_PAGES * PER_PAGE
+    assert len({c.description for c in result.complaints}) == TOTAL_PAGES * PER_PAGE
+
+
+def test_resumes_from_legacy_checkpoint(plugin):
+    # checkpoint no formato antigo (lista de cards) e limite velho da 1ª página
+    ckpt = plugin.CHECKPOINT_DIR / "acme"
+    plugin._write_json(ckpt / "page-1.json",
+                       [{"title": "Assunto 1-0", "text": "Reclamação 1-0", "date": "2025-03-01"}])
+    plugin._write_json(ckpt / "state.json", {"last_page": 5})
+    result = plugin.fetch("ACME")
+    assert len(result.complaints) == 1 + (TOTAL_PAGES - 1) * PER_PAGE
+
+
+def test_mixed_date_formats_are_parsed_naive():
+    cards = [
+        {"title": "A", "text": "um", "date": "2025-03-10T12:00:00Z"},
+        {"title": "B", "text": "dois", "date": "2025-03-11T09:00:00+03:00"},
+        {"title": "C", "text": "três", "date": "12/03/2025"},
+        {"title": "D", "text": "quatro", "date": "2025-03-13"},
+    ]
+    result = ReclameAquiPlugin()._to_result("ACME", cards)
+    dates = {c.category: c.date for c in result.complaints}
+    assert dates["A"] == datetime(2025, 3, 10, 12)
+    assert dates["B"] == datetime(2025, 3, 11, 6)
+    assert dates["C"] == datetime(2025, 3, 12)
+    assert dates["D"] == datetime(2025, 3, 13)
+    assert all(d.tzinfo is None for d in dates.values())
+
+
+def bs4_parse_page(html: str):
+    """O caminho antigo (BeautifulSoup + `select`), extraindo os mesmos campos de `parse_page`."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    titles = soup.select(".complaint-card__title")
+    texts = soup.select(".complaint-card__text")
+    dates = soup.select(".complaint-card__date")
+    cards = [
+        {"title": " ".join(t.get_text(" ").split()), "text": " ".join(x.get_text(" ").split()),
+         "date": d.get("datetime") or d.get_text(strip=True)}
+        for t, x, d in zip(titles, texts, dates)
+    ]
+    pages = [int(m.group(1)) for a in soup.find_all("a", href=True)
+             for m in [re.search(r"/pagina/(\d+)/?", a["href"])] if m]
+    return cards, max(pages, default=0)
+
+
+def bench(repeat: int) -> dict:
+    """{parser: páginas/s} no fixture salvo."""
+    html = FIXTURE.read_text(encoding="utf-8")
+    out = {}
+    for name, parse in (("bs4", bs4_parse_page), ("_CardParser", parse_page)):
+        parse(html)  # aquece
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse(html)
+        out[name] = repeat / (time.perf_counter() - start)
+    return out
+
+
+def test_card_parser_matches_bs4_on_fixture():
+    pytest.importorskip("bs4")
+    html = FIXTURE.read_text(encoding="utf-8")
+    cards, last_page = parse_page(html)
+    assert len(cards) == 10 and last_page == 5
+    assert (cards, last_page) == bs4_parse_page(html)
+
+
+def test_card_parser_is_faster_than_bs4():
+    pytest.importorskip("bs4")
+    res = bench(20)
+    assert res["_CardParser"] > 1.5 * res["bs4"]
+
+
+if __name__ == "__main__":
+    # python -m tests.test_reclameaqui [repetições]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    res = bench(n)
+    for name, rate in res.items():
+        print(f"{name:12s} {rate:8.1f} páginas/s")
+    print(f"speedup: {res['_CardParser'] / res['bs4']:.2f}x")
@@ -0,0 +1,131 @@
+import pickle
+from pathlib import Path
+import pytest
+import plugins.snapshot as snapshot
+from plugins.ingest_consumidor_gov import ConsumidorGovPlugin
+from storage.store import ComplaintStore
+
+HEADER = "Data Abertura;Nome Fantasia;Assunto;Problema"
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "SNAPSHOT_DIR", tmp_path / "snapshots")
+
+
+def write_source(tmp_path: Path, version: str, rows) -> Path:
+    # o nome do arquivo faz o papel do sha256 do cache (versão da fonte)
+    path = tmp_path / "source" / version
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join([HEADER, *(";".join(r) for r in rows)]) + "\n", encoding="utf-8")
+    return path
+
+
+def test_refresh_keeps_same_key_rows_on_watermark_day(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    # data só no dia: duas reclamações distintas com a mesma chave
+    day1 = [("10/03/2025", "ACME", "Cobrança", "Cobrança indevida")] * 2
+    v1 = write_source(tmp_path, "v1", day1)
+    previous = plugin._refresh_from(v1, "ACME", None)
+    assert len(previous.complaints) == 2
+
+    rows = day1 + [("10/03/2025", "ACME", "Cobrança", "Cobrança indevida")] * 2
+    v2 = write_source(tmp_path, "v2", rows)
+    merged = plugin._refresh_from(v2, "ACME", previous)
+    full = plugin._refresh_from(v2, "ACME", None)
+    assert len(full.complaints) == 4
+    assert len(merged.complaints) == len(full.complaints)
+
+
+def test_merge_keeps_rows_before_watermark(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    old = [("01/03/2025", "ACME", "Entrega", "Atraso"), ("10/03/2025", "ACME", "Cobrança", "Dupla")]
+    previous = plugin._refresh_from(write_source(tmp_path, "v1", old), "ACME", None)
+    v2 = write_source(tmp_path, "v2", old + [("12/03/2025", "ACME", "Cobrança", "Nova")])
+    merged = plugin._refresh_from(v2, "ACME", previous)
+    assert sorted(c.description for c in merged.complaints) == ["ATRASO", "DUPLA", "NOVA"]
+
+
+def test_undated_row_does_not_push_watermark_to_now(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    # a linha sem data é preenchida com now() pelo plugin
+    rows = [("10/03/2025", "ACME", "Cobrança", "Dupla"), ("", "ACME", "Entrega", "Sem data")]
+    previous = plugin._refresh_from(write_source(tmp_path, "v1", rows), "ACME", None)
+    assert previous.watermark.max_date.strftime("%Y-%m-%d") == "2025-03-10"
+
+    # uma linha datada chega depois da sem data
+    v2 = write_source(tmp_path, "v2", rows + [("15/03/2025", "ACME", "Entrega", "Nova")])
+    merged = plugin._refresh_from(v2, "ACME", previous)
+    full = plugin._refresh_from(v2, "ACME", None)
+    assert len(full.complaints) == 3
+    assert sorted(c.description for c in merged.complaints) == \
+        sorted(c.description for c in full.complaints)
+    assert merged.watermark.max_date.strftime("%Y-%m-%d") == "2025-03-15"
+
+
+def stored_rows(store, key="ingest_consumidor_gov"):
+    return store._conn().execute(
+        "SELECT c.id, c.date, c.description FROM complaints c JOIN results r ON r.id = c.result_id "
+        "WHERE r.key = ? ORDER BY c.id", (key,)
+    ).fetchall()
+
+
+def test_save_increment_rewrites_only_rows_from_cutoff(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    old = [("01/03/2025", "ACME", "Entrega", "Atraso"), ("10/03/2025", "ACME", "Cobrança", "Dupla")]
+    store.save("ingest_consumidor_gov", plugin._refresh_from(write_source(tmp_path, "v1", old), "ACME", None))
+    before = stored_rows(store)
+
+    previous = store.load("ingest_consumidor_gov", "ACME")
+    v2 = write_source(tmp_path, "v2", old + [("12/03/2025", "ACME", "Cobrança", "Nova")])
+    merged = plugin._refresh_from(v2, "ACME", previous)
+    # sobrevive ao pool de processos do `refresh_all`
+    merged = pickle.loads(pickle.dumps(merged))
+    assert merged.increment.start == 1
+    store.save_increment("ingest_consumidor_gov", merged)
+
+    after = stored_rows(store)
+    # a linha antes da marca d'água (10/03) não foi tocada
+    assert after[0] == before[0]
+    assert sorted(r[2] for r in after) == ["ATRASO", "DUPLA", "NOVA"]
+    full = plugin._refresh_from(v2, "ACME", None)
+    assert len(store.load("ingest_consumidor_gov", "ACME").complaints) == len(full.complaints)
+
+
+def test_save_increment_for_unchanged_source_writes_nothing(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    v1 = write_source(tmp_path, "v1", [("01/03/2025", "ACME", "Entrega", "Atraso")])
+    store.save("ingest_consumidor_gov", plugin._refresh_from(v1, "ACME", None))
+    before = stored_rows(store)
+    same = plugin._refresh_from(v1, "ACME", store.load("ingest_consumidor_gov", "ACME"))
+    store.save_increment("ingest_consumidor_gov", same)
+    assert stored_rows(store) == before
+
+
+def test_save_increment_falls_back_when_store_diverged(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    store = ComplaintStore(tmp_path / "spotlight.db")
+    old = [("01/03/2025", "ACME", "Entrega", "Atraso"), ("10/03/2025", "ACME", "Cobrança", "Dupla")]
+    first = plugin._refresh_from(write_source(tmp_path, "v1", old), "ACME", None)
+    store.save("ingest_consumidor_gov", first)
+    v2 = write_source(tmp_path, "v2", old + [("12/03/2025", "ACME", "Cobrança", "Nova")])
+    merged = plugin._refresh_from(v2, "ACME", store.load("ingest_consumidor_gov", "ACME"))
+    # outra sessão regravou o resultado sem a linha antiga
+    store.save("ingest_consumidor_gov", first.model_copy(update={"complaints": first.complaints[1:]}))
+    store.save_increment("ingest_consumidor_gov", merged)
+    assert sorted(r[2] for r in stored_rows(store)) == ["ATRASO", "DUPLA", "NOVA"]
+
+
+def test_snapshot_keeps_previous_version(tmp_path):
+    plugin = ConsumidorGovPlugin()
+    rows = [("01/03/2025", "ACME", "Entrega", "Atraso")]
+    root = tmp_path / "snapshots" / plugin.NAME
+    for version in ("v1", "v2"):
+        plugin._open_snapshot(write_source(tmp_path, version, rows))
+    # a versão anterior continua legível por quem ainda a consulta
+    assert sorted(p.name for p in root.iterdir()) == ["v1", "v2"]
+
+    plugin._open_snapshot(write_source(tmp_path, "v3", rows))
+    assert sorted(p.name for p in root.iterdir()) == ["v2", "v3"]
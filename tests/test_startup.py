@@ -0,0 +1,110 @@
+import json, os, subprocess, sys
+from datetime import datetime
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+DISCOVER = ROOT / "streamlit_app" / "pages" / "01_discover.py"
+# nada disso pode carregar antes dos cards do Discover aparecerem
+HEAVY = ("pandas", "numpy", "pyarrow", "pydantic", "bs4", "httpx", "tenacity")
+# teto do 1º render (a frio, sem contar o import do próprio streamlit)
+RENDER_BUDGET_S = 0.5
+
+
+def cold_run(code: str, cwd: Path = ROOT, env: dict = None) -> dict:
+    """Roda `code` num interpretador novo; `code` preenche `out` (dict) e os módulos pesados são anotados."""
+    probe = (
+        "import json, sys, time\n"
+        "out = {}\n"
+        f"{code}\n"
+        f"out['heavy'] = [m for m in {HEAVY!r} if m in sys.modules]\n"
+        "print(json.dumps(out))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=cwd, capture_output=True, text=True,
+                          env={**os.environ, **(env or {})})
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def render_discover(tmp_path: Path, empresa: str = "ACME", show_brands: bool = False) -> dict:
+    """Renderiza o Discover via AppTest num processo novo, com banco e snapshots em `tmp_path`."""
+    code = (
+        f"sys.path.insert(0, {str(ROOT)!r})\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({str(DISCOVER)!r}, default_timeout=60)\n"
+        f"at.session_state['empresa_cache'] = {empresa!r}\n"
+        "t = time.perf_counter()\n"
+        "at.run()\n"
+        "out['elapsed'] = time.perf_counter() - t\n"
+    )
+    if show_brands:
+        code += (
+            "at.toggle(key='show_brands').set_value(True).run()\n"
+            "out['options'] = list(at.selectbox(key='brand_choice').options)\n"
+        )
+    code += (
+        "out['exception'] = [str(e.value) for e in at.exception]\n"
+        "out['markdown'] = [m.value for m in at.markdown]\n"
+    )
+    env = {
+        "SPOTLIGHT_DB": str(tmp_path / "spotlight.db"),
+        "SPOTLIGHT_SNAPSHOT_DIR": str(tmp_path / "snapshots"),
+        "SPOTLIGHT_CACHE_DIR": str(tmp_path / "cache"),
+    }
+    return cold_run(code, cwd=tmp_path, env=env)
+
+
+def test_discover_renders_without_heavy_modules(tmp_path):
+    pytest.importorskip("streamlit.testing.v1")
+    out = render_discover(tmp_path)
+    assert out["exception"] == []
+    assert out["markdown"].count("*Nenhum dado disponível.*") >= 1
+    assert out["heavy"] == []
+    assert out["elapsed"] < RENDER_BUDGET_S
+
+
+def test_discover_cards_with_stored_data_stay_light(tmp_path):
+    pytest.importorskip("streamlit.testing.v1")
+    from plugins.schema import Complaint, PluginResult
+    from storage.store import ComplaintStore
+    complaints = [
+        Complaint.model_construct(date=datetime(2025, 3, d), category="COBRANÇA",
+                                  description=f"RECLAMAÇÃO {d}", raw_brand=brand)
+        for d, brand in ((1, "ACME S/A"), (2, "ACME S/A"), (3, "ACME LTDA"))
+    ]
+    ComplaintStore(tmp_path / "spotlight.db").save("ingest_anatel", PluginResult.model_construct(
+        plugin="ANATEL", company="ACME", fetched_at=datetime(2025, 3, 4), total_raw=10,
+        complaints=complaints, watermark=None,
+    ))
+    out = render_discover(tmp_path)
+    assert out["exception"] == []
+    assert "- ACME S/A: 2" in out["markdown"]
+    assert any("Reclamações para a empresa: 3" in m for m in out["markdown"])
+    assert out["heavy"] == []
+    assert out["elapsed"] < RENDER_BUDGET_S
+
+
+def test_brand_suggestions_read_only_the_index(tmp_path):
+    pytest.importorskip("streamlit.testing.v1")
+    from plugins.brandindex import INDEX_FILE, BrandIndex
+    target = tmp_path / "snapshots" / "ANATEL" / "abc"
+    target.mkdir(parents=True)
+    BrandIndex(columns=["Marca"], keys=["ACME S A", "OUTRA"], names=[["ACME S/A"], ["Outra"]],
+               rows=[5, 9], years=[[2025], [2025]],
+               trigrams={"ACM": [0], "CME": [0], "OUT": [1], "UTR": [1], "TRA": [1]},
+               ).save(target / INDEX_FILE)
+    out = render_discover(tmp_path, show_brands=True)
+    assert out["exception"] == []
+    # parecidas com a empresa primeiro, depois as mais frequentes
+    assert out["options"][:2] == ["ACME S/A — 5 registros", "Outra — 9 registros"]
+    assert out["heavy"] == []
+
+
+def test_plugin_module_is_imported_on_first_use():
+    out = cold_run(
+        "import plugins.registry as r\n"
+        "r.get_plugin('ingest_cvm')\n"
+        "assert 'plugins.ingest_anatel' not in sys.modules\n"
+        "assert r.get_plugin('ingest_cvm') is r.get_plugin('ingest_cvm')"
+    )
+    assert "pandas" in out["heavy"]
@@ -0,0 +1,55 @@
+import tracemalloc
+import pandas as pd
+from plugins.ingest_consumidor_gov import ConsumidorGovPlugin
+from plugins.streaming import IterTextIO, iter_file
+
+ROWS = 40_000
+CHUNK_ROWS = 2_000
+
+
+def write_csv(path, rows=ROWS):
+    line = "{:02d}/03/2025;MARCA {};Cobrança indevida;" + "Texto longo da reclamação " * 24 + "{}\n"
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write("Data Abertura;Nome Fantasia;Assunto;Problema\n")
+        f.writelines(line.format(i % 28 + 1, i % 50, i) for i in range(rows))
+    return path.stat().st_size
+
+
+def peak_while(consume):
+    tracemalloc.start()
+    try:
+        consume()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_iter_text_io_roundtrips_multibyte_across_blocks(tmp_path):
+    path = tmp_path / "acentos.csv"
+    path.write_bytes(("ção;é\n" * 1000).encode("utf-8-sig"))
+    text = IterTextIO(iter_file(path, block_size=7), encoding="utf-8-sig")
+    assert text.read() == "ção;é\n" * 1000
+
+
+def test_read_source_peak_memory_tracks_chunk_not_file(tmp_path):
+    path = tmp_path / "basecompleta.csv"
+    size = write_csv(path)
+    plugin = ConsumidorGovPlugin()
+    plugin.CHUNK_ROWS = CHUNK_ROWS
+
+    seen = []
+
+    def consume():
+        for chunk in plugin._read_source(path):
+            seen.append(len(chunk))
+
+    peak = peak_while(consume)
+    assert sum(seen) == ROWS
+    assert max(seen) == CHUNK_ROWS
+    # o arquivo tem dezenas de MB; um chunk de 2 mil linhas cabe em poucos
+    assert size > 20 * 2**20
+    assert peak < size / 5, f"pico {peak / 2**20:.1f} MB para um CSV de {size / 2**20:.1f} MB"
+
+    # referência: ler tudo de uma vez estoura o mesmo teto
+    whole = peak_while(lambda: pd.read_csv(path, sep=";", dtype=str, encoding="utf-8-sig"))
+    assert whole > peak * 2